@@ -2,13 +2,18 @@
 
 import gradio as gr
 import logging
+import uuid
 from pathlib import Path
 
-from src.rag_pipeline import RAGSystem
 from src.config import APIConfig
+from src.health import HealthChecker
+from src.metrics import count, start_metrics_server, timed_stage
+from src.middleware.timeout import TimeoutError
+from src.startup import Startup
+from src.tracing import start_trace
 from src.utils.validation import validate_question
-from src.session import SessionManager
-from src.middleware.rate_limiter import RateLimiter
+from src.session import create_session_manager
+from src.middleware.rate_limiter import create_rate_limiter
 
 import sys
 
@@ -38,30 +43,53 @@ error_logger.addHandler(error_handler)
 
 print(" Loading Production RAG Chatbot...")
 
-# Initialize components
+# Initialize components. The RAG system (index and embedding model) is
+# built by a background warm-up thread so the UI binds its port at once.
+startup = Startup()
+health = HealthChecker(startup=startup)
+
 try:
-    rag = RAGSystem()
-    session_manager = SessionManager()
-    rate_limiter = RateLimiter(max_requests=30, window_seconds=60)
+    session_manager = create_session_manager()
+    rate_limiter = create_rate_limiter()
     logger.info("All components initialized successfully")
 except Exception as e:
     logger.critical(f"Failed to initialize application: {e}")
     raise
 
-def respond(message: str, history: list, session_id: str = None) -> list:
-    """Process user message with production hardening."""
+async def respond(message: str, history: list, session_id: str = None):
+    """Process user message with production hardening.
+    
+    An async generator: while retrieval runs on the RAG system's executor
+    the event loop keeps serving other chats, so concurrent users don't
+    each hold a Gradio worker thread. It yields ``(history, session_id)``.
+    A browser's first message arrives without a session id, so one is
+    issued here. Gradio keeps it in the session state, and later messages
+    reuse the same session and rate-limit bucket.
+    """
+    session_id = session_id or uuid.uuid4().hex
     
     # Rate limiting
-    client_id = session_id or "anonymous"
-    if not rate_limiter.is_allowed(client_id):
+    if not rate_limiter.is_allowed(session_id):
+        count("rag_rate_limited", "Requests rejected by the rate limiter")
         error_msg = " Rate limit exceeded. Please wait a moment."
-        return history + [{"role": "assistant", "content": error_msg}]
+        yield history + [{"role": "assistant", "content": error_msg}], session_id
+        return
     
     try:
         # Validate input
         message = validate_question(message)
         logger.info(f"Processing question: {message[:50]}...")
         
+        # Still warming up: answer right away instead of queueing
+        rag = startup.start().system
+        if rag is None:
+            if startup.error:
+                error_msg = "❌ The complaint index failed to load. Our team has been notified."
+            else:
+                error_msg = "⏳ Still loading the complaint index, please try again in a moment."
+            yield history + [{"role": "assistant", "content": error_msg}], session_id
+            return
+        
         # Get or create session
         session = session_manager.get_or_create_session(session_id)
         
@@ -69,38 +97,44 @@ def respond(message: str, history: list, session_id: str = None) -> list:
         history = history + [{"role": "user", "content": message}]
         
         # Show thinking message
-        yield history + [{"role": "assistant", "content": "🤔 Thinking..."}]
-        
-        # Get RAG answer
-        answer, sources = rag.answer_question(message)
+        yield history + [{"role": "assistant", "content": "🤔 Thinking..."}], session_id
         
-        # Format response
-        response = f"##  Analysis\n{answer}\n\n"
-        
-        if sources:
-            response += "##  Supporting Complaints\n"
-            for i, src in enumerate(sources, 1):
-                response += f"**{i}. {src.product}**"
-                if src.company != "Unknown":
-                    response += f" ({src.company})"
-                response += f"\n*Relevance: {src.similarity:.2f}*\n"
-                response += f"_{src.text[:100]}..._\n\n"
-        
-        # Store in session
-        session.add_message(message, response)
+        # Trace the answer; no yield inside, so the trace stays in this step
+        with start_trace("respond", session_id=session.session_id) as trace:
+            # Get RAG answer
+            answer, sources, metadata = await rag.aanswer_question(message, return_metadata=True)
+            logger.info(f"Answer cache hit: {metadata['cache_hit']} (trace {trace.trace_id})")
+            
+            # Format response
+            with timed_stage("format"):
+                response = f"##  Analysis\n{answer}\n\n"
+                
+                if sources:
+                    response += "##  Supporting Complaints\n"
+                    for i, src in enumerate(sources, 1):
+                        response += f"**{i}. {src.product}**"
+                        if src.company != "Unknown":
+                            response += f" ({src.company})"
+                        response += f"\n*Relevance: {src.similarity:.2f}*\n"
+                        response += f"_{src.text[:100]}..._\n\n"
+            
+            # Store in session
+            session.add_message(message, response)
         
         # Add assistant response
         history = history + [{"role": "assistant", "content": response}]
-        yield history
+        yield history, session_id
         
     except ValueError as e:
         logger.warning(f"Invalid input: {e}")
         error_msg = f"⚠️ {e}"
-        yield history + [{"role": "assistant", "content": error_msg}]
+        yield history + [{"role": "assistant", "content": error_msg}], session_id
     except Exception as e:
+        if isinstance(e, TimeoutError):
+            count("rag_timeouts", "Requests that ran out of time", operation="respond")
         logger.exception(f"Error processing question: {e}")
         error_msg = "❌ An error occurred. Our team has been notified."
-        yield history + [{"role": "assistant", "content": error_msg}]
+        yield history + [{"role": "assistant", "content": error_msg}], session_id
 
 def clear_chat() -> list:
     """Clear chat history."""
@@ -178,15 +212,21 @@ with gr.Blocks(title="CrediTrust Complaint Analyst") as demo:
             session_id = gr.State(value=None)
     
     # Connect actions
-    submit.click(respond, [msg, chatbot, session_id], [chatbot])
-    msg.submit(respond, [msg, chatbot, session_id], [chatbot])
+    submit.click(respond, [msg, chatbot, session_id], [chatbot, session_id])
+    msg.submit(respond, [msg, chatbot, session_id], [chatbot, session_id])
     clear.click(clear_chat, None, [chatbot])
     export.click(export_chat, [chatbot], gr.Textbox(label="Exported Report", lines=10))
 
 print(" Production interface ready!")
 
 if __name__ == "__main__":
+    startup.start()
+    health.start()
+    session_manager.start()
     config = APIConfig.from_env()
+    if config.metrics_port:
+        start_metrics_server(config.metrics_port, host=config.host, health=health)
+        logger.info(f"Metrics on http://{config.host}:{config.metrics_port}/metrics")
     demo.launch(
         server_name=config.host,
         server_port=config.port,
@@ -0,0 +1,275 @@
+"""Benchmark ingest, retrieval and end-to-end answers on a synthetic corpus.
+
+For each corpus size a ``complaint_embeddings.parquet``-shaped file is
+generated (see ``src.synthetic``), ingested with ``build_vectorstore``
+and served by ``RAGSystem`` with the deterministic ``SyntheticEncoder``,
+so the run is offline and repeatable. Measured:
+
+- ingest: rows/s of ``build_vectorstore.ingest`` (Chroma plus the
+  auxiliary indexes)
+- retrieve: ``retrieve_complaints`` p50/p95/p99 latency and QPS for each k
+- answer: ``answer_question`` end-to-end latency
+
+Caches are disabled so every call does the full work. Results are saved
+as JSON tagged with the git commit; ``--compare`` prints the change
+against an earlier result file.
+
+Usage:
+    python -m src.benchmark
+    python -m src.benchmark --rows 100000 1000000 --backend numpy --skip-ingest
+    python -m src.benchmark --compare logs/benchmarks/results/<earlier>.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from dataclasses import asdict, dataclass, replace
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+import logging
+
+import numpy as np
+
+from src.config import CacheConfig, RetrievalConfig
+from src.synthetic import DEFAULT_DIM, SyntheticEncoder, sample_questions, write_corpus
+
+logger = logging.getLogger(__name__)
+
+# A full Chroma ingest of 1M rows takes hours; pass --rows to opt in
+DEFAULT_ROWS = (1_000, 10_000)
+
+@dataclass
+class BenchmarkConfig:
+    """Settings for one benchmark run."""
+    rows: Sequence[int] = DEFAULT_ROWS
+    ks: Sequence[int] = (1, 5, 10, 20)
+    queries: int = 200
+    answer_k: int = 3
+    threads: int = 1  # concurrent callers while measuring QPS
+    backend: str = "chroma"
+    dim: int = DEFAULT_DIM
+    seed: int = 0
+    skip_ingest: bool = False  # only build the auxiliary indexes (numpy/ivf backends)
+    work_dir: str = "logs/benchmarks"
+
+def latency_summary(latencies_ms: Sequence[float], wall_seconds: float) -> Dict[str, float]:
+    """Percentiles of per-call latencies and the throughput they achieved."""
+    values = np.asarray(latencies_ms, dtype=np.float64)
+    return {
+        "calls": len(values),
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p95_ms": round(float(np.percentile(values, 95)), 3),
+        "p99_ms": round(float(np.percentile(values, 99)), 3),
+        "mean_ms": round(float(values.mean()), 3),
+        "max_ms": round(float(values.max()), 3),
+        "qps": round(len(values) / wall_seconds, 2) if wall_seconds > 0 else 0.0
+    }
+
+def measure(func: Callable[[str], Any], questions: List[str], threads: int = 1) -> Dict[str, float]:
+    """Call ``func`` once per question (``threads`` at a time) and summarise."""
+    def timed(question: str) -> float:
+        start = time.perf_counter()
+        func(question)
+        return (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    if threads > 1:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            latencies = list(pool.map(timed, questions))
+    else:
+        latencies = [timed(q) for q in questions]
+    return latency_summary(latencies, time.perf_counter() - start)
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def corpus_path(work_dir: str, rows: int, dim: int = DEFAULT_DIM, seed: int = 0) -> str:
+    """Path of the synthetic corpus for ``rows``, generated on first use."""
+    path = Path(work_dir) / f"corpus_{rows}_{dim}_{seed}.parquet"
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        write_corpus(str(tmp_path), rows, dim, seed)
+        os.replace(tmp_path, path)
+    return str(path)
+
+def bench_ingest(source: str, store_path: str, rows: int, skip_ingest: bool,
+                 backend: str = "chroma") -> Dict[str, float]:
+    """Build a fresh store from ``source`` and time it."""
+    from src.build_vectorstore import IngestConfig, build_auxiliary_indexes, ingest
+
+    shutil.rmtree(store_path, ignore_errors=True)
+    os.makedirs(store_path)
+    ingest_config = IngestConfig(source=source, store_path=store_path, resume=False,
+                                 ivf=backend == "ivf")
+    start = time.perf_counter()
+    with redirect_stdout(sys.stderr):
+        if skip_ingest:
+            build_auxiliary_indexes(ingest_config)
+        else:
+            ingest(ingest_config)
+    seconds = time.perf_counter() - start
+    return {"seconds": round(seconds, 3), "rows_per_second": round(rows / seconds, 1),
+            "auxiliary_indexes_only": skip_ingest}
+
+def bench_size(config: BenchmarkConfig, rows: int) -> Dict[str, Any]:
+    """Run every measurement against a corpus of ``rows`` chunks."""
+    result: Dict[str, Any] = {"rows": rows}
+    start = time.perf_counter()
+    source = corpus_path(config.work_dir, rows, config.dim, config.seed)
+    result["corpus_seconds"] = round(time.perf_counter() - start, 3)
+
+    # Chroma keeps one client per path for the life of the process, so
+    # every run gets a fresh store directory, deleted when it is done
+    store_path = str(Path(config.work_dir) / f"store_{rows}_{uuid.uuid4().hex[:8]}")
+    try:
+        return _bench_store(config, rows, source, store_path, result)
+    finally:
+        shutil.rmtree(store_path, ignore_errors=True)
+
+def _bench_store(config: BenchmarkConfig, rows: int, source: str, store_path: str,
+                 result: Dict[str, Any]) -> Dict[str, Any]:
+    from src.rag_pipeline import RAGSystem
+
+    print(f" [{rows:,} rows] ingest...", file=sys.stderr)
+    result["ingest"] = bench_ingest(source, store_path, rows, config.skip_ingest, config.backend)
+
+    retrieval_config = replace(RetrievalConfig.from_env(), backend=config.backend,
+                               vector_store_path=store_path, embeddings_path=source)
+    start = time.perf_counter()
+    with redirect_stdout(sys.stderr):
+        rag = RAGSystem(config=retrieval_config, encoder=SyntheticEncoder(config.dim, config.seed),
+                        cache_config=CacheConfig(embedding_cache_size=0, answer_cache_size=0))
+    result["load_seconds"] = round(time.perf_counter() - start, 3)
+
+    questions = sample_questions(config.queries, config.seed)
+    try:
+        # RAGSystem prints progress for every call; keep it out of the report
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            rag.retrieve_complaints(questions[0], k=max(config.ks))  # warm-up
+            result["retrieve"] = {}
+            for k in config.ks:
+                print(f" [{rows:,} rows] retrieve k={k}...", file=sys.stderr)
+                result["retrieve"][f"k={k}"] = measure(
+                    lambda q, k=k: rag.retrieve_complaints(q, k=k), questions, config.threads)
+
+            print(f" [{rows:,} rows] answer...", file=sys.stderr)
+            result["answer"] = measure(
+                lambda q: rag.answer_question(q, k=config.answer_k), questions, config.threads)
+    finally:
+        if rag.batcher is not None:
+            rag.batcher.close()
+    return result
+
+def run(config: BenchmarkConfig) -> Dict[str, Any]:
+    """Benchmark every size in ``config.rows`` and return the JSON report."""
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "config": asdict(config),
+        "results": [bench_size(config, rows) for rows in config.rows]
+    }
+
+def save(report: Dict[str, Any], directory: str) -> str:
+    os.makedirs(directory, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    path = os.path.join(directory, f"{stamp}_{report['commit'] or 'nocommit'}.json")
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    return path
+
+def _rows(report: Dict[str, Any]) -> Dict[int, Dict[str, Any]]:
+    return {r["rows"]: r for r in report["results"]}
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[str]:
+    """Lines comparing the sizes and operations both reports measured."""
+    lines = [f" {'rows':>9}  {'operation':<12} {'metric':<15} {'baseline':>10} {'current':>10} {'change':>8}"]
+    before, after = _rows(baseline), _rows(current)
+    for rows in sorted(set(before) & set(after)):
+        pairs = [("ingest", "rows_per_second", before[rows]["ingest"], after[rows]["ingest"])]
+        for op in sorted(set(before[rows].get("retrieve", {})) & set(after[rows].get("retrieve", {}))):
+            for metric in ("p50_ms", "p99_ms", "qps"):
+                pairs.append((op, metric, before[rows]["retrieve"][op], after[rows]["retrieve"][op]))
+        if "answer" in before[rows] and "answer" in after[rows]:
+            for metric in ("p50_ms", "p99_ms"):
+                pairs.append(("answer", metric, before[rows]["answer"], after[rows]["answer"]))
+
+        for op, metric, old, new in pairs:
+            if metric not in old or metric not in new:
+                continue
+            change = (new[metric] - old[metric]) / old[metric] * 100 if old[metric] else float("nan")
+            lines.append(f" {rows:>9,}  {op:<12} {metric:<15} {old[metric]:>10.2f} "
+                         f"{new[metric]:>10.2f} {change:>+7.1f}%")
+    return lines
+
+def print_report(report: Dict[str, Any]) -> None:
+    for result in report["results"]:
+        print(f"\n {result['rows']:,} rows (ingest {result['ingest']['rows_per_second']:,.0f} rows/s, "
+              f"load {result['load_seconds']:.1f}s)")
+        print(f"   {'call':<10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'QPS':>9}")
+        for name, summary in list(result["retrieve"].items()) + [("answer", result["answer"])]:
+            print(f"   {name:<10} {summary['p50_ms']:>9.2f} {summary['p95_ms']:>9.2f} "
+                  f"{summary['p99_ms']:>9.2f} {summary['qps']:>9.1f}")
+
+def parse_args(argv: Optional[List[str]] = None):
+    defaults = BenchmarkConfig()
+    parser = argparse.ArgumentParser(description="Benchmark ingest, retrieval and answers offline")
+    parser.add_argument("--rows", type=int, nargs="+", default=list(defaults.rows),
+                        help="Synthetic corpus sizes")
+    parser.add_argument("--k", type=int, nargs="+", default=list(defaults.ks),
+                        help="Values of k for retrieve_complaints")
+    parser.add_argument("--queries", type=int, default=defaults.queries, help="Questions per measurement")
+    parser.add_argument("--answer-k", type=int, default=defaults.answer_k, help="k for answer_question")
+    parser.add_argument("--threads", type=int, default=defaults.threads,
+                        help="Concurrent callers while measuring")
+    parser.add_argument("--backend", default=defaults.backend, help="Retrieval backend to serve from")
+    parser.add_argument("--dim", type=int, default=defaults.dim, help="Embedding dimension")
+    parser.add_argument("--seed", type=int, default=defaults.seed, help="Corpus and question seed")
+    parser.add_argument("--skip-ingest", action="store_true",
+                        help="Skip the Chroma ingest (for the numpy and ivf backends)")
+    parser.add_argument("--work-dir", default=defaults.work_dir, help="Corpora, stores and results")
+    parser.add_argument("--compare", help="Earlier result JSON to compare against")
+    parser.add_argument("--no-save", action="store_true", help="Don't write the result JSON")
+    args = parser.parse_args(argv)
+
+    if args.skip_ingest and args.backend == "chroma":
+        parser.error("--skip-ingest needs a backend that reads the parquet file (numpy, ivf)")
+    config = BenchmarkConfig(
+        rows=args.rows, ks=args.k, queries=args.queries, answer_k=args.answer_k,
+        threads=args.threads, backend=args.backend, dim=args.dim, seed=args.seed,
+        skip_ingest=args.skip_ingest, work_dir=args.work_dir
+    )
+    return config, args
+
+def main(argv: Optional[List[str]] = None) -> None:
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    config, args = parse_args(argv)
+
+    report = run(config)
+    print_report(report)
+    if not args.no_save:
+        print(f"\n Saved results to {save(report, os.path.join(config.work_dir, 'results'))}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\n Compared with {args.compare} (commit {baseline.get('commit')}):")
+        print("\n".join(compare(baseline, report)))
+
+if __name__ == "__main__":
+    main()
@@ -1,105 +1,690 @@
-import pandas as pd
-import pyarrow.parquet as pq
-import chromadb
-from chromadb.config import Settings
-import numpy as np
+"""Build the vector store from the pre-built complaint embeddings.
 
-print(" Building Vector Store from Pre-built Embeddings")
-print("="*60)
+Streams the whole parquet file row group by row group, converts each
+Arrow batch column-wise and upserts it into Chroma in bulk batches. A
+checkpoint is saved after every row group so an interrupted run resumes
+where it stopped.
 
-# Load a sample of the data (1000 rows for testing)
-print(" Loading complaint data...")
-parquet_file = pq.ParquetFile('data/complaint_embeddings.parquet')
+With ``--workers N`` the run is pipelined: a reader thread decodes row
+groups, N worker processes prepare metadata and embeddings, and a writer
+thread does the bulk inserts, with bounded queues between the stages.
 
-# Get sample
-batches = []
-for i, batch in enumerate(parquet_file.iter_batches(batch_size=1000)):
-    batches.append(batch)
-    if i >= 0:  # Just get first 1000 rows
-        break
+With ``--incremental`` only new or changed chunks are upserted, using a
+manifest of content hashes, and chunks that left the source are deleted.
+Full runs fill the same manifest, so the first incremental run after
+one only touches what changed since.
 
-df = batches[0].to_pandas() if batches else pd.DataFrame()
-print(f" Loaded {len(df)} complaint chunks")
+With ``--quantize int8`` (or ``float16``) a compact embedding layout for
+the numpy backend is written as well, and its recall@k against exact
+float32 search is reported.
 
-# Initialize ChromaDB
-print(" Initializing ChromaDB...")
-client = chromadb.PersistentClient(
-    path="vectorstore_final/",
-    settings=Settings(allow_reset=True)
-)
+With ``--ivf`` an IVF index for the ivf backend is trained and written,
+followed by a recall/latency sweep over ``nprobe``.
 
-# Create collection
-collection = client.get_or_create_collection(
-    name="complaints_final",
-    metadata={"hnsw:space": "cosine"}
-)
+With ``--shard-by-category`` the source is also split into one shard per
+``product_category`` (its own parquet, indexes and centroid) under
+``<store>/shards/`` for the sharded backend.
+
+Usage:
+    python -m src.build_vectorstore --source data/complaint_embeddings.parquet
+    python -m src.build_vectorstore --workers 16
+    python -m src.build_vectorstore --incremental
+    python -m src.build_vectorstore --quantize int8
+    python -m src.build_vectorstore --ivf --ivf-nlist 4096
+    python -m src.build_vectorstore --shard-by-category
+"""
+
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import logging
 
-# Add documents to vector store
-print(" Adding documents to vector store...")
-
-ids = []
-documents = []
-metadatas = []
-embeddings = []
-
-for i, row in df.iterrows():
-    # Get data from row
-    doc_id = row['id']
-    doc_text = row['document']
-    embedding = row['embedding']
-    metadata = row['metadata']
-    
-    # Prepare metadata
-    meta_dict = {
-        'product_category': metadata.get('product_category', ''),
-        'product': metadata.get('product', ''),
-        'issue': metadata.get('issue', ''),
-        'sub_issue': metadata.get('sub_issue', ''),
-        'company': metadata.get('company', ''),
-        'state': metadata.get('state', ''),
-        'complaint_id': metadata.get('complaint_id', ''),
-        'chunk_index': metadata.get('chunk_index', 0),
-        'total_chunks': metadata.get('total_chunks', 1)
-    }
-    
-    ids.append(doc_id)
-    documents.append(str(doc_text))
-    metadatas.append(meta_dict)
-    embeddings.append(embedding.tolist() if hasattr(embedding, 'tolist') else list(embedding))
-    
-    # Progress
-    if (i + 1) % 100 == 0:
-        print(f"  Processed {i+1}/{len(df)}...")
-
-# Add to collection
-collection.add(
-    ids=ids,
-    documents=documents,
-    metadatas=metadatas,
-    embeddings=embeddings
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from src.ingest_manifest import IngestManifest, content_hash
+from src.retrieval.arrow_io import embedding_matrix, metadata_records
+from src.retrieval.base import normalize_rows
+from src.retrieval.bm25 import BM25_INDEX_FILE, BM25Index
+from src.retrieval.filters import FILTER_INDEX_FILE, InvertedIndex
+from src.retrieval.ivf_backend import build_ivf_index, nprobe_sweep, print_sweep
+from src.retrieval.positions import CHUNK_POSITIONS_FILE, ChunkPositions
+from src.retrieval.sharded_backend import (
+    SHARD_SOURCE_FILE, SHARDS_DIR, shard_name, write_shard_manifest
 )
+from src.retrieval.quantized import (
+    QUANTIZATIONS, QuantizedNumpyBackend, recall_report, sample_queries, write_quantized_layout
+)
+from src.retrieval.index_version import file_fingerprint, write_index_version
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_FILE = "ingest_checkpoint.json"
+SOURCE_COLUMNS = ['id', 'document', 'embedding', 'metadata']
 
-print(f" Vector store created with {collection.count()} documents")
-print(" Saved to: vectorstore_final/")
-
-# Test the vector store
-print("\n Testing vector store...")
-test_queries = [
-    "credit card fraud",
-    "money transfer delay",
-    "bank account fees"
-]
-
-for query in test_queries:
-    print(f"\n Query: '{query}'")
-    results = collection.query(
-        query_texts=[query],
-        n_results=2
+@dataclass
+class IngestConfig:
+    """Settings for one ingest run."""
+    source: str = "data/complaint_embeddings.parquet"
+    store_path: str = "vectorstore_final/"
+    collection_name: str = "complaints_final"
+    read_batch_size: int = 10_000
+    write_batch_size: int = 5_000
+    resume: bool = True
+    workers: int = 0        # 0 = single-process ingest
+    queue_size: int = 8     # max batches buffered between pipeline stages
+    incremental: bool = False
+    quantize: Optional[str] = None  # int8 or float16 layout for the numpy backend
+    ivf: bool = False       # train an IVF index for the ivf backend
+    ivf_nlist: Optional[int] = None  # None = about 4 * sqrt(rows)
+    shard_by_category: bool = False  # also write one shard per product_category
+
+@dataclass
+class ChunkBatch:
+    """Vector-store ready columns for one slice of the parquet file."""
+    ids: List[str]
+    documents: List[str]
+    metadatas: List[Dict[str, Any]]
+    embeddings: np.ndarray
+    hashes: List[str]  # content_hash of each document and its metadata
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+def prepare_batch(batch: pa.RecordBatch) -> ChunkBatch:
+    """Extract ids, documents, metadata and embeddings straight from Arrow."""
+    ids = pc.cast(batch.column('id'), pa.string())
+    documents = pc.fill_null(pc.cast(batch.column('document'), pa.string()), "").to_pylist()
+    metadatas = metadata_records(batch.column('metadata'))
+    return ChunkBatch(
+        ids=ids.to_pylist(),
+        documents=documents,
+        metadatas=metadatas,
+        embeddings=embedding_matrix(batch.column('embedding')),
+        hashes=[content_hash(doc, meta) for doc, meta in zip(documents, metadatas)]
     )
-    
-    if results['documents'] and results['documents'][0]:
-        print(f"  Found {len(results['documents'][0])} results")
-        for j, doc in enumerate(results['documents'][0]):
-            print(f"  {j+1}. {doc[:80]}...")
+
+class IngestCheckpoint:
+    """Row-group progress marker stored next to the vector store."""
+
+    def __init__(self, store_path: str, source: str):
+        self.path = Path(store_path) / CHECKPOINT_FILE
+        self.source = os.path.abspath(source)
+        self.fingerprint = file_fingerprint(source)
+
+    def load(self) -> Tuple[int, int]:
+        """Return ``(next_row_group, rows_written)`` for this source file."""
+        try:
+            state = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return 0, 0
+
+        if state.get("source") != self.source or state.get("fingerprint") != self.fingerprint:
+            logger.info("Checkpoint belongs to a different source file, starting over")
+            return 0, 0
+        return state.get("next_row_group", 0), state.get("rows_written", 0)
+
+    def save(self, next_row_group: int, rows_written: int) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps({
+            "source": self.source,
+            "fingerprint": self.fingerprint,
+            "next_row_group": next_row_group,
+            "rows_written": rows_written
+        }))
+        os.replace(tmp_path, self.path)
+
+    def clear(self) -> None:
+        if self.path.exists():
+            self.path.unlink()
+
+class ChromaWriter:
+    """Bulk upserts into the persistent Chroma collection.
+
+    With a ``manifest``, every written chunk is also recorded there with
+    its content hash for later incremental runs.
+    """
+
+    def __init__(self, store_path: str, collection_name: str, write_batch_size: int,
+                 manifest: Optional[IngestManifest] = None):
+        import chromadb
+        from chromadb.config import Settings
+
+        # Same settings as ChromaBackend, so both can open the store in one process
+        self.client = chromadb.PersistentClient(
+            path=store_path,
+            settings=Settings()
+        )
+        self.collection_name = collection_name
+        self.collection = self._open_collection()
+
+        # Chroma caps the number of records per call
+        max_batch = getattr(self.client, "get_max_batch_size", lambda: write_batch_size)()
+        self.write_batch_size = max(1, min(write_batch_size, max_batch))
+        self.manifest = manifest
+
+    def _open_collection(self):
+        return self.client.get_or_create_collection(
+            name=self.collection_name,
+            metadata={"hnsw:space": "cosine"}
+        )
+
+    def clear(self) -> None:
+        """Drop every document, and its manifest entries, before a full rebuild."""
+        if self.collection_name in {getattr(c, "name", c) for c in self.client.list_collections()}:
+            self.client.delete_collection(self.collection_name)
+        self.collection = self._open_collection()
+        if self.manifest is not None:
+            self.manifest.clear()
+
+    def write(self, chunk: ChunkBatch) -> None:
+        # Upsert keeps re-processing of a partially written row group idempotent
+        for start in range(0, len(chunk), self.write_batch_size):
+            end = start + self.write_batch_size
+            self.collection.upsert(
+                ids=chunk.ids[start:end],
+                documents=chunk.documents[start:end],
+                metadatas=chunk.metadatas[start:end],
+                embeddings=chunk.embeddings[start:end]
+            )
+        if self.manifest is not None:
+            self.manifest.record([
+                (doc_id, str(meta['complaint_id']), meta['chunk_index'], digest)
+                for doc_id, meta, digest in zip(chunk.ids, chunk.metadatas, chunk.hashes)
+            ])
+
+    def delete(self, ids: List[str]) -> None:
+        for start in range(0, len(ids), self.write_batch_size):
+            self.collection.delete(ids=ids[start:start + self.write_batch_size])
+
+    def count(self) -> int:
+        return self.collection.count()
+
+class ThroughputMeter:
+    """Tracks rows written and reports rows/s."""
+
+    def __init__(self, total_rows: int, already_done: int = 0):
+        self.total_rows = total_rows
+        self.rows = already_done
+        self.session_rows = 0
+        self.start = time.perf_counter()
+
+    def add(self, rows: int) -> None:
+        self.rows += rows
+        self.session_rows += rows
+
+    @property
+    def rows_per_second(self) -> float:
+        elapsed = time.perf_counter() - self.start
+        return self.session_rows / elapsed if elapsed > 0 else 0.0
+
+    def report(self) -> None:
+        print(f"  {self.rows:,}/{self.total_rows:,} rows "
+              f"({self.rows_per_second:,.0f} rows/s)")
+
+def iter_row_groups(parquet_file: pq.ParquetFile, start: int,
+                    batch_size: int) -> Iterator[Tuple[int, pa.RecordBatch]]:
+    """Yield ``(row_group, batch)`` pairs from ``start`` onwards."""
+    for row_group in range(start, parquet_file.num_row_groups):
+        for batch in parquet_file.iter_batches(batch_size=batch_size,
+                                               row_groups=[row_group],
+                                               columns=SOURCE_COLUMNS):
+            yield row_group, batch
+
+def build_auxiliary_indexes(config: IngestConfig) -> None:
+    """Build the indexes that live next to the vector store.
+
+    They are keyed by parquet row position and record the fingerprint of
+    the source file, so the numpy backend can tell when they are stale.
+    Only the columns each index needs are read, never the embeddings.
+    """
+    start = time.perf_counter()
+    fingerprint = file_fingerprint(config.source)
+
+    table = pq.read_table(config.source, columns=['id', 'metadata'])
+    filter_index = InvertedIndex.from_arrow(table.column('metadata'))
+    filter_index.save(str(Path(config.store_path) / FILTER_INDEX_FILE), fingerprint)
+    positions = ChunkPositions.from_arrow(table.column('id'), table.column('metadata'))
+    positions.save(str(Path(config.store_path) / CHUNK_POSITIONS_FILE), fingerprint)
+    del table
+
+    print(f" Built filter and chunk position indexes over {filter_index.num_rows:,} rows "
+          f"in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    bm25 = BM25Index.build(_iter_documents(config.source, config.read_batch_size))
+    bm25.save(str(Path(config.store_path) / BM25_INDEX_FILE), fingerprint)
+    print(f" Built BM25 index with {len(bm25.terms):,} terms "
+          f"in {time.perf_counter() - start:.1f}s")
+
+    if config.quantize:
+        build_quantized_layout(config)
+    if config.ivf:
+        build_ivf(config)
+    if config.shard_by_category:
+        build_category_shards(config)
+
+def build_quantized_layout(config: IngestConfig) -> Optional[Dict[int, float]]:
+    """Write the quantized embeddings and print recall@k against float32."""
+    start = time.perf_counter()
+    if write_quantized_layout(config.source, config.store_path, config.quantize,
+                              config.read_batch_size) is None:
+        return None
+    print(f" Wrote {config.quantize} embeddings in {time.perf_counter() - start:.1f}s")
+
+    backend = QuantizedNumpyBackend.from_store(config.source, config.store_path, config.quantize)
+    report = recall_report(backend, sample_queries(backend.full))
+    print(f" {config.quantize} memory: {backend.codes.nbytes / 2**20:.0f} MiB "
+          f"(float32: {backend.full.nbytes / 2**20:.0f} MiB)")
+    for k, recall in report.items():
+        print(f"   recall@{k}: {recall:.3f}")
+    return report
+
+def build_ivf(config: IngestConfig) -> None:
+    """Train and write the IVF index, then print an nprobe sweep."""
+    start = time.perf_counter()
+    index = build_ivf_index(config.source, config.store_path, config.ivf_nlist,
+                            batch_size=config.read_batch_size)
+    if index is None:
+        return
+    print(f" Built IVF index with {index.nlist:,} lists in {time.perf_counter() - start:.1f}s")
+    print_sweep(nprobe_sweep(index, sample_queries(index.vectors), k=10), k=10)
+
+def _product_categories(metadata) -> pa.Array:
+    metadata = metadata.combine_chunks() if isinstance(metadata, pa.ChunkedArray) else metadata
+    if pa.types.is_struct(metadata.type) and metadata.type.get_field_index('product_category') >= 0:
+        return pc.fill_null(pc.cast(metadata.field('product_category'), pa.string()), '')
+    return pa.array([''] * len(metadata), type=pa.string())
+
+def build_category_shards(config: IngestConfig) -> Dict[str, int]:
+    """Split the source into one shard per ``product_category``.
+
+    Each shard gets its own parquet file, the usual auxiliary indexes and
+    a centroid (the normalised mean of its embeddings) for query routing.
+    Returns the row count per shard.
+    """
+    start = time.perf_counter()
+    shards_dir = Path(config.store_path) / SHARDS_DIR
+    shards_dir.mkdir(parents=True, exist_ok=True)
+
+    writers: Dict[str, pq.ParquetWriter] = {}
+    categories: Dict[str, str] = {}
+    sums: Dict[str, np.ndarray] = {}
+    counts: Dict[str, int] = {}
+    try:
+        for batch in pq.ParquetFile(config.source).iter_batches(batch_size=config.read_batch_size):
+            table = pa.Table.from_batches([batch])
+            category_column = _product_categories(table.column('metadata'))
+            for category in pc.unique(category_column).to_pylist():
+                part = table.filter(pc.equal(category_column, category))
+                name = shard_name(category)
+                if name not in writers:
+                    (shards_dir / name).mkdir(exist_ok=True)
+                    writers[name] = pq.ParquetWriter(str(shards_dir / name / SHARD_SOURCE_FILE), part.schema)
+                    categories[name] = category
+                    sums[name] = 0.0
+                    counts[name] = 0
+                writers[name].write_table(part)
+                sums[name] = sums[name] + normalize_rows(embedding_matrix(part.column('embedding'))).sum(axis=0)
+                counts[name] += part.num_rows
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+    names = sorted(writers)
+    for name in names:
+        build_auxiliary_indexes(replace(
+            config, source=str(shards_dir / name / SHARD_SOURCE_FILE),
+            store_path=str(shards_dir / name), shard_by_category=False
+        ))
+
+    version = write_shard_manifest(
+        str(shards_dir),
+        [{"name": name, "category": categories[name], "count": counts[name]} for name in names],
+        normalize_rows(np.vstack([sums[name] for name in names])) if names else np.empty((0, 0)),
+        source_fingerprint=file_fingerprint(config.source)
+    )
+    print(f" Wrote {len(names)} category shards in {time.perf_counter() - start:.1f}s "
+          f"(shard set {version[:8]}):")
+    for name in names:
+        print(f"   {name}: {counts[name]:,} chunks")
+    return {name: counts[name] for name in names}
+
+def _iter_documents(source: str, batch_size: int) -> Iterator[Tuple[str, str]]:
+    """Stream ``(id, document)`` pairs without loading the embeddings."""
+    for batch in pq.ParquetFile(source).iter_batches(batch_size=batch_size, columns=['id', 'document']):
+        yield from zip(batch.column(0).to_pylist(), batch.column(1).to_pylist())
+
+class RowGroupTracker:
+    """Finds the highest row group below which every batch has been written.
+
+    Batches can finish out of order in pipelined mode, so the checkpoint
+    only advances over a contiguous prefix of completed row groups.
+    """
+
+    def __init__(self, start: int):
+        self.next_group = start
+        self.expected: Dict[int, int] = {}
+        self.done: Dict[int, int] = {}
+
+    def mark_done(self, row_group: int, batches_in_group: Optional[int]) -> bool:
+        """Record one written batch; return True if the prefix advanced."""
+        self.done[row_group] = self.done.get(row_group, 0) + 1
+        if batches_in_group is not None:
+            self.expected[row_group] = batches_in_group
+
+        advanced = False
+        while (self.next_group in self.expected
+               and self.expected[self.next_group] == self.done.get(self.next_group)):
+            self.expected.pop(self.next_group)
+            self.done.pop(self.next_group)
+            self.next_group += 1
+            advanced = True
+        return advanced
+
+def _with_group_sizes(batches: Iterator[Tuple[int, pa.RecordBatch]]
+                      ) -> Iterator[Tuple[int, pa.RecordBatch, Optional[int]]]:
+    """Attach the batch count of each row group to its last batch."""
+    previous = None
+    index = 0
+    for row_group, batch in batches:
+        if previous is not None:
+            done_group = previous[0] != row_group
+            yield previous[0], previous[1], index if done_group else None
+            index = 0 if done_group else index
+        previous = (row_group, batch)
+        index += 1
+    if previous is not None:
+        yield previous[0], previous[1], index
+
+def _run_sequential(batches, writer: "ChromaWriter", meter: ThroughputMeter,
+                    checkpoint: IngestCheckpoint, tracker: RowGroupTracker) -> None:
+    for row_group, batch, batches_in_group in _with_group_sizes(batches):
+        writer.write(prepare_batch(batch))
+        meter.add(batch.num_rows)
+        meter.report()
+        if tracker.mark_done(row_group, batches_in_group):
+            checkpoint.save(tracker.next_group, meter.rows)
+
+_DONE = object()
+
+def _run_pipelined(batches, writer: "ChromaWriter", meter: ThroughputMeter,
+                   checkpoint: IngestCheckpoint, tracker: RowGroupTracker,
+                   workers: int, queue_size: int) -> None:
+    """Reader thread -> worker processes -> writer thread, with backpressure."""
+    read_queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+    # Room for every worker to hold a batch plus queue_size finished ones
+    write_queue: "queue.Queue" = queue.Queue(maxsize=workers + queue_size)
+    stop = threading.Event()
+    errors: List[BaseException] = []
+
+    def put(q: "queue.Queue", item) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def reader():
+        try:
+            for item in _with_group_sizes(batches):
+                if not put(read_queue, item):
+                    return
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            put(read_queue, _DONE)
+
+    def writer_loop():
+        try:
+            while True:
+                try:
+                    item = write_queue.get(timeout=0.1)
+                except queue.Empty:
+                    if stop.is_set():
+                        return
+                    continue
+                if item is _DONE:
+                    return
+                row_group, batches_in_group, future = item
+                chunk = future.result()
+                writer.write(chunk)
+                meter.add(len(chunk))
+                meter.report()
+                if tracker.mark_done(row_group, batches_in_group):
+                    checkpoint.save(tracker.next_group, meter.rows)
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+
+    reader_thread = threading.Thread(target=reader, name="ingest-reader", daemon=True)
+    writer_thread = threading.Thread(target=writer_loop, name="ingest-writer", daemon=True)
+    reader_thread.start()
+    writer_thread.start()
+
+    # Main thread dispatches decoded batches to the worker processes. The
+    # write queue holds futures in submission order, so its bound also caps
+    # the number of batches in flight at workers + queue_size.
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        try:
+            while not stop.is_set():
+                try:
+                    item = read_queue.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if item is _DONE:
+                    break
+                row_group, batch, batches_in_group = item
+                future = pool.submit(prepare_batch, batch)
+                if not put(write_queue, (row_group, batches_in_group, future)):
+                    break
+        finally:
+            while writer_thread.is_alive():
+                try:
+                    write_queue.put(_DONE, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+            writer_thread.join()
+            stop.set()
+            reader_thread.join()
+
+    if errors:
+        raise errors[0]
+
+def ingest(config: IngestConfig) -> int:
+    """Stream ``config.source`` into the vector store and return rows written."""
+    parquet_file = pq.ParquetFile(config.source)
+    total_rows = parquet_file.metadata.num_rows
+    num_row_groups = parquet_file.num_row_groups
+
+    checkpoint = IngestCheckpoint(config.store_path, config.source)
+    start_group, rows_done = checkpoint.load() if config.resume else (0, 0)
+    manifest = IngestManifest(config.store_path)
+    writer = ChromaWriter(config.store_path, config.collection_name, config.write_batch_size, manifest)
+    if start_group:
+        print(f" Resuming at row group {start_group}/{num_row_groups} "
+              f"({rows_done:,} rows already written)")
     else:
-        print("  No results found")
\ No newline at end of file
+        # Chunks that left the source must not survive a full rebuild
+        writer.clear()
+    meter = ThroughputMeter(total_rows, rows_done)
+    tracker = RowGroupTracker(start_group)
+    batches = iter_row_groups(parquet_file, start_group, config.read_batch_size)
+
+    try:
+        if config.workers > 0:
+            print(f" Pipelined ingest with {config.workers} worker processes")
+            _run_pipelined(batches, writer, meter, checkpoint, tracker,
+                           config.workers, config.queue_size)
+        else:
+            _run_sequential(batches, writer, meter, checkpoint, tracker)
+        manifest.complete()
+    finally:
+        manifest.close()
+
+    checkpoint.clear()
+    build_auxiliary_indexes(config)
+
+    count = writer.count()
+    print(f" Vector store holds {count:,} documents "
+          f"({meter.session_rows:,} rows this run, {meter.rows_per_second:,.0f} rows/s)")
+
+    # Stamp a new index version so cached answers from the old index are dropped
+    version = write_index_version(config.store_path, document_count=count)
+    print(f" Index version: {version}")
+    return meter.session_rows
+
+def _changed_embeddings(parquet_file: pq.ParquetFile, row_group: int,
+                        changed: List[int], batch_size: int) -> np.ndarray:
+    """Embeddings of the ``changed`` rows (sorted positions) of one row group.
+
+    Parquet cannot seek to single rows, so the column is decoded in
+    ``batch_size`` slices up to the last changed row and the rest of the
+    row group is skipped. Only the changed rows are converted to numpy.
+    """
+    wanted = np.asarray(changed, dtype=np.int64)
+    parts = []
+    offset = 0
+    for batch in parquet_file.iter_batches(batch_size=batch_size, row_groups=[row_group],
+                                           columns=['embedding']):
+        end = offset + batch.num_rows
+        lo, hi = np.searchsorted(wanted, [offset, end])
+        if hi > lo:
+            positions = pa.array(wanted[lo:hi] - offset)
+            parts.append(embedding_matrix(batch.column(0).take(positions)))
+        offset = end
+        if offset > wanted[-1]:
+            break
+    return np.vstack(parts)
+
+def ingest_incremental(config: IngestConfig) -> Dict[str, int]:
+    """Upsert only new or changed chunks and delete chunks that disappeared.
+
+    Ids, documents and metadata are read first and hashed. Row groups
+    without changes never touch the embedding column; see
+    ``_changed_embeddings`` for the others. A rerun after a crash is cheap
+    because finished rows hash as unchanged, so no checkpoint is needed in
+    this mode.
+    """
+    parquet_file = pq.ParquetFile(config.source)
+    manifest = IngestManifest(config.store_path)
+    writer = ChromaWriter(config.store_path, config.collection_name, config.write_batch_size, manifest)
+    meter = ThroughputMeter(parquet_file.metadata.num_rows)
+    stats = {"scanned": 0, "upserted": 0, "unchanged": 0, "deleted": 0}
+
+    try:
+        for row_group in range(parquet_file.num_row_groups):
+            table = parquet_file.read_row_group(row_group, columns=['id', 'document', 'metadata'])
+            ids = pc.cast(table.column('id'), pa.string()).to_pylist()
+            documents = pc.fill_null(pc.cast(table.column('document'), pa.string()), "").to_pylist()
+            metadatas = metadata_records(table.column('metadata'))
+            hashes = [content_hash(doc, meta) for doc, meta in zip(documents, metadatas)]
+
+            changed = manifest.changed_positions(ids, hashes)
+            stats["scanned"] += len(ids)
+            stats["unchanged"] += len(ids) - len(changed)
+
+            if changed:
+                chunk = ChunkBatch(
+                    ids=[ids[i] for i in changed],
+                    documents=[documents[i] for i in changed],
+                    metadatas=[metadatas[i] for i in changed],
+                    embeddings=_changed_embeddings(parquet_file, row_group, changed,
+                                                   config.read_batch_size),
+                    hashes=[hashes[i] for i in changed]
+                )
+                writer.write(chunk)
+                stats["upserted"] += len(changed)
+
+            meter.add(len(ids))
+            meter.report()
+
+        stale = manifest.stale_ids()
+        if stale:
+            writer.delete(stale)
+            manifest.forget(stale)
+        stats["deleted"] = len(stale)
+        manifest.complete()
+    finally:
+        manifest.close()
+
+    print(f" Incremental run: {stats['upserted']:,} upserted, {stats['unchanged']:,} unchanged, "
+          f"{stats['deleted']:,} deleted ({meter.rows_per_second:,.0f} rows/s scanned)")
+
+    build_auxiliary_indexes(config)
+    if stats["upserted"] or stats["deleted"]:
+        version = write_index_version(config.store_path, document_count=writer.count())
+        print(f" Index version: {version}")
+    return stats
+
+def parse_args(argv: Optional[List[str]] = None) -> IngestConfig:
+    defaults = IngestConfig()
+    parser = argparse.ArgumentParser(description="Build the complaint vector store")
+    parser.add_argument("--source", default=defaults.source, help="Embeddings parquet file")
+    parser.add_argument("--store-path", default=defaults.store_path, help="Vector store directory")
+    parser.add_argument("--collection", default=defaults.collection_name, help="Collection name")
+    parser.add_argument("--read-batch-size", type=int, default=defaults.read_batch_size,
+                        help="Rows decoded per Arrow batch")
+    parser.add_argument("--write-batch-size", type=int, default=defaults.write_batch_size,
+                        help="Rows per vector store insert")
+    parser.add_argument("--no-resume", action="store_true", help="Ignore any saved checkpoint")
+    parser.add_argument("--workers", type=int, default=defaults.workers,
+                        help="Worker processes for pipelined ingest (0 = sequential)")
+    parser.add_argument("--queue-size", type=int, default=defaults.queue_size,
+                        help="Batches buffered between pipeline stages")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Upsert only new/changed chunks and delete removed ones")
+    parser.add_argument("--quantize", choices=QUANTIZATIONS, default=None,
+                        help="Also write a quantized embedding layout for the numpy backend")
+    parser.add_argument("--ivf", action="store_true", help="Also train an IVF index for the ivf backend")
+    parser.add_argument("--ivf-nlist", type=int, default=None,
+                        help="IVF posting lists (default: about 4 * sqrt(rows))")
+    parser.add_argument("--shard-by-category", action="store_true",
+                        help="Also write one shard per product_category for the sharded backend")
+    args = parser.parse_args(argv)
+
+    return IngestConfig(
+        source=args.source,
+        store_path=args.store_path,
+        collection_name=args.collection,
+        read_batch_size=args.read_batch_size,
+        write_batch_size=args.write_batch_size,
+        resume=not args.no_resume,
+        workers=args.workers,
+        queue_size=args.queue_size,
+        incremental=args.incremental,
+        quantize=args.quantize,
+        ivf=args.ivf,
+        ivf_nlist=args.ivf_nlist,
+        shard_by_category=args.shard_by_category
+    )
+
+def main(argv: Optional[List[str]] = None) -> None:
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    config = parse_args(argv)
+
+    print(" Building Vector Store from Pre-built Embeddings")
+    print("="*60)
+    start = time.perf_counter()
+    if config.incremental:
+        ingest_incremental(config)
+    else:
+        ingest(config)
+    print(f" Saved to: {config.store_path} in {time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+    main()
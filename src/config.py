@@ -16,6 +16,143 @@ class RetrievalConfig:
     """Configuration for retrieval settings."""
     k: int = 5
     similarity_threshold: float = 0.5
+    backend: str = "chroma"
+    vector_store_path: str = "vectorstore_final/"
+    collection_name: str = "complaints_final"
+    embeddings_path: str = "data/complaint_embeddings.parquet"
+    mode: str = "vector"  # vector, hybrid (vector + BM25) or lexical
+    rrf_k: int = 60
+    lexical_fallback_saturation: float = 0.9  # timeout pool load that switches to BM25 only
+    collapse_complaints: bool = True  # at most one hit per complaint_id
+    overfetch_factor: int = 3  # chunks fetched per requested complaint before collapsing
+    neighbor_window: int = 0  # adjacent chunks (chunk_index ± n) stitched into each hit
+    quantization: Optional[str] = None  # numpy backend: int8 or float16 layout from build_vectorstore
+    rescore_factor: int = 4  # quantized candidates rescored in float32 per result
+    nprobe: int = 8  # ivf backend: posting lists scanned per query
+    shard_fanout: int = 2  # sharded backend: closest shards queried, 0 = all
+    shard_backend: str = "numpy"  # backend used inside each shard
+    batch_window_ms: float = 0.0  # micro-batching window for concurrent vector searches, 0 = off
+    max_batch_size: int = 32  # questions per micro-batch
+    
+    @classmethod
+    def from_env(cls):
+        """Create config from environment variables."""
+        return cls(
+            k=int(os.getenv("RETRIEVAL_K", "5")),
+            backend=os.getenv("RETRIEVAL_BACKEND", "chroma").lower(),
+            vector_store_path=os.getenv("VECTOR_STORE_PATH", "vectorstore_final/"),
+            collection_name=os.getenv("COLLECTION_NAME", "complaints_final"),
+            embeddings_path=os.getenv("EMBEDDINGS_PATH", "data/complaint_embeddings.parquet"),
+            mode=os.getenv("RETRIEVAL_MODE", "vector").lower(),
+            rrf_k=int(os.getenv("RRF_K", "60")),
+            lexical_fallback_saturation=float(os.getenv("LEXICAL_FALLBACK_SATURATION", "0.9")),
+            collapse_complaints=os.getenv("COLLAPSE_COMPLAINTS", "true").lower() == "true",
+            overfetch_factor=int(os.getenv("OVERFETCH_FACTOR", "3")),
+            neighbor_window=int(os.getenv("NEIGHBOR_WINDOW", "0")),
+            quantization=os.getenv("EMBEDDING_QUANTIZATION") or None,
+            rescore_factor=int(os.getenv("RESCORE_FACTOR", "4")),
+            nprobe=int(os.getenv("IVF_NPROBE", "8")),
+            shard_fanout=int(os.getenv("SHARD_FANOUT", "2")),
+            shard_backend=os.getenv("SHARD_BACKEND", "numpy").lower(),
+            batch_window_ms=float(os.getenv("BATCH_WINDOW_MS", "0")),
+            max_batch_size=int(os.getenv("MAX_BATCH_SIZE", "32"))
+        )
+
+@dataclass
+class CacheConfig:
+    """Configuration for in-memory caches."""
+    embedding_cache_size: int = 1024
+    embedding_cache_ttl: Optional[float] = None  # seconds, None = never expire
+    answer_cache_size: int = 256
+    answer_cache_ttl: Optional[float] = None
+    
+    @classmethod
+    def from_env(cls):
+        """Create config from environment variables."""
+        embedding_ttl = os.getenv("EMBEDDING_CACHE_TTL")
+        answer_ttl = os.getenv("ANSWER_CACHE_TTL")
+        return cls(
+            embedding_cache_size=int(os.getenv("EMBEDDING_CACHE_SIZE", "1024")),
+            embedding_cache_ttl=float(embedding_ttl) if embedding_ttl else None,
+            answer_cache_size=int(os.getenv("ANSWER_CACHE_SIZE", "256")),
+            answer_cache_ttl=float(answer_ttl) if answer_ttl else None
+        )
+
+@dataclass
+class PromptConfig:
+    """Configuration for building the LLM prompt."""
+    max_prompt_tokens: int = 2048  # whole prompt, instructions and question included
+    max_complaint_tokens: int = 150  # text of any one complaint, trimmed at a sentence end
+    
+    @classmethod
+    def from_env(cls):
+        """Create config from environment variables."""
+        return cls(
+            max_prompt_tokens=int(os.getenv("PROMPT_MAX_TOKENS", "2048")),
+            max_complaint_tokens=int(os.getenv("PROMPT_MAX_COMPLAINT_TOKENS", "150"))
+        )
+
+@dataclass
+class RateLimitConfig:
+    """Configuration for per-client rate limiting."""
+    max_requests: int = 30
+    window_seconds: int = 60
+    max_clients: int = 100_000  # buckets kept in memory before the least recent are dropped
+    backend: str = "memory"  # memory (per process) or sqlite (shared by worker processes)
+    sqlite_path: str = "logs/rate_limits.sqlite3"
+    
+    @classmethod
+    def from_env(cls):
+        """Create config from environment variables."""
+        return cls(
+            max_requests=int(os.getenv("RATE_LIMIT_REQUESTS", "30")),
+            window_seconds=int(os.getenv("RATE_LIMIT_WINDOW", "60")),
+            max_clients=int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "100000")),
+            backend=os.getenv("RATE_LIMIT_BACKEND", "memory").lower(),
+            sqlite_path=os.getenv("RATE_LIMIT_SQLITE_PATH", "logs/rate_limits.sqlite3")
+        )
+
+@dataclass
+class SessionConfig:
+    """Configuration for chat session storage."""
+    max_sessions: int = 10_000  # sessions held in memory, least recently used evicted first
+    ttl_hours: float = 24
+    max_history: int = 50  # exchanges kept per session
+    sweep_interval: float = 300.0  # seconds between expired-session sweeps
+    backend: str = "memory"  # memory or sqlite (survives restarts)
+    sqlite_path: str = "logs/sessions.sqlite3"
+    
+    @classmethod
+    def from_env(cls):
+        """Create config from environment variables."""
+        return cls(
+            max_sessions=int(os.getenv("SESSION_MAX", "10000")),
+            ttl_hours=float(os.getenv("SESSION_TTL_HOURS", "24")),
+            max_history=int(os.getenv("SESSION_MAX_HISTORY", "50")),
+            sweep_interval=float(os.getenv("SESSION_SWEEP_INTERVAL", "300")),
+            backend=os.getenv("SESSION_BACKEND", "memory").lower(),
+            sqlite_path=os.getenv("SESSION_SQLITE_PATH", "logs/sessions.sqlite3")
+        )
+
+@dataclass
+class TracingConfig:
+    """Configuration for request traces and sampled profiling."""
+    trace_slow_ms: float = 2000.0  # log the span breakdown of slower requests; 0 = never
+    profile_mode: str = "off"  # off, cprofile or tracemalloc
+    profile_sample_rate: float = 0.0  # share of requests always profiled
+    profile_slow_ms: float = 0.0  # profile every request, keep those at least this slow; 0 = off
+    profile_dir: str = "logs/profiles"
+    
+    @classmethod
+    def from_env(cls):
+        """Create config from environment variables."""
+        return cls(
+            trace_slow_ms=float(os.getenv("TRACE_SLOW_MS", "2000")),
+            profile_mode=os.getenv("PROFILE_MODE", "off").lower(),
+            profile_sample_rate=float(os.getenv("PROFILE_SAMPLE_RATE", "0")),
+            profile_slow_ms=float(os.getenv("PROFILE_SLOW_MS", "0")),
+            profile_dir=os.getenv("PROFILE_DIR", "logs/profiles")
+        )
 
 @dataclass
 class APIConfig:
@@ -23,6 +160,7 @@ class APIConfig:
     host: str = "0.0.0.0"
     port: int = 7860
     debug: bool = False
+    metrics_port: int = 9100  # Prometheus /metrics, /health and /ready; 0 = disabled
     
     @classmethod
     def from_env(cls):
@@ -30,11 +168,12 @@ class APIConfig:
         return cls(
             host=os.getenv("API_HOST", "0.0.0.0"),
             port=int(os.getenv("API_PORT", "7860")),
-            debug=os.getenv("DEBUG", "false").lower() == "true"
+            debug=os.getenv("DEBUG", "false").lower() == "true",
+            metrics_port=int(os.getenv("METRICS_PORT", "9100"))
         )
 
 @dataclass
 class ModelConfig:
     """Configuration for embedding model."""
     model_name: str = "sentence-transformers/all-MiniLM-L6-v2"
-    embedding_dim: int = 384
\ No newline at end of file
+    embedding_dim: int = 384
@@ -1,33 +1,111 @@
 """Health check endpoints for monitoring."""
 
+import copy
+import threading
 import time
-import psutil
 import logging
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 logger = logging.getLogger(__name__)
 
 class HealthChecker:
-    """System health checker."""
+    """System health checker.
     
-    def __init__(self, rag_system):
-        self.rag = rag_system
+    ``sample()`` does the actual checks (vector store, recent retrieval
+    latencies, batching, system metrics) and ``start()`` runs it every
+    ``interval`` seconds on a background thread. ``get_status()`` only
+    copies the latest snapshot, so probes are cheap and never block;
+    the snapshot's age is reported as ``staleness_seconds``.
+    
+    Retrieval health comes from the latencies of real requests
+    (``RAGSystem.retrieval_latency``), not from a synthetic query.
+    """
+    
+    def __init__(self, rag_system=None, startup=None, interval: float = 10.0,
+                 max_error_rate: float = 0.2):
+        """Check ``rag_system``, or the system ``startup`` is warming up."""
+        self._rag = rag_system
+        self.startup = startup
+        self.interval = interval
+        self.max_error_rate = max_error_rate
         self.start_time = time.time()
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._sampled_at = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    @property
+    def rag(self):
+        if self._rag is None and self.startup is not None:
+            return self.startup.system
+        return self._rag
+    
+    def start(self) -> "HealthChecker":
+        """Sample in the background every ``interval`` seconds."""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="health-sampler", daemon=True)
+            self._thread.start()
+        return self
+    
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+    
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.sample()
+            except Exception as e:  # keep sampling after unexpected errors
+                logger.exception(f"Health sampling failed: {e}")
+            self._stop.wait(self.interval)
     
     def get_status(self) -> Dict[str, Any]:
-        """Get comprehensive system status."""
+        """Get comprehensive system status from the latest snapshot.
+        
+        Without a running sampler a snapshot older than ``interval`` is
+        refreshed inline; all checks are non-blocking.
+        """
+        with self._lock:
+            snapshot, sampled_at = self._snapshot, self._sampled_at
+        warmed_up = (snapshot is not None and snapshot["status"] == "starting"
+                     and self.startup is not None and self.startup.ready.is_set())
+        if (snapshot is None or warmed_up
+                or (self._thread is None and time.monotonic() - sampled_at > self.interval)):
+            snapshot = self.sample()
+            with self._lock:
+                sampled_at = self._sampled_at
+        
+        status = copy.deepcopy(snapshot)
+        staleness = time.monotonic() - sampled_at
+        status["timestamp"] = datetime.now().isoformat()
+        status["uptime_seconds"] = int(time.time() - self.start_time)
+        status["staleness_seconds"] = round(staleness, 3)
+        status["stale"] = staleness > 3 * self.interval
+        return status
+    
+    def sample(self) -> Dict[str, Any]:
+        """Run every check now and store the result as the latest snapshot."""
         status = {
             "status": "healthy",
-            "timestamp": datetime.now().isoformat(),
-            "uptime_seconds": int(time.time() - self.start_time),
+            "sampled_at": datetime.now().isoformat(),
             "components": {},
             "system": {}
         }
         
+        if self.startup is not None:
+            status["components"]["startup"] = self.startup.status()
+            if not self.startup.ready.is_set():
+                status["status"] = "starting"
+                return self._store(status)
+        
         # Check vector store
         try:
-            count = self.rag.collection.count()
+            count = self.rag.backend.count()
             status["components"]["vector_store"] = {
                 "status": "healthy",
                 "document_count": count
@@ -39,41 +117,57 @@ class HealthChecker:
                 "error": str(e)
             }
         
-        # Check retrieval
-        try:
-            test_result = self.rag.retrieve_complaints("test", k=1)
-            status["components"]["retrieval"] = {
-                "status": "healthy",
-                "test_query_success": True
-            }
-        except Exception as e:
-            status["status"] = "degraded"
-            status["components"]["retrieval"] = {
-                "status": "unhealthy",
-                "error": str(e)
-            }
+        # Retrieval latencies and failures from recent real requests
+        window = getattr(self.rag, "retrieval_latency", None)
+        if window is not None:
+            latency = window.snapshot()
+            if not latency["count"]:
+                retrieval_status = "idle"
+            elif latency["error_rate"] > self.max_error_rate:
+                retrieval_status = "unhealthy"
+                status["status"] = "degraded"
+            else:
+                retrieval_status = "healthy"
+            status["components"]["retrieval"] = {"status": retrieval_status, **latency}
         
-        # System metrics (requires psutil)
+        # Micro-batching distributions, for tuning BATCH_WINDOW_MS
+        batcher = getattr(self.rag, "batcher", None)
+        if batcher is not None:
+            status["components"]["batching"] = batcher.stats()
+        
+        # System metrics (requires psutil). cpu_percent(interval=None)
+        # measures since the previous sample instead of sleeping.
         try:
             import psutil
             status["system"] = {
-                "cpu_percent": psutil.cpu_percent(interval=1),
+                "cpu_percent": psutil.cpu_percent(interval=None),
                 "memory_percent": psutil.virtual_memory().percent,
                 "disk_usage_percent": psutil.disk_usage('/').percent
             }
         except ImportError:
             status["system"] = {"message": "psutil not installed"}
         
+        return self._store(status)
+    
+    def _store(self, status: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            self._snapshot = status
+            self._sampled_at = time.monotonic()
         return status
     
     def readiness(self) -> Dict[str, str]:
-        """Simple readiness check."""
+        """Simple readiness check; not ready until warm-up has finished."""
+        if self.startup is not None and not self.startup.ready.is_set():
+            readiness = {"status": "not ready", "stage": self.startup.stage}
+            if self.startup.error:
+                readiness["error"] = self.startup.error
+            return readiness
         try:
-            self.rag.collection.count()
+            self.rag.backend.count()
             return {"status": "ready"}
         except:
             return {"status": "not ready"}
     
     def liveness(self) -> Dict[str, str]:
         """Simple liveness check."""
-        return {"status": "alive"}
\ No newline at end of file
+        return {"status": "alive"}
@@ -0,0 +1,104 @@
+"""Manifest of indexed chunks used for incremental vector store updates."""
+
+import hashlib
+import json
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "ingest_manifest.sqlite3"
+
+def content_hash(document: str, metadata: Dict[str, Any]) -> str:
+    """Stable hash of a chunk's text and metadata."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(document.encode("utf-8"))
+    digest.update(b"\x1f")
+    digest.update(json.dumps(metadata, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+class IngestManifest:
+    """SQLite table of ``(id, complaint_id, chunk_index, content_hash)``.
+
+    Every incremental run gets a new run id; rows seen in the source are
+    stamped with it, so anything left with an older run id has disappeared
+    from the source and must be deleted from the vector store.
+    """
+
+    def __init__(self, store_path: str):
+        path = Path(store_path) / MANIFEST_FILE
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Pipelined ingest records from its writer thread
+        self.conn = sqlite3.connect(str(path), check_same_thread=False)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS chunks (
+                id TEXT PRIMARY KEY,
+                complaint_id TEXT,
+                chunk_index INTEGER,
+                content_hash TEXT NOT NULL,
+                run_id INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS chunks_run ON chunks(run_id);
+            CREATE TABLE IF NOT EXISTS runs (run_id INTEGER PRIMARY KEY AUTOINCREMENT, completed INTEGER DEFAULT 0);
+        """)
+        self.run_id = self.conn.execute("INSERT INTO runs DEFAULT VALUES").lastrowid
+        self.conn.commit()
+
+    def changed_positions(self, ids: Sequence[str], hashes: Sequence[str]) -> List[int]:
+        """Positions of rows that are new or whose content hash changed.
+
+        Unchanged rows are stamped with the current run id on the way.
+        """
+        self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS incoming (pos INTEGER, id TEXT, content_hash TEXT)")
+        self.conn.execute("DELETE FROM incoming")
+        self.conn.executemany(
+            "INSERT INTO incoming VALUES (?, ?, ?)",
+            zip(range(len(ids)), ids, hashes)
+        )
+
+        changed = [pos for (pos,) in self.conn.execute("""
+            SELECT i.pos FROM incoming i
+            LEFT JOIN chunks c ON c.id = i.id
+            WHERE c.content_hash IS NULL OR c.content_hash != i.content_hash
+            ORDER BY i.pos
+        """)]
+
+        self.conn.execute("""
+            UPDATE chunks SET run_id = ?
+            WHERE id IN (SELECT i.id FROM incoming i JOIN chunks c
+                         ON c.id = i.id AND c.content_hash = i.content_hash)
+        """, (self.run_id,))
+        self.conn.commit()
+        return changed
+
+    def record(self, rows: Sequence[Tuple[str, str, int, str]]) -> None:
+        """Store ``(id, complaint_id, chunk_index, content_hash)`` after upserting."""
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO chunks VALUES (?, ?, ?, ?, ?)",
+            ((doc_id, complaint_id, chunk_index, digest, self.run_id)
+             for doc_id, complaint_id, chunk_index, digest in rows)
+        )
+        self.conn.commit()
+
+    def stale_ids(self) -> List[str]:
+        """Ids that were not seen in this run."""
+        return [doc_id for (doc_id,) in self.conn.execute(
+            "SELECT id FROM chunks WHERE run_id != ?", (self.run_id,)
+        )]
+
+    def forget(self, ids: Sequence[str]) -> None:
+        self.conn.executemany("DELETE FROM chunks WHERE id = ?", ((doc_id,) for doc_id in ids))
+        self.conn.commit()
+
+    def clear(self) -> None:
+        self.conn.execute("DELETE FROM chunks")
+        self.conn.commit()
+
+    def complete(self) -> None:
+        self.conn.execute("UPDATE runs SET completed = 1 WHERE run_id = ?", (self.run_id,))
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
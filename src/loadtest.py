@@ -0,0 +1,360 @@
+"""Load test that drives ``app.respond`` like concurrent chat users.
+
+Each simulated user keeps its own chat history. Like a new browser tab,
+it sends its first message without a session id and then reuses the id
+the app returns. It asks a question, reads the streamed reply to the end, then thinks for an
+exponentially distributed pause before the next question. Questions
+follow a popularity skew (a few are asked again and again, as with real
+traffic and the answer cache), plus a share of one-off questions and
+invalid input. Users start over a ramp-up period and stop asking new
+questions when the test duration is up.
+
+By default the app runs in this process, so the rate limiter, session
+store and RAG system are exercised together, on one event loop, with the
+same handler the Gradio UI calls. ``--synthetic-rows`` serves a generated corpus with the
+stand-in encoder, so no data or model is needed. ``--url`` drives a
+running Gradio server instead (requires ``gradio_client``).
+
+The report has throughput, latency percentiles, the rate of each
+outcome (ok, rate_limited, invalid, not_ready, error) and a timeline of
+process RSS, thread count and in-flight requests. It is saved as JSON.
+
+Usage:
+    python -m src.loadtest --sessions 50 --duration 120 --synthetic-rows 100000
+    python -m src.loadtest --sessions 200 --think-time 2 --url http://localhost:7860
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass, replace
+from datetime import datetime
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+import logging
+
+from src.benchmark import latency_summary
+from src.synthetic import CATEGORIES, STATES, sample_questions
+
+logger = logging.getLogger(__name__)
+
+OUTCOMES = ("ok", "rate_limited", "invalid", "not_ready", "error")
+
+@dataclass
+class LoadConfig:
+    """Settings for one load test."""
+    sessions: int = 20
+    duration: float = 60.0  # seconds during which users start new questions
+    think_time: float = 5.0  # mean pause between a reply and the next question
+    ramp_up: float = 10.0  # seconds over which users join
+    sample_interval: float = 1.0  # seconds between RSS/throughput samples
+    unique_share: float = 0.15  # questions nobody asked before (cache misses)
+    invalid_share: float = 0.03  # empty or markup-only input
+    url: Optional[str] = None  # drive a Gradio server instead of app.respond in-process
+    synthetic_rows: int = 0  # in-process: serve a synthetic corpus of this size
+    seed: int = 0
+    work_dir: str = "logs/loadtest"
+
+def classify(reply: str) -> str:
+    """Outcome of a turn from the assistant's final message."""
+    if "Rate limit exceeded" in reply:
+        return "rate_limited"
+    if reply.startswith("⚠️"):
+        return "invalid"
+    if reply.startswith("⏳") or "failed to load" in reply:
+        return "not_ready"
+    if reply.startswith("❌"):
+        return "error"
+    return "ok"
+
+class QuestionMix:
+    """Draws questions with a Zipf-like popularity skew."""
+
+    def __init__(self, rng: random.Random, pool: List[str], unique_share: float = 0.15,
+                 invalid_share: float = 0.03, skew: float = 1.1):
+        self.rng = rng
+        self.pool = pool  # shared by all users, most popular first
+        self.cum_weights = list(itertools.accumulate(1 / rank ** skew for rank in range(1, len(pool) + 1)))
+        self.unique_share = unique_share
+        self.invalid_share = invalid_share
+        self.products = [p for products, _, _ in CATEGORIES.values() for p in products]
+
+    def next(self) -> str:
+        roll = self.rng.random()
+        if roll < self.invalid_share:
+            return self.rng.choice(["", "   ", "<b></b>"])
+        question = self.rng.choices(self.pool, cum_weights=self.cum_weights)[0]
+        if roll < self.invalid_share + self.unique_share:
+            question += (f" for {self.rng.choice(self.products).lower()} customers in "
+                         f"{self.rng.choice(STATES)} since {self.rng.randint(2015, 2025)}")
+        return question
+
+def current_rss_mb() -> Optional[float]:
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2**20
+    except ImportError:
+        return None
+
+@dataclass
+class Turn:
+    started: float  # seconds since the start of the test
+    latency_ms: float
+    outcome: str
+
+class LoadTest:
+    """Runs ``config.sessions`` simulated users against ``respond``.
+
+    ``respond(message, history, session_id)`` is an async generator
+    yielding ``(history, session_id)`` pairs, like ``app.respond``.
+    ``components`` maps names to ``stats()`` callables included in the
+    report (rate limiter, sessions, caches).
+    """
+
+    def __init__(self, respond: Callable[..., AsyncIterator[Tuple[list, str]]], config: LoadConfig,
+                 components: Optional[Dict[str, Callable[[], Dict[str, Any]]]] = None):
+        self.respond = respond
+        self.config = config
+        self.components = components or {}
+        self.turns: List[Turn] = []
+        self.timeline: List[Dict[str, Any]] = []
+        self.in_flight = 0
+        self._questions = sample_questions(200, config.seed)
+        self._start = 0.0
+
+    async def run(self) -> Dict[str, Any]:
+        self._start = time.perf_counter()
+        stop = asyncio.Event()
+        sampler = asyncio.create_task(self._sample(stop))
+        try:
+            await asyncio.gather(*(self._user(i) for i in range(self.config.sessions)))
+        finally:
+            stop.set()
+            await sampler
+        return self.report(time.perf_counter() - self._start)
+
+    def _elapsed(self) -> float:
+        return time.perf_counter() - self._start
+
+    async def _user(self, index: int) -> None:
+        config = self.config
+        rng = random.Random(config.seed * 100_003 + index)
+        mix = QuestionMix(rng, self._questions, unique_share=config.unique_share,
+                          invalid_share=config.invalid_share)
+        session_id = None  # issued by the app on the first message
+        history: list = []
+
+        await asyncio.sleep(config.ramp_up * index / max(config.sessions, 1))
+        while self._elapsed() < config.duration:
+            message = mix.next()
+            started = self._elapsed()
+            self.in_flight += 1
+            final = history
+            try:
+                async for update in self.respond(message, history, session_id):
+                    final, session_id = update
+                reply = final[-1]["content"] if final else ""
+                outcome = classify(reply)
+            except Exception as e:  # the app should never raise; count it as an error
+                logger.warning(f"respond raised for session {session_id}: {e}")
+                outcome = "error"
+            finally:
+                self.in_flight -= 1
+            self.turns.append(Turn(started, (self._elapsed() - started) * 1000, outcome))
+            if outcome == "ok":
+                history = final
+            await asyncio.sleep(rng.expovariate(1 / config.think_time) if config.think_time > 0 else 0)
+
+    async def _sample(self, stop: asyncio.Event) -> None:
+        done = 0
+        while True:
+            now = self._elapsed()
+            recent = self.turns[done:]
+            done = len(self.turns)
+            latencies = [t.latency_ms for t in recent]
+            sample = {
+                "t": round(now, 2),
+                "rss_mb": current_rss_mb(),
+                "threads": threading.active_count(),
+                "in_flight": self.in_flight,
+                "completed": done,
+                "interval_requests": len(recent),
+                "interval_p95_ms": latency_summary(latencies, 1.0)["p95_ms"] if latencies else None
+            }
+            self.timeline.append(sample)
+            rss = f"{sample['rss_mb']:.0f}MB" if sample["rss_mb"] is not None else "n/a"
+            print(f"  {now:6.1f}s  rss {rss:>7}  threads {sample['threads']:>3}  "
+                  f"in-flight {sample['in_flight']:>4}  completed {done:>6}", file=sys.stderr)
+            if stop.is_set():
+                return
+            try:
+                await asyncio.wait_for(stop.wait(), self.config.sample_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def report(self, wall_seconds: float) -> Dict[str, Any]:
+        counts = {outcome: 0 for outcome in OUTCOMES}
+        for turn in self.turns:
+            counts[turn.outcome] += 1
+        total = len(self.turns)
+        latency = {}
+        for name, outcomes in (("ok", {"ok"}), ("all", set(OUTCOMES))):
+            values = [t.latency_ms for t in self.turns if t.outcome in outcomes]
+            latency[name] = latency_summary(values, wall_seconds) if values else None
+
+        rss = [s["rss_mb"] for s in self.timeline if s["rss_mb"] is not None]
+        components = {}
+        for name, stats in self.components.items():
+            try:
+                components[name] = stats()
+            except Exception as e:
+                components[name] = {"error": str(e)}
+
+        return {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "config": asdict(self.config),
+            "wall_seconds": round(wall_seconds, 3),
+            "requests": total,
+            "throughput_rps": round(total / wall_seconds, 2) if wall_seconds > 0 else 0.0,
+            "outcomes": counts,
+            "rates": {k: round(v / total, 4) if total else 0.0 for k, v in counts.items()},
+            "latency_ms": latency,
+            "rss_mb": {
+                "start": round(rss[0], 1), "end": round(rss[-1], 1),
+                "max": round(max(rss), 1), "growth": round(rss[-1] - rss[0], 1)
+            } if rss else None,
+            "components": components,
+            "timeline": self.timeline
+        }
+
+def synthetic_factory(rows: int, work_dir: str) -> Callable[[], Any]:
+    """Factory for a RAGSystem over a synthetic corpus with the stand-in encoder."""
+    from src.benchmark import corpus_path
+    from src.build_vectorstore import IngestConfig, build_auxiliary_indexes
+    from src.config import RetrievalConfig
+    from src.rag_pipeline import RAGSystem
+    from src.synthetic import SyntheticEncoder
+
+    source = corpus_path(work_dir, rows)
+    store_path = Path(work_dir) / f"store_{rows}"
+    if not store_path.exists():
+        store_path.mkdir(parents=True)
+        build_auxiliary_indexes(IngestConfig(source=source, store_path=str(store_path)))
+    config = replace(RetrievalConfig.from_env(), backend="numpy",
+                     vector_store_path=str(store_path), embeddings_path=source)
+    return lambda: RAGSystem(config=config, encoder=SyntheticEncoder())
+
+def in_process_target(config: LoadConfig):
+    """Import the app, wait for warm-up and return its respond and components."""
+    import app  # builds the Gradio UI, needs the app's dependencies
+
+    # The app logs every request; keep the report readable
+    logging.getLogger().setLevel(logging.WARNING)
+    if config.synthetic_rows:
+        app.startup.factory = synthetic_factory(config.synthetic_rows, config.work_dir)
+    start = time.perf_counter()
+    if app.startup.start().wait() is None:
+        raise RuntimeError(f"RAG system did not start: {app.startup.error}")
+    print(f" RAG system ready in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+    def caches() -> Dict[str, Any]:
+        rag = app.startup.system
+        return {name: cache.stats() for name, cache in
+                (("embedding", rag.embedding_cache), ("answer", rag.answer_cache)) if cache is not None}
+
+    components = {
+        "rate_limiter": app.rate_limiter.stats,
+        "sessions": app.session_manager.stats,
+        "caches": caches
+    }
+    return app.respond, components
+
+def http_target(url: str):
+    """``respond`` that calls the ``/respond`` endpoint of a Gradio server."""
+    from gradio_client import Client
+
+    local = threading.local()
+
+    def call(message: str, history: list, session_id: Optional[str]) -> Tuple[list, str]:
+        # gradio_client.Client is not thread-safe; one per worker thread
+        if getattr(local, "client", None) is None:
+            local.client = Client(url, verbose=False)
+        return local.client.predict(message, history, session_id, api_name="/respond")
+
+    async def respond(message: str, history: list, session_id: Optional[str]):
+        yield await asyncio.to_thread(call, message, history, session_id)
+
+    return respond, {}
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"\n {report['requests']:,} requests in {report['wall_seconds']:.1f}s "
+          f"({report['throughput_rps']:.1f} req/s, {report['config']['sessions']} sessions)")
+    print("   " + "  ".join(f"{k} {v * 100:.1f}%" for k, v in report["rates"].items()))
+    for name, summary in report["latency_ms"].items():
+        if summary:
+            print(f"   latency ({name}): p50 {summary['p50_ms']:.1f}ms  p95 {summary['p95_ms']:.1f}ms  "
+                  f"p99 {summary['p99_ms']:.1f}ms  max {summary['max_ms']:.1f}ms")
+    if report["rss_mb"]:
+        rss = report["rss_mb"]
+        print(f"   RSS: {rss['start']:.0f}MB -> {rss['end']:.0f}MB (max {rss['max']:.0f}MB, "
+              f"growth {rss['growth']:+.0f}MB)")
+    for name, stats in report["components"].items():
+        print(f"   {name}: {json.dumps(stats, default=str)}")
+
+def parse_args(argv: Optional[List[str]] = None) -> LoadConfig:
+    defaults = LoadConfig()
+    parser = argparse.ArgumentParser(description="Simulate concurrent chat users against app.respond")
+    parser.add_argument("--sessions", type=int, default=defaults.sessions, help="Concurrent users")
+    parser.add_argument("--duration", type=float, default=defaults.duration,
+                        help="Seconds during which users ask new questions")
+    parser.add_argument("--think-time", type=float, default=defaults.think_time,
+                        help="Mean seconds between a reply and the next question")
+    parser.add_argument("--ramp-up", type=float, default=defaults.ramp_up, help="Seconds over which users join")
+    parser.add_argument("--sample-interval", type=float, default=defaults.sample_interval,
+                        help="Seconds between RSS and throughput samples")
+    parser.add_argument("--unique-share", type=float, default=defaults.unique_share,
+                        help="Share of one-off questions")
+    parser.add_argument("--invalid-share", type=float, default=defaults.invalid_share,
+                        help="Share of invalid input")
+    parser.add_argument("--url", default=None, help="Gradio server to drive instead of app.respond")
+    parser.add_argument("--synthetic-rows", type=int, default=defaults.synthetic_rows,
+                        help="Serve a synthetic corpus of this many chunks (in-process only)")
+    parser.add_argument("--seed", type=int, default=defaults.seed, help="Random seed")
+    parser.add_argument("--work-dir", default=defaults.work_dir, help="Synthetic corpus and results")
+    args = parser.parse_args(argv)
+    if args.url and args.synthetic_rows:
+        parser.error("--synthetic-rows only applies to the in-process app")
+    return LoadConfig(
+        sessions=args.sessions, duration=args.duration, think_time=args.think_time,
+        ramp_up=args.ramp_up, sample_interval=args.sample_interval, unique_share=args.unique_share,
+        invalid_share=args.invalid_share, url=args.url, synthetic_rows=args.synthetic_rows,
+        seed=args.seed, work_dir=args.work_dir
+    )
+
+def main(argv: Optional[List[str]] = None) -> None:
+    config = parse_args(argv)
+    respond, components = http_target(config.url) if config.url else in_process_target(config)
+
+    # RAGSystem prints progress on every call
+    with open(os.devnull, "w") as devnull:
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            report = asyncio.run(LoadTest(respond, config, components).run())
+        finally:
+            sys.stdout = stdout
+
+    print_report(report)
+    os.makedirs(os.path.join(config.work_dir, "results"), exist_ok=True)
+    path = os.path.join(config.work_dir, "results", f"{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2, default=str)
+    print(f"\n Saved results to {path}")
+
+if __name__ == "__main__":
+    main()
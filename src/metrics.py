@@ -0,0 +1,331 @@
+"""Lightweight in-process metrics and a Prometheus text endpoint."""
+
+import bisect
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.tracing import span
+
+# Bucket upper bounds in seconds (Prometheus base unit), roughly x2 apart
+LATENCY_BUCKETS_SECONDS = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05,
+                           0.1, 0.2, 0.5, 1, 2, 5, 10)
+
+class Histogram:
+    """Thread-safe fixed-bucket histogram.
+
+    ``buckets`` are inclusive upper bounds; larger observations land in an
+    overflow bucket. Quantiles are estimated by linear interpolation inside
+    the bucket that holds them, which is plenty for tuning and dashboards.
+    """
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS_SECONDS):
+        if not buckets or list(buckets) != sorted(buckets):
+            raise ValueError("buckets must be a non-empty ascending sequence")
+        self.buckets = tuple(float(b) for b in buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._count = 0
+        self._sum = 0.0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[position] += 1
+            self._count += 1
+            self._sum += value
+            self._max = max(self._max, value)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts = [0] * (len(self.buckets) + 1)
+            self._count = 0
+            self._sum = 0.0
+            self._max = 0.0
+
+    def _quantile(self, counts, count: int, maximum: float, q: float) -> Optional[float]:
+        if not count:
+            return None
+        target = q * count
+        seen = 0
+        for position, bucket_count in enumerate(counts):
+            if bucket_count and seen + bucket_count >= target:
+                lower = self.buckets[position - 1] if position > 0 else 0.0
+                upper = self.buckets[position] if position < len(self.buckets) else maximum
+                upper = min(upper, maximum)
+                return lower + (upper - lower) * (target - seen) / bucket_count
+            seen += bucket_count
+        return maximum
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Count, sum, mean, max, p50/p95/p99 and cumulative bucket counts."""
+        with self._lock:
+            counts = list(self._counts)
+            count, total, maximum = self._count, self._sum, self._max
+
+        cumulative, running = {}, 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            running += bucket_count
+            cumulative[bound] = running
+
+        return {
+            "count": count,
+            "sum": total,
+            "mean": total / count if count else 0.0,
+            "max": maximum,
+            "p50": self._quantile(counts, count, maximum, 0.50),
+            "p95": self._quantile(counts, count, maximum, 0.95),
+            "p99": self._quantile(counts, count, maximum, 0.99),
+            "buckets": cumulative
+        }
+
+class LatencyWindow:
+    """Rolling window of recent latencies and their outcomes.
+
+    Keeps at most ``max_samples`` observations from the last
+    ``window_seconds``, so the summary reflects current traffic rather
+    than the whole process lifetime.
+    """
+
+    def __init__(self, window_seconds: float = 300.0, max_samples: int = 2048):
+        self.window_seconds = window_seconds
+        self._samples: "deque[tuple]" = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+
+    def observe(self, latency_ms: float, ok: bool = True) -> None:
+        with self._lock:
+            self._samples.append((time.monotonic(), latency_ms, ok))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Count, error rate, p50/p95/p99 and max over the window."""
+        cutoff = time.monotonic() - self.window_seconds
+        with self._lock:
+            while self._samples and self._samples[0][0] < cutoff:
+                self._samples.popleft()
+            samples = list(self._samples)
+
+        if not samples:
+            return {"count": 0, "window_seconds": self.window_seconds}
+        latencies = sorted(latency for _, latency, _ in samples)
+        errors = sum(1 for _, _, ok in samples if not ok)
+
+        def percentile(q: float) -> float:
+            return latencies[min(int(q * len(latencies)), len(latencies) - 1)]
+
+        return {
+            "count": len(samples),
+            "window_seconds": self.window_seconds,
+            "error_rate": errors / len(samples),
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99),
+            "max_ms": latencies[-1]
+        }
+
+class Counter:
+    """Thread-safe monotonically increasing counter."""
+
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+Labels = Tuple[Tuple[str, str], ...]
+
+def _labels(labels: Optional[Dict[str, str]]) -> Labels:
+    return tuple(sorted((labels or {}).items()))
+
+def _format_labels(labels: Labels, extra: Labels = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+class MetricsRegistry:
+    """Named histograms, counters and gauges, rendered as Prometheus text.
+
+    ``histogram``/``counter`` return the same instance for the same name
+    and labels, so call sites can look them up on every use. ``gauge``
+    and ``counter_func`` register callables sampled at render time, for
+    values other objects already track (cache hits, pool saturation).
+    """
+
+    def __init__(self):
+        self._families: Dict[str, Tuple[str, str]] = {}  # name -> (type, help)
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._counters: Dict[Tuple[str, Labels], Counter] = {}
+        self._callbacks: Dict[Tuple[str, Labels], Callable[[], float]] = {}
+        self._lock = threading.Lock()
+
+    def _family(self, name: str, kind: str, help_text: str) -> None:
+        registered = self._families.setdefault(name, (kind, help_text))
+        if registered[0] != kind:
+            raise ValueError(f"Metric '{name}' is already registered as a {registered[0]}")
+
+    def histogram(self, name: str, help_text: str = "", labels: Optional[Dict[str, str]] = None,
+                  buckets: Sequence[float] = LATENCY_BUCKETS_SECONDS) -> Histogram:
+        key = (name, _labels(labels))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                self._family(name, "histogram", help_text)
+                histogram = self._histograms.setdefault(key, Histogram(buckets))
+        return histogram
+
+    def counter(self, name: str, help_text: str = "", labels: Optional[Dict[str, str]] = None) -> Counter:
+        key = (name, _labels(labels))
+        counter = self._counters.get(key)
+        if counter is None:
+            with self._lock:
+                self._family(name, "counter", help_text)
+                counter = self._counters.setdefault(key, Counter())
+        return counter
+
+    def gauge(self, name: str, func: Callable[[], float], help_text: str = "",
+              labels: Optional[Dict[str, str]] = None) -> None:
+        """Register (or replace) a gauge read from ``func`` at render time."""
+        self._callback(name, "gauge", func, help_text, labels)
+
+    def counter_func(self, name: str, func: Callable[[], float], help_text: str = "",
+                     labels: Optional[Dict[str, str]] = None) -> None:
+        """Register (or replace) a counter whose total another object keeps."""
+        self._callback(name, "counter", func, help_text, labels)
+
+    def _callback(self, name: str, kind: str, func: Callable[[], float], help_text: str,
+                  labels: Optional[Dict[str, str]]) -> None:
+        with self._lock:
+            self._family(name, kind, help_text)
+            self._callbacks[(name, _labels(labels))] = func
+
+    def clear(self) -> None:
+        with self._lock:
+            self._families.clear()
+            self._histograms.clear()
+            self._counters.clear()
+            self._callbacks.clear()
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            families = dict(self._families)
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+            callbacks = sorted(self._callbacks.items(), key=lambda item: item[0])
+
+        samples: Dict[str, List[str]] = {name: [] for name in families}
+        for (name, labels), histogram in histograms:
+            snapshot = histogram.snapshot()
+            for bound, count in snapshot["buckets"].items():
+                samples[name].append(
+                    f"{name}_bucket{_format_labels(labels, (('le', _format_value(bound)),))} {count}"
+                )
+            samples[name].append(f"{name}_sum{_format_labels(labels)} {_format_value(snapshot['sum'])}")
+            samples[name].append(f"{name}_count{_format_labels(labels)} {snapshot['count']}")
+        for (name, labels), counter in counters:
+            samples[name].append(f"{name}_total{_format_labels(labels)} {_format_value(counter.value)}")
+        for (name, labels), func in callbacks:
+            try:
+                value = float(func())
+            except Exception:
+                continue  # a broken callback must not take down the endpoint
+            suffix = "_total" if families[name][0] == "counter" else ""
+            samples[name].append(f"{name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+
+        lines = []
+        for name in sorted(families):
+            if not samples[name]:
+                continue
+            kind, help_text = families[name]
+            exposed = f"{name}_total" if kind == "counter" else name
+            if help_text:
+                lines.append(f"# HELP {exposed} {help_text}")
+            lines.append(f"# TYPE {exposed} {kind}")
+            lines.extend(samples[name])
+        return "\n".join(lines) + "\n"
+
+REGISTRY = MetricsRegistry()
+
+STAGE_METRIC = "rag_stage_duration_seconds"
+REQUEST_METRIC = "rag_request_duration_seconds"
+
+@contextmanager
+def _timed(metric: str, help_text: str, labels: Dict[str, str], registry: Optional[MetricsRegistry]):
+    histogram = (registry or REGISTRY).histogram(metric, help_text, labels)
+    start = time.perf_counter()
+    try:
+        # Inside a request trace the same block is also recorded as a span
+        with span(next(iter(labels.values()))):
+            yield
+    finally:
+        histogram.observe(time.perf_counter() - start)
+
+def timed_stage(stage: str, registry: Optional[MetricsRegistry] = None):
+    """Time a block (or, as a decorator, a sync function) as one pipeline stage."""
+    return _timed(STAGE_METRIC, "Latency of each RAG pipeline stage in seconds",
+                  {"stage": stage}, registry)
+
+def timed_request(operation: str, registry: Optional[MetricsRegistry] = None):
+    """Time a whole request (``retrieve``, ``answer``, ``respond``) end to end."""
+    return _timed(REQUEST_METRIC, "End-to-end request latency in seconds",
+                  {"operation": operation}, registry)
+
+def count(name: str, help_text: str = "", registry: Optional[MetricsRegistry] = None, **labels: str) -> None:
+    """Increment counter ``name`` with ``labels`` by one."""
+    (registry or REGISTRY).counter(name, help_text, labels).inc()
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry: MetricsRegistry = REGISTRY
+    health = None
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == "/metrics":
+            self._send(200, self.registry.render_prometheus(), "text/plain; version=0.0.4; charset=utf-8")
+        elif path == "/health" and self.health is not None:
+            self._send(200, json.dumps(self.health.get_status(), default=str), "application/json")
+        elif path == "/ready" and self.health is not None:
+            readiness = self.health.readiness()
+            code = 200 if readiness["status"] == "ready" else 503
+            self._send(code, json.dumps(readiness), "application/json")
+        else:
+            self._send(404, "not found\n", "text/plain")
+
+    def _send(self, code: int, body: str, content_type: str) -> None:
+        payload = body.encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass  # scrapes every few seconds would flood the log
+
+def start_metrics_server(port: int, host: str = "0.0.0.0", registry: Optional[MetricsRegistry] = None,
+                         health=None) -> ThreadingHTTPServer:
+    """Serve ``/metrics`` (and ``/health``, ``/ready`` given a HealthChecker) on a daemon thread."""
+    handler = type("MetricsHandler", (_MetricsHandler,), {
+        "registry": registry or REGISTRY, "health": health
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
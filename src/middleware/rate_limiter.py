@@ -1,34 +1,181 @@
 """Rate limiting middleware."""
 
+import os
+import sqlite3
+import threading
 import time
-from collections import defaultdict
-from typing import Dict, List
+from collections import OrderedDict
+from typing import Any, Dict, Optional
 import logging
 
+from src.config import RateLimitConfig
+
 logger = logging.getLogger(__name__)
 
 class RateLimiter:
-    """Simple in-memory rate limiter."""
+    """Thread-safe in-memory token-bucket rate limiter.
+    
+    Each client gets a bucket of ``max_requests`` tokens refilled at
+    ``max_requests / window_seconds`` per second, so a check is O(1) no
+    matter how many requests were made. Buckets are kept in
+    least-recently-seen order: clients idle for a whole window (whose
+    bucket would be full again anyway) are evicted as new requests come
+    in, and at most ``max_clients`` buckets are held.
+    """
     
-    def __init__(self, max_requests: int = 30, window_seconds: int = 60):
+    def __init__(self, max_requests: int = 30, window_seconds: int = 60,
+                 max_clients: int = 100_000):
+        if max_requests < 1 or window_seconds <= 0:
+            raise ValueError("max_requests and window_seconds must be positive")
         self.max_requests = max_requests
         self.window_seconds = window_seconds
-        self.requests: Dict[str, List[float]] = defaultdict(list)
+        self.max_clients = max_clients
+        self.refill_rate = max_requests / window_seconds
+        # client_id -> [tokens, last_seen], oldest first
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.rejected = 0
+        self.evicted = 0
     
     def is_allowed(self, client_id: str) -> bool:
-        now = time.time()
-        window_start = now - self.window_seconds
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.pop(client_id, None)
+            if bucket is None:
+                tokens = float(self.max_requests)
+            else:
+                tokens = min(self.max_requests, bucket[0] + (now - bucket[1]) * self.refill_rate)
+            
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+                self.allowed += 1
+            else:
+                self.rejected += 1
+            self._buckets[client_id] = [tokens, now]
+            self._evict(now)
         
-        # Clean old requests
-        self.requests[client_id] = [
-            req_time for req_time in self.requests[client_id]
-            if req_time > window_start
-        ]
-        
-        # Check rate limit
-        if len(self.requests[client_id]) >= self.max_requests:
+        if not allowed:
             logger.warning(f"Rate limit exceeded for {client_id}")
-            return False
+        return allowed
+    
+    def _evict(self, now: float) -> None:
+        """Drop idle buckets from the old end; amortised O(1) per call."""
+        idle_before = now - self.window_seconds
+        while self._buckets:
+            client_id, (_, last_seen) = next(iter(self._buckets.items()))
+            if last_seen > idle_before and len(self._buckets) <= self.max_clients:
+                break
+            self._buckets.popitem(last=False)
+            self.evicted += 1
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "clients": len(self._buckets),
+                "max_clients": self.max_clients,
+                "allowed": self.allowed,
+                "rejected": self.rejected,
+                "evicted": self.evicted
+            }
+
+class SQLiteRateLimiter:
+    """Token-bucket rate limiter stored in a local SQLite file.
+    
+    Worker processes that point at the same file share their limits. Each
+    check is a single ``BEGIN IMMEDIATE`` transaction reading and
+    upserting one row by primary key. Rows idle for a whole window are
+    deleted every ``sweep_interval`` seconds, and the oldest rows beyond
+    ``max_clients`` go with them.
+    """
+    
+    def __init__(self, path: str, max_requests: int = 30, window_seconds: int = 60,
+                 max_clients: int = 100_000, sweep_interval: float = 60.0):
+        if max_requests < 1 or window_seconds <= 0:
+            raise ValueError("max_requests and window_seconds must be positive")
+        self.path = path
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+        self.max_clients = max_clients
+        self.sweep_interval = sweep_interval
+        self.refill_rate = max_requests / window_seconds
+        self._local = threading.local()
+        self._next_sweep = 0.0
+        
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_buckets ("
+                "client_id TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS rate_buckets_updated ON rate_buckets (updated)")
+    
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+    
+    def is_allowed(self, client_id: str) -> bool:
+        # Wall-clock time: the buckets are shared between processes
+        now = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT tokens, updated FROM rate_buckets WHERE client_id = ?", (client_id,)
+            ).fetchone()
+            if row is None:
+                tokens = float(self.max_requests)
+            else:
+                tokens = min(self.max_requests, row[0] + max(now - row[1], 0.0) * self.refill_rate)
+            
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            conn.execute(
+                "INSERT INTO rate_buckets (client_id, tokens, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT(client_id) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                (client_id, tokens, now)
+            )
+            if now >= self._next_sweep:
+                self._sweep(conn, now)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
         
-        self.requests[client_id].append(now)
-        return True
\ No newline at end of file
+        if not allowed:
+            logger.warning(f"Rate limit exceeded for {client_id}")
+        return allowed
+    
+    def _sweep(self, conn: sqlite3.Connection, now: float) -> None:
+        self._next_sweep = now + self.sweep_interval
+        conn.execute("DELETE FROM rate_buckets WHERE updated < ?", (now - self.window_seconds,))
+        conn.execute(
+            "DELETE FROM rate_buckets WHERE client_id IN ("
+            "SELECT client_id FROM rate_buckets ORDER BY updated DESC LIMIT -1 OFFSET ?)",
+            (self.max_clients,)
+        )
+    
+    def stats(self) -> Dict[str, Any]:
+        clients = self._connection().execute("SELECT COUNT(*) FROM rate_buckets").fetchone()[0]
+        return {"backend": "sqlite", "path": self.path, "clients": clients,
+                "max_clients": self.max_clients}
+
+def create_rate_limiter(config: Optional[RateLimitConfig] = None):
+    """Build the limiter selected by ``RateLimitConfig.backend``."""
+    config = config or RateLimitConfig.from_env()
+    if config.backend == "memory":
+        return RateLimiter(config.max_requests, config.window_seconds, config.max_clients)
+    if config.backend == "sqlite":
+        return SQLiteRateLimiter(config.sqlite_path, config.max_requests,
+                                 config.window_seconds, config.max_clients)
+    raise ValueError(f"Unknown rate limit backend '{config.backend}'. Choose one of: memory, sqlite")
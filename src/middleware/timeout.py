@@ -1,9 +1,13 @@
 """Timeout handling middleware"""
 
+import asyncio
+import contextvars
 import functools
+import os
 import threading
 import time
-from typing import Any, Callable
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,36 +16,254 @@ class TimeoutError(Exception):
     """Custom timeout exception."""
     pass
 
+class PoolSaturatedError(TimeoutError):
+    """Raised when the shared timeout pool cannot accept more work."""
+    pass
+
+# Absolute deadline (time.monotonic) of the innermost @timeout call, and the
+# cancellation flag of the pool task currently running in this context.
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar(
+    "timeout_deadline", default=None
+)
+_cancel_event: contextvars.ContextVar[Optional[threading.Event]] = contextvars.ContextVar(
+    "timeout_cancel_event", default=None
+)
+
+class TimeoutPool:
+    """Shared, bounded worker pool that runs ``@timeout`` calls.
+
+    At most ``max_workers`` calls run at once and at most ``max_pending``
+    more may wait; anything beyond that is rejected immediately instead of
+    piling up. Calls that time out are flagged for cooperative cancellation
+    and, if they already started, counted as abandoned until they finish.
+    """
+
+    def __init__(self, max_workers: int = 16, max_pending: int = 64):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="timeout")
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.running = 0
+        self.submitted = 0
+        self.completed = 0
+        self.timed_out = 0
+        self.cancelled = 0
+        self.abandoned = 0
+        self.rejected = 0
+
+    def submit(self, func: Callable, *args, **kwargs):
+        """Submit ``func`` or raise ``PoolSaturatedError`` if the pool is full."""
+        with self._lock:
+            if self.in_flight >= self.max_workers + self.max_pending:
+                self.rejected += 1
+                raise PoolSaturatedError("Timeout worker pool is saturated")
+            self.in_flight += 1
+            self.submitted += 1
+
+        def tracked():
+            with self._lock:
+                self.running += 1
+            try:
+                return func(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self.running -= 1
+
+        future = self.executor.submit(tracked)
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _on_done(self, future) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            if not future.cancelled():
+                self.completed += 1
+
+    def record_timeout(self, future) -> None:
+        """Cancel a timed-out call if still queued, else track it as abandoned."""
+        with self._lock:
+            self.timed_out += 1
+
+        if future.cancel():
+            with self._lock:
+                self.cancelled += 1
+            return
+
+        with self._lock:
+            self.abandoned += 1
+
+        def release(_):
+            with self._lock:
+                self.abandoned -= 1
+        future.add_done_callback(release)
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool saturation and abandoned-task metrics."""
+        with self._lock:
+            capacity = self.max_workers + self.max_pending
+            return {
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "running": self.running,
+                "queued": self.in_flight - self.running,
+                "saturation": self.in_flight / capacity,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "timed_out": self.timed_out,
+                "cancelled": self.cancelled,
+                "abandoned": self.abandoned,
+                "rejected": self.rejected
+            }
+
+_pool: Optional[TimeoutPool] = None
+_pool_lock = threading.Lock()
+
+def get_timeout_pool() -> TimeoutPool:
+    """Return the process-wide pool, sized from the environment on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                default_workers = min(32, (os.cpu_count() or 1) + 4)
+                workers = int(os.getenv("TIMEOUT_POOL_WORKERS", default_workers))
+                pending = int(os.getenv("TIMEOUT_POOL_MAX_PENDING", workers * 4))
+                _pool = TimeoutPool(max_workers=workers, max_pending=pending)
+    return _pool
+
+def timeout_pool_stats() -> Dict[str, Any]:
+    """Metrics for the shared timeout pool."""
+    return get_timeout_pool().stats()
+
+def remaining_time() -> Optional[float]:
+    """Seconds left before the current deadline, or None if there is none."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+def check_deadline(error_message: str = "Request timed out") -> None:
+    """Cooperative cancellation point for long-running work.
+
+    Raises ``TimeoutError`` if the enclosing ``@timeout`` call has expired
+    or its caller already gave up on it.
+    """
+    event = _cancel_event.get()
+    if event is not None and event.is_set():
+        raise TimeoutError(error_message)
+    remaining = remaining_time()
+    if remaining is not None and remaining <= 0:
+        raise TimeoutError(error_message)
+
 def timeout(seconds: int = 10, error_message: str = "Request timed out"):
-    """Decorator to add timeout to function - works on Windows."""
+    """Decorator to add timeout to function - works on Windows.
+
+    Calls run on a shared bounded pool rather than a thread per call. A
+    nested ``@timeout`` call inherits the remaining budget of the outer one
+    and runs inline on the outer worker, so one request never holds more
+    than one pool thread.
+    """
     def decorator(func: Callable) -> Callable:
         @functools.wraps(func)
         def wrapper(*args, **kwargs) -> Any:
-            result = []
-            error = []
-            
-            def target():
+            now = time.monotonic()
+            outer_deadline = _deadline.get()
+            deadline = now + seconds
+            if outer_deadline is not None:
+                deadline = min(deadline, outer_deadline)
+            budget = deadline - now
+
+            if budget <= 0:
+                logger.warning(f"Function {func.__name__} has no time budget left")
+                raise TimeoutError(error_message)
+
+            if _cancel_event.get() is not None:
+                # Already on a pool worker: run inline under the tighter deadline
+                token = _deadline.set(deadline)
                 try:
-                    result.append(func(*args, **kwargs))
-                except Exception as e:
-                    error.append(e)
-            
-            # Create and start thread
-            thread = threading.Thread(target=target)
-            thread.daemon = True
-            thread.start()
-            thread.join(timeout=seconds)
-            
-            if thread.is_alive():
-                # Thread still running - timeout occurred
-                logger.warning(f"Function {func.__name__} timed out after {seconds}s")
+                    result = func(*args, **kwargs)
+                finally:
+                    _deadline.reset(token)
+                if time.monotonic() > deadline:
+                    logger.warning(f"Function {func.__name__} exceeded its {budget:.1f}s budget")
+                    raise TimeoutError(error_message)
+                return result
+
+            cancel_event = threading.Event()
+            context = contextvars.copy_context()
+
+            def target():
+                _deadline.set(deadline)
+                _cancel_event.set(cancel_event)
+                check_deadline(error_message)
+                return func(*args, **kwargs)
+
+            pool = get_timeout_pool()
+            future = pool.submit(context.run, target)
+
+            try:
+                return future.result(timeout=budget)
+            except FutureTimeoutError:
+                if future.done():
+                    # func itself raised a builtin TimeoutError
+                    raise
+                # Ask the worker to stop at its next check_deadline()
+                cancel_event.set()
+                pool.record_timeout(future)
+                logger.warning(f"Function {func.__name__} timed out after {budget:.1f}s")
+                raise TimeoutError(error_message)
+
+        return wrapper
+    return decorator
+
+def atimeout(seconds: int = 10, error_message: str = "Request timed out"):
+    """Coroutine counterpart of ``@timeout``.
+
+    The coroutine runs on the event loop under ``asyncio.wait_for``; no
+    pool thread is held while it awaits. The deadline and cancellation
+    flag are set in its context, so work it hands to an executor with
+    ``run_in_context`` still sees them through ``check_deadline()``.
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs) -> Any:
+            now = time.monotonic()
+            outer_deadline = _deadline.get()
+            deadline = now + seconds
+            if outer_deadline is not None:
+                deadline = min(deadline, outer_deadline)
+            budget = deadline - now
+
+            if budget <= 0:
+                logger.warning(f"Coroutine {func.__name__} has no time budget left")
                 raise TimeoutError(error_message)
-            
-            if error:
-                # Function raised an exception
-                raise error[0]
-            
-            return result[0] if result else None
-        
+
+            # Nested calls share the outer flag so cancelling the outer call reaches them
+            cancel_event = _cancel_event.get() or threading.Event()
+            deadline_token = _deadline.set(deadline)
+            cancel_token = _cancel_event.set(cancel_event)
+            try:
+                return await asyncio.wait_for(func(*args, **kwargs), timeout=budget)
+            except asyncio.TimeoutError:
+                cancel_event.set()
+                logger.warning(f"Coroutine {func.__name__} timed out after {budget:.1f}s")
+                raise TimeoutError(error_message)
+            except asyncio.CancelledError:
+                cancel_event.set()
+                raise
+            finally:
+                _deadline.reset(deadline_token)
+                _cancel_event.reset(cancel_token)
+
         return wrapper
-    return decorator
\ No newline at end of file
+    return decorator
+
+async def run_in_context(executor: Optional[ThreadPoolExecutor], func: Callable, *args, **kwargs) -> Any:
+    """Run blocking ``func`` on ``executor`` with the caller's context variables.
+
+    ``loop.run_in_executor`` does not carry contextvars over, so without
+    this the deadline set by ``@atimeout`` would be invisible to ``func``.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(executor, functools.partial(context.run, func, *args, **kwargs))
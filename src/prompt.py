@@ -0,0 +1,210 @@
+"""Token-budgeted prompt construction.
+
+``ContextPacker`` fills the prompt with retrieved complaints, best score
+first, until ``max_prompt_tokens`` is reached. Duplicate complaints
+(same ``complaint_id`` or same text) are skipped. Each complaint's text is cut at the
+last sentence end that fits ``max_complaint_tokens`` and the remaining
+budget, so the prompt carries whole sentences, not a fixed 300
+characters.
+
+Tokens are counted with tiktoken's ``cl100k_base`` encoding. Without
+tiktoken, ``count_tokens`` falls back to ``estimate_tokens``, a rough
+regex estimate.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, List, Optional, Tuple
+import logging
+
+from src.config import PromptConfig
+
+logger = logging.getLogger(__name__)
+
+PROMPT_TEMPLATE = """You are a helpful financial analyst assistant at CrediTrust Financial.
+
+RELEVANT CUSTOMER COMPLAINTS:
+{context}
+
+USER QUESTION: {question}
+
+INSTRUCTIONS:
+1. Analyze the complaints above
+2. Summarize the main issues mentioned
+3. Group similar complaints together
+4. Mention which financial products and companies are affected
+5. Base your answer ONLY on the provided complaints
+6. Be specific and actionable
+
+ANALYSIS AND ANSWER:
+"""
+
+NO_COMPLAINTS_TEMPLATE = "Question: {question}\n\nNo relevant complaints found."
+
+_render_prompt = PROMPT_TEMPLATE.format
+_render_header = "\n[Complaint #{id} - {product} - {company}]\nSimilarity: {similarity:.2f}\nIssue: {issue}\nText: ".format
+
+MIN_TEXT_TOKENS = 16  # don't add a complaint with less text than this
+
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_NORMALIZE = re.compile(r"\W+")
+
+_ENCODING_NAME = "cl100k_base"
+_encoding = None
+
+def _get_encoding():
+    """The tiktoken encoding, loaded on first use; None if unavailable."""
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding(_ENCODING_NAME)
+        except ImportError:
+            _encoding = False
+        except Exception as e:
+            # e.g. the encoding file cannot be downloaded offline
+            logger.warning(f"Could not load tiktoken encoding {_ENCODING_NAME}: {e}; estimating tokens")
+            _encoding = False
+    return _encoding or None
+
+def estimate_tokens(text: str) -> int:
+    """Estimate BPE tokens: one per punctuation mark, one per 5 word characters."""
+    return sum((len(piece) + 4) // 5 for piece in _TOKEN.findall(text))
+
+def count_tokens(text: str) -> int:
+    """Tokens in ``text`` under ``cl100k_base``, or an estimate without tiktoken."""
+    encoding = _get_encoding()
+    if encoding is None:
+        return estimate_tokens(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+def _field(complaint, name: str, default: Any = None) -> Any:
+    # Support dict (tests) and object (runtime)
+    if isinstance(complaint, dict):
+        value = complaint.get(name, default)
+    else:
+        value = getattr(complaint, name, default)
+    return default if value is None else value
+
+def trim_to_budget(text: str, max_tokens: int, counter: Callable[[str], int] = count_tokens,
+                   suffix: str = "...") -> Tuple[str, bool]:
+    """Longest prefix of whole sentences within ``max_tokens``.
+
+    If even the first sentence is too long, it is cut at a word boundary
+    and ends with ``suffix``, counted in the budget. Returns the text and
+    whether anything was cut; the text is empty if nothing fits.
+    """
+    if counter(text) <= max_tokens:
+        return text, False
+
+    kept: List[str] = []
+    used = 0
+    for sentence in _SENTENCE_END.split(text):
+        tokens = counter(sentence)
+        if used + tokens > max_tokens:
+            break
+        kept.append(sentence)
+        used += tokens
+    if kept:
+        return " ".join(kept), True
+
+    words: List[str] = []
+    used = counter(suffix)
+    for word in text.split():
+        used += counter(word)
+        if used > max_tokens:
+            break
+        words.append(word)
+    return (" ".join(words) + suffix if words else ""), True
+
+@dataclass
+class PackedContext:
+    """The complaint section of a prompt and what went into it.
+
+    ``tokens`` is the sum of the headers and texts counted one by one. A
+    BPE tokenizer can merge characters across part boundaries, so the
+    count of the rendered text may differ slightly.
+    """
+    text: str
+    tokens: int
+    included: List[Any] = field(default_factory=list)
+    duplicates: int = 0
+    trimmed: int = 0
+    dropped: int = 0  # did not fit the budget
+
+class ContextPacker:
+    """Builds prompts that fit ``max_prompt_tokens``."""
+
+    def __init__(self, max_prompt_tokens: int = PromptConfig.max_prompt_tokens,
+                 max_complaint_tokens: int = PromptConfig.max_complaint_tokens,
+                 counter: Callable[[str], int] = count_tokens):
+        self.max_prompt_tokens = max_prompt_tokens
+        self.max_complaint_tokens = max_complaint_tokens
+        self.counter = counter
+        # Smallest text worth adding, but no more than one complaint may hold
+        self.min_text_tokens = min(MIN_TEXT_TOKENS, max_complaint_tokens)
+        self._template_tokens = counter(_render_prompt(context="", question=""))
+
+    @classmethod
+    def from_config(cls, config: Optional[PromptConfig] = None) -> "ContextPacker":
+        config = config or PromptConfig.from_env()
+        return cls(config.max_prompt_tokens, config.max_complaint_tokens)
+
+    def pack(self, complaints: List[Any], budget: int) -> PackedContext:
+        """Greedily fill ``budget`` tokens with complaints, highest similarity first."""
+        ranked = sorted(complaints, key=lambda c: _field(c, "similarity", 0.0), reverse=True)
+        parts: List[str] = []
+        packed = PackedContext(text="", tokens=0)
+        seen_ids = set()  # complaint_id from the chunk metadata
+        seen_texts = set()
+
+        for position, complaint in enumerate(ranked):
+            comp_id = _field(complaint, "id")
+            source_id = _field(complaint, "complaint_id")
+            text = " ".join(str(_field(complaint, "text", "")).split())
+            key = _NORMALIZE.sub(" ", text.lower()).strip()
+            if (source_id not in (None, "") and source_id in seen_ids) or (key and key in seen_texts):
+                packed.duplicates += 1
+                continue
+
+            header = _render_header(
+                id=comp_id, product=_field(complaint, "product"), company=_field(complaint, "company"),
+                similarity=_field(complaint, "similarity", 0.0), issue=_field(complaint, "issue", "Unknown")
+            )
+            header_tokens = self.counter(header)
+            remaining = budget - packed.tokens
+            if remaining <= header_tokens:
+                # Not even the header fits, so nothing after this will
+                packed.dropped += len(ranked) - position
+                break
+            room = min(self.max_complaint_tokens, remaining - header_tokens)
+            body, cut = trim_to_budget(text, room, self.counter)
+            if cut and (not body or room < self.min_text_tokens):
+                # A shorter, lower-scored complaint may still fit whole
+                packed.dropped += 1
+                continue
+
+            if cut:
+                packed.trimmed += 1
+            parts.append(header)
+            parts.append(body)
+            parts.append("\n")
+            packed.tokens += header_tokens + self.counter(body)
+            packed.included.append(complaint)
+            seen_ids.add(source_id)
+            seen_texts.add(key)
+
+        packed.text = "".join(parts)
+        return packed
+
+    def build_prompt(self, question: str, complaints: List[Any]) -> str:
+        if not complaints:
+            return NO_COMPLAINTS_TEMPLATE.format(question=question)
+
+        budget = self.max_prompt_tokens - self._template_tokens - self.counter(question)
+        packed = self.pack(complaints, budget)
+        if packed.dropped or packed.duplicates:
+            logger.debug(f"Prompt context: {len(packed.included)} complaints in about {packed.tokens} tokens, "
+                         f"{packed.duplicates} duplicates and {packed.dropped} over budget left out")
+        return _render_prompt(context=packed.text, question=question)
@@ -1,14 +1,32 @@
 # RAG PIPELINE 
 
-from src.middleware.timeout import timeout, TimeoutError
+from src.middleware.timeout import (
+    atimeout, check_deadline, run_in_context, timeout, timeout_pool_stats, TimeoutError
+)
 import logging
-from dataclasses import dataclass
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from dataclasses import dataclass, replace
+from types import SimpleNamespace
 from typing import List, Dict, Tuple, Optional, Any
-import chromadb
-from chromadb.config import Settings
-from sentence_transformers import SentenceTransformer
 import numpy as np
 
+from src.cache import LRUCache
+from src.config import CacheConfig, ModelConfig, PromptConfig, RetrievalConfig
+from src.metrics import REGISTRY, LatencyWindow, count, timed_request, timed_stage
+from src.prompt import ContextPacker
+from src.retrieval.base import SearchHit
+from src.retrieval.batching import MicroBatcher
+from src.retrieval.bm25 import LexicalSearcher
+from src.retrieval.encoder import CachedEncoder, QueryEncoder
+from src.retrieval.factory import create_backend
+from src.retrieval.filters import normalize_filters
+from src.retrieval.hybrid import RETRIEVAL_MODES, fuse_hits
+from src.retrieval.positions import ChunkPositions, collapse_by_complaint, expand_neighbors
+from src.tracing import span
+from src.utils.validation import validate_question
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
@@ -23,114 +41,349 @@ class ComplaintResult:
     company: str
     similarity: float
 
-print(" RAG Pipeline for CrediTrust Complaint Analysis")
-print("="*60)
-
 class RAGSystem:
-    def __init__(self, vector_store_path="vectorstore_final/"):
+    def __init__(self, vector_store_path: Optional[str] = None,
+                 config: Optional[RetrievalConfig] = None,
+                 encoder: Optional[QueryEncoder] = None,
+                 cache_config: Optional[CacheConfig] = None,
+                 prompt_config: Optional[PromptConfig] = None):
         print(" Initializing RAG System...")
         
-        # Load vector store
-        self.client = chromadb.PersistentClient(
-            path=vector_store_path,
-            settings=Settings()
-        )
-        self.collection = self.client.get_collection("complaints_final")
+        self.config = config or RetrievalConfig.from_env()
+        if vector_store_path is not None:
+            self.config = replace(self.config, vector_store_path=vector_store_path)
+        self.cache_config = cache_config or CacheConfig.from_env()
+        
+        # Query encoder (model is loaded on first use), fronted by an
+        # embedding cache so repeated questions skip the model entirely
+        self.encoder = encoder or QueryEncoder(ModelConfig().model_name)
+        self.embedding_cache = None
+        if self.cache_config.embedding_cache_size > 0:
+            self.embedding_cache = LRUCache(
+                max_size=self.cache_config.embedding_cache_size,
+                ttl_seconds=self.cache_config.embedding_cache_ttl
+            )
+            self.encoder = CachedEncoder(self.encoder, self.embedding_cache)
+        
+        # Full answer cache, invalidated whenever the index version changes
+        self.answer_cache = None
+        self._answer_cache_version = None
+        if self.cache_config.answer_cache_size > 0:
+            self.answer_cache = LRUCache(
+                max_size=self.cache_config.answer_cache_size,
+                ttl_seconds=self.cache_config.answer_cache_ttl
+            )
+        
+        # Load retrieval backend selected in RetrievalConfig
+        self.backend = create_backend(self.config)
+        
+        # Optional BM25 index for hybrid retrieval and the lexical fallback
+        self.lexical = None
+        self._hybrid_pool = None
+        try:
+            self.lexical = LexicalSearcher.from_store(self.config.vector_store_path,
+                                                    self.config.embeddings_path)
+        except Exception as e:
+            logger.warning(f"Could not load BM25 index: {e}")
+        if self.lexical is not None:
+            self._hybrid_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="hybrid")
+        
+        # (complaint_id, chunk_index) -> chunk id, for neighbour expansion
+        self.positions = ChunkPositions.from_store(self.config.vector_store_path,
+                                                 self.config.embeddings_path)
+        
+        # Executor for CPU-bound work (encoding, search) behind the async API
+        self._cpu_pool = ThreadPoolExecutor(thread_name_prefix="rag-cpu")
         
-        print(f" Loaded vector store with {self.collection.count()} complaint chunks")
+        # Fills prompts with the best complaints up to a token budget
+        self.context_packer = ContextPacker.from_config(prompt_config)
+        
+        # Latencies of recent real retrievals, read by HealthChecker
+        self.retrieval_latency = LatencyWindow()
+        
+        # Optional micro-batching: concurrent questions share one encoder
+        # call and one index search
+        self.batcher = None
+        if self.config.batch_window_ms > 0:
+            self.batcher = MicroBatcher(self.encoder, self.backend,
+                                        window_ms=self.config.batch_window_ms,
+                                        max_batch_size=self.config.max_batch_size)
+        
+        self._register_metrics()
+        
+        print(f" Loaded {self.config.backend} vector store with {self.backend.count()} complaint chunks")
+
+    def _register_metrics(self) -> None:
+        """Expose cache and timeout-pool counters on the metrics endpoint."""
+        for name, cache in (("embedding", self.embedding_cache), ("answer", self.answer_cache)):
+            if cache is not None:
+                REGISTRY.counter_func("rag_cache_hits", lambda c=cache: c.stats()["hits"],
+                                      "Cache lookups served from cache", {"cache": name})
+                REGISTRY.counter_func("rag_cache_misses", lambda c=cache: c.stats()["misses"],
+                                      "Cache lookups that missed", {"cache": name})
+        REGISTRY.gauge("rag_timeout_pool_saturation", lambda: timeout_pool_stats()["saturation"],
+                       "In-flight share of the timeout pool's capacity")
+        REGISTRY.counter_func("rag_timeout_pool_timed_out", lambda: timeout_pool_stats()["timed_out"],
+                              "Calls abandoned by the timeout pool")
     
+    def warm_up(self, question: str = "credit card fraud") -> Dict[str, float]:
+        """Load the embedding model and touch the index before real traffic.
+
+        Bypasses the caches so nothing is stored for the warm-up question.
+        Returns the seconds spent in each step.
+        """
+        timings = {}
+        encoder = getattr(self.encoder, "encoder", self.encoder)  # unwrap CachedEncoder
+
+        start = time.perf_counter()
+        query_embeddings = encoder.encode([question])
+        timings["model_load"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        self.backend.search(query_embeddings, 1)
+        if self.lexical is not None:
+            self.lexical.search(question, 1)
+        timings["first_search"] = time.perf_counter() - start
+        return timings
+
     @timeout(seconds=15, error_message="Complaint retrieval timed out")
-    def retrieve_complaints(self, question: str, k: int = 5) -> List:
-        """Retrieve relevant complaints for a question."""
+    @timed_request("retrieve")
+    def retrieve_complaints(self, question: str, k: int = 5,
+                            filters: Optional[Dict[str, Any]] = None,
+                            mode: Optional[str] = None,
+                            neighbors: Optional[int] = None) -> List:
+        """Retrieve relevant complaints for a question.
+        
+        ``filters`` restricts the search to chunks whose metadata matches,
+        e.g. ``{"product_category": "Credit card", "state": ["CA", "NY"]}``
+        (a list means IN). Filterable fields are product, product_category,
+        company, state and issue.
+        
+        ``mode`` overrides ``RetrievalConfig.mode``: "vector", "hybrid"
+        (vector and BM25 merged with reciprocal rank fusion) or "lexical"
+        (BM25 only, no embedding model involved).
+        
+        Results are collapsed to one hit per complaint (the best-scoring
+        chunk) after over-fetching. ``neighbors`` overrides
+        ``RetrievalConfig.neighbor_window``: each hit's text then includes
+        chunks ``chunk_index ± neighbors`` of the same complaint.
+        """
+    
+        question, filters, mode = self._prepare_query(question, filters, mode)
+        return self._retrieve(question, k, filters, mode, neighbors)
+    
+    @atimeout(seconds=15, error_message="Complaint retrieval timed out")
+    async def aretrieve_complaints(self, question: str, k: int = 5,
+                                   filters: Optional[Dict[str, Any]] = None,
+                                   mode: Optional[str] = None,
+                                   neighbors: Optional[int] = None) -> List:
+        """Async ``retrieve_complaints``.
+        
+        Validation runs on the event loop; encoding and search are
+        CPU-bound and run on the system's CPU executor, so the loop stays
+        free for other requests meanwhile.
+        """
+        with timed_request("retrieve"):
+            question, filters, mode = self._prepare_query(question, filters, mode)
+            return await run_in_context(self._cpu_pool, self._retrieve, question, k, filters, mode, neighbors)
     
-        if not question or not question.strip():
-            raise ValueError("Question cannot be empty")
+    def _prepare_query(self, question: str, filters: Optional[Dict[str, Any]],
+                       mode: Optional[str]) -> Tuple[str, Any, str]:
+        # Normalise first so cache keys match across equivalent inputs
+        with timed_stage("validate"):
+            return validate_question(question), normalize_filters(filters), self._resolve_mode(mode)
     
-        print(f"\n🔍 Searching for: '{question}'")
+    def _retrieve(self, question: str, k: int, filters, mode: str,
+                  neighbors: Optional[int] = None) -> List:
+        """Search and build complaint objects; shared by the sync and async APIs."""
+        print(f"\n🔍 Searching for: '{question}' ({mode})")
+        start = time.perf_counter()
 
         try:
-            
-            results = self.collection.query(
-            query_texts=[question.strip()],
-            n_results=k,
-            include=["documents", "metadatas", "distances"]
-            )
-        
-            complaints = []
-            if results['documents'] and results['documents'][0]:
-             for i in range(len(results['documents'][0])):
-                # Create ComplaintResult object (NOT a dictionary)
-                from types import SimpleNamespace
-                
-                # Create a simple object with attributes
-                complaint = SimpleNamespace()
-                complaint.id = i + 1
-                complaint.text = results['documents'][0][i]
-                complaint.product = results['metadatas'][0][i].get('product', 'Unknown')
-                complaint.category = results['metadatas'][0][i].get('product_category', 'Unknown')
-                complaint.issue = results['metadatas'][0][i].get('issue', 'Unknown')
-                complaint.company = results['metadatas'][0][i].get('company', 'Unknown')
-                complaint.similarity = 1 - results['distances'][0][i]
-                
-                complaints.append(complaint)
+            hits = self._search(question, self._fetch_k(k), filters, mode)
+            with timed_stage("materialize"):
+                hits = self._finalize_hits(hits, k, neighbors)
+                complaints = [self._to_complaint(rank, hit) for rank, hit in enumerate(hits, 1)]
         
             print(f" Found {len(complaints)} relevant complaints")
+            self.retrieval_latency.observe((time.perf_counter() - start) * 1000)
             return complaints
        
+        except TimeoutError:
+            self.retrieval_latency.observe((time.perf_counter() - start) * 1000, ok=False)
+            count("rag_timeouts", "Requests that ran out of time", operation="retrieve")
+            raise
         except Exception as e:
              print(f" Retrieval error: {e}")
+             self.retrieval_latency.observe((time.perf_counter() - start) * 1000, ok=False)
              return []
     
+    @timeout(seconds=120, error_message="Batch complaint retrieval timed out")
+    def retrieve_complaints_batch(self, questions: List[str], k: int = 5,
+                                  filters: Optional[Dict[str, Any]] = None) -> Tuple[List[List], Dict[int, str]]:
+        """Retrieve complaints for many questions at once.
+        
+        All valid questions are embedded in one encoder call and sent to the
+        index as a single query matrix. Returns one complaint list per
+        question (empty for rejected ones) and a dict mapping the index of
+        each rejected question to its error message. ``filters`` applies to
+        every question.
+        """
+        filters = normalize_filters(filters)
+        results: List[List] = [[] for _ in questions]
+        errors: Dict[int, str] = {}
+        
+        positions = []
+        valid_questions = []
+        for i, question in enumerate(questions):
+            try:
+                valid_questions.append(validate_question(question))
+                positions.append(i)
+            except ValueError as e:
+                errors[i] = str(e)
+        
+        if not valid_questions:
+            return results, errors
+        
+        print(f"\n🔍 Batch search for {len(valid_questions)} questions")
+        
+        try:
+            with timed_stage("embed"):
+                query_embeddings = self.encoder.encode(valid_questions)
+            check_deadline("Batch complaint retrieval timed out")
+            with timed_stage("search"):
+                hit_lists = self.backend.search(query_embeddings, self._fetch_k(k), filters=filters)
+            with timed_stage("materialize"):
+                hit_lists = [self._finalize_hits(hits, k) for hits in hit_lists]
+        except TimeoutError:
+            raise
+        except Exception as e:
+            print(f" Batch retrieval error: {e}")
+            for i in positions:
+                errors[i] = f"Retrieval failed: {e}"
+            return results, errors
+        
+        for i, hits in zip(positions, hit_lists):
+            results[i] = [self._to_complaint(rank, hit) for rank, hit in enumerate(hits, 1)]
+        
+        print(f" Retrieved results for {len(positions)}/{len(questions)} questions")
+        return results, errors
+    
+    def _fetch_k(self, k: int) -> int:
+        """Chunks to fetch so ``k`` distinct complaints survive collapsing."""
+        return k * max(self.config.overfetch_factor, 1) if self.config.collapse_complaints else k
+    
+    def _finalize_hits(self, hits: List[SearchHit], k: int,
+                       neighbors: Optional[int] = None) -> List[SearchHit]:
+        """Collapse hits per complaint, then attach neighbouring chunks."""
+        if self.config.collapse_complaints:
+            hits = collapse_by_complaint(hits, k)
+        else:
+            hits = hits[:k]
+        
+        window = self.config.neighbor_window if neighbors is None else neighbors
+        if window > 0:
+            if self.positions is None:
+                logger.warning(f"No chunk position index in {self.config.vector_store_path}, "
+                               "skipping neighbour expansion")
+            else:
+                hits = expand_neighbors(hits, self.positions, self.backend, window)
+        return hits
+    
+    def _resolve_mode(self, mode: Optional[str]) -> str:
+        """Pick the retrieval mode for one request."""
+        mode = (mode or self.config.mode).lower()
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode '{mode}'. Choose one of: {', '.join(RETRIEVAL_MODES)}")
+        
+        if self.lexical is None:
+            if mode != "vector":
+                logger.warning(f"No BM25 index in {self.config.vector_store_path}, using vector retrieval")
+            return "vector"
+        
+        # Under load, skip the embedding model and serve BM25 results
+        if mode != "lexical" and timeout_pool_stats()["saturation"] >= self.config.lexical_fallback_saturation:
+            logger.warning("Timeout pool saturated, serving lexical results only")
+            count("rag_fallbacks", "Requests served by a degraded path", kind="lexical_saturation")
+            return "lexical"
+        return mode
+    
+    def _search(self, question: str, k: int, filters, mode: str) -> List[SearchHit]:
+        if mode == "lexical":
+            return self._lexical_search(question, k, filters)
+        
+        if mode == "vector":
+            try:
+                return self._vector_search(question, k, filters)
+            except TimeoutError:
+                raise
+            except Exception as e:
+                if self.lexical is None:
+                    raise
+                logger.warning(f"Vector search failed, falling back to BM25: {e}")
+                count("rag_fallbacks", "Requests served by a degraded path", kind="lexical_vector_error")
+                return self._lexical_search(question, k, filters)
+        
+        # Hybrid: BM25 runs on a helper thread while the question is
+        # embedded; both sides fetch deeper lists so fusion can rerank
+        depth = k * 4
+        lexical = self._hybrid_pool.submit(copy_context().run, self._lexical_search, question, depth, filters)
+        try:
+            vector_hits = self._vector_search(question, depth, filters)
+        except TimeoutError:
+            raise
+        except Exception as e:
+            logger.warning(f"Vector search failed, using BM25 results only: {e}")
+            count("rag_fallbacks", "Requests served by a degraded path", kind="hybrid_vector_error")
+            return lexical.result()[:k]
+        
+        lexical_hits = lexical.result()
+        check_deadline("Complaint retrieval timed out")
+        with timed_stage("fuse"):
+            return fuse_hits([vector_hits, lexical_hits], k, self.config.rrf_k)
+    
+    def _vector_search(self, question: str, k: int, filters) -> List[SearchHit]:
+        if self.batcher is not None:
+            # Encoding and search run on the dispatcher thread, outside this trace
+            with span("batched_search"):
+                return self.batcher.search(question, k, filters)
+        with timed_stage("embed"):
+            query_embeddings = self.encoder.encode([question])
+        check_deadline("Complaint retrieval timed out")
+        with timed_stage("search"):
+            return self.backend.search(query_embeddings, k, filters=filters)[0]
+    
+    def _lexical_search(self, question: str, k: int, filters) -> List[SearchHit]:
+        """BM25 hits, with similarity scaled so the best match is 1.0."""
+        with timed_stage("lexical_search"):
+            scored = self.lexical.search(question, k, filters)
+        if not scored:
+            return []
+        top_score = scored[0][1] or 1.0
+        scores = dict(scored)
+        hits = self.backend.get([doc_id for doc_id, _ in scored])
+        return [replace(hit, similarity=scores[hit.id] / top_score) for hit in hits]
+    
+    @staticmethod
+    def _to_complaint(rank: int, hit: SearchHit) -> SimpleNamespace:
+        """Convert a backend hit into the complaint object used by the UI."""
+        complaint = SimpleNamespace()
+        complaint.id = rank
+        complaint.complaint_id = hit.metadata.get('complaint_id')
+        complaint.text = hit.document
+        complaint.product = hit.metadata.get('product', 'Unknown')
+        complaint.category = hit.metadata.get('product_category', 'Unknown')
+        complaint.issue = hit.metadata.get('issue', 'Unknown')
+        complaint.company = hit.metadata.get('company', 'Unknown')
+        complaint.similarity = hit.similarity
+        return complaint
+    
+    @timed_stage("prompt")
     def create_prompt(self, question, complaints):
-        """Create a prompt for the LLM"""
-
-        if not complaints:
-           return f"Question: {question}\n\nNo relevant complaints found."
-
-        context = "RELEVANT CUSTOMER COMPLAINTS:\n"
-
-        for comp in complaints:
-
-          # Support dict (tests) and object (runtime)
-          if isinstance(comp, dict):
-            comp_id = comp.get("id")
-            product = comp.get("product")
-            company = comp.get("company")
-            similarity = comp.get("similarity", 0)
-            issue = comp.get("issue", "Unknown")
-            text = comp.get("text", "")
-          else:
-            comp_id = comp.id
-            product = comp.product
-            company = comp.company
-            similarity = comp.similarity
-            issue = comp.issue
-            text = comp.text
-
-          context += f"\n[Complaint #{comp_id} - {product} - {company}]\n"
-          context += f"Similarity: {similarity:.2f}\n"
-          context += f"Issue: {issue}\n"
-          context += f"Text: {text[:300]}...\n"
-
-        prompt = f"""You are a helpful financial analyst assistant at CrediTrust Financial.
-
-{context}
-
-USER QUESTION: {question}
-
-INSTRUCTIONS:
-1. Analyze the complaints above
-2. Summarize the main issues mentioned
-3. Group similar complaints together
-4. Mention which financial products and companies are affected
-5. Base your answer ONLY on the provided complaints
-6. Be specific and actionable
-
-ANALYSIS AND ANSWER:
-"""
-
-        return prompt
+        """Create a prompt for the LLM within the ``PromptConfig`` token budget"""
+        return self.context_packer.build_prompt(question, complaints)
     
+    @timed_stage("generate")
     def generate_answer(self, prompt, complaints):
         """Generate answer using simulated LLM"""
         print(" Generating analysis...")
@@ -216,23 +469,98 @@ ANALYSIS AND ANSWER:
 
 **Strategic Recommendation**: Implement standardized security protocols and fee transparency measures across all financial products."""
     
+    def _answer_cache_key(self, question: str, k: int,
+                          filters: Optional[Dict[str, Any]] = None) -> Optional[Tuple]:
+        """Cache key for a full answer, or None when the cache is disabled."""
+        if self.answer_cache is None:
+            return None
+        
+        version = self.backend.index_version()
+        if version != self._answer_cache_version:
+            # Index was rebuilt: every cached answer is stale
+            self.answer_cache.clear()
+            self._answer_cache_version = version
+        
+        return (validate_question(question), k, normalize_filters(filters), version)
+    
     @timeout(seconds=30, error_message="Answer generation timed out")
-    def answer_question(self, question):
-        """Complete RAG pipeline for one question"""
+    @timed_request("answer")
+    def answer_question(self, question, k: int = 3, filters: Optional[Dict[str, Any]] = None,
+                        return_metadata: bool = False):
+        """Complete RAG pipeline for one question.
+        
+        With ``return_metadata=True`` a third element is returned with
+        cache-hit information for monitoring.
+        """
+        cache_key, cached = self._start_answer(question, k, filters)
+        
+        if cached is not None:
+            answer, complaints = cached
+        else:
+            # Step 1: Retrieve relevant complaints
+            complaints = self.retrieve_complaints(question, k=k, filters=filters)
+        
+            # Step 2: Create prompt
+            check_deadline("Answer generation timed out")
+            prompt = self.create_prompt(question, complaints)
+        
+            # Step 3: Generate answer - PASS COMPLAINTS
+            answer = self.generate_answer(prompt, complaints)  # <-- ADD complaints parameter
+            self._store_answer(cache_key, answer, complaints)
+        
+        return self._finish_answer(answer, complaints, cache_key, cached is not None, return_metadata)
+    
+    @atimeout(seconds=30, error_message="Answer generation timed out")
+    async def aanswer_question(self, question, k: int = 3, filters: Optional[Dict[str, Any]] = None,
+                               return_metadata: bool = False):
+        """Async ``answer_question`` for event-loop servers.
+        
+        Retrieval runs on the CPU executor and generation is awaited, so
+        an in-flight question holds no thread while it waits.
+        """
+        with timed_request("answer"):
+            cache_key, cached = self._start_answer(question, k, filters)
+            
+            if cached is not None:
+                answer, complaints = cached
+            else:
+                complaints = await self.aretrieve_complaints(question, k=k, filters=filters)
+                check_deadline("Answer generation timed out")
+                prompt = self.create_prompt(question, complaints)
+                answer = await self.agenerate_answer(prompt, complaints)
+                self._store_answer(cache_key, answer, complaints)
+            
+            return self._finish_answer(answer, complaints, cache_key, cached is not None, return_metadata)
+    
+    async def agenerate_answer(self, prompt, complaints):
+        """Async generation hook.
+        
+        The simulated LLM is a few string operations, so it runs inline.
+        A real LLM client should be awaited here (e.g. an async HTTP call)
+        rather than wrapped in a thread.
+        """
+        return self.generate_answer(prompt, complaints)
+    
+    def _start_answer(self, question, k: int, filters) -> Tuple[Optional[Tuple], Any]:
+        """Log the question and look it up in the answer cache."""
         print("\n" + "="*60)
         print(f" QUESTION: {question}")
         print("="*60)
+        
+        cache_key = self._answer_cache_key(question, k, filters)
+        cached = self.answer_cache.get(cache_key) if cache_key else None
+        if cached is not None:
+            print(" Served from answer cache")
+        return cache_key, cached
     
-        # Step 1: Retrieve relevant complaints
-        complaints = self.retrieve_complaints(question, k=3)
-    
-        # Step 2: Create prompt
-        prompt = self.create_prompt(question, complaints)
+    def _store_answer(self, cache_key: Optional[Tuple], answer: str, complaints: List) -> None:
+        # Empty retrievals may be transient failures, so don't cache them
+        if cache_key and complaints:
+            self.answer_cache.set(cache_key, (answer, complaints))
     
-        # Step 3: Generate answer - PASS COMPLAINTS
-        answer = self.generate_answer(prompt, complaints)  # <-- ADD complaints parameter
-        
-        # Step 4: Display results
+    def _finish_answer(self, answer: str, complaints: List, cache_key: Optional[Tuple],
+                       cache_hit: bool, return_metadata: bool):
+        """Print the answer and its sources and build the return value."""
         print(f"\n GENERATED ANSWER:")
         print("-" * 40)
         print(answer)
@@ -245,15 +573,45 @@ ANALYSIS AND ANSWER:
             # Use dot notation (comp.product) not dictionary notation (comp['product'])
             print(f"{i}. [{comp.product}] {comp.company} - Similarity: {comp.similarity:.2f}")
             print(f"   {comp.text[:80]}...")
+        
+        if return_metadata:
+            metadata = {
+                "cache_hit": cache_hit,
+                "index_version": cache_key[-1] if cache_key else None,
+                "answer_cache": self.answer_cache.stats() if self.answer_cache else None
+            }
+            return answer, complaints, metadata
     
         return answer, complaints
     
+    @timeout(seconds=300, error_message="Batch answer generation timed out")
+    def answer_question_batch(self, questions: List[str], k: int = 3,
+                              filters: Optional[Dict[str, Any]] = None) -> Tuple[List[Tuple[Optional[str], List]], Dict[int, str]]:
+        """Batch form of ``answer_question`` sharing one retrieval pass.
+        
+        Returns one ``(answer, complaints)`` pair per question and the
+        per-question errors; rejected questions get ``(None, [])``.
+        """
+        complaint_lists, errors = self.retrieve_complaints_batch(questions, k=k, filters=filters)
+        
+        answers: List[Tuple[Optional[str], List]] = []
+        for i, (question, complaints) in enumerate(zip(questions, complaint_lists)):
+            if i in errors:
+                answers.append((None, []))
+                continue
+            check_deadline("Batch answer generation timed out")
+            prompt = self.create_prompt(question, complaints)
+            answers.append((self.generate_answer(prompt, complaints), complaints))
+        
+        return answers, errors
+    
     def safe_retrieve_complaints(self, question: str, k: int = 5) -> List:
         """Retrieve complaints with graceful degradation."""
         try:
            return self.retrieve_complaints(question, k)
         except TimeoutError as e:
            logger.error(f"Retrieval timeout: {e}")
+           count("rag_fallbacks", "Requests served by a degraded path", kind="static_complaints")
            return self._get_fallback_complaints(question)
         except Exception as e:
            logger.error(f"Retrieval failed: {e}")
@@ -262,8 +620,6 @@ ANALYSIS AND ANSWER:
     def _get_fallback_complaints(self, question: str) -> List:
         """Return fallback complaints when retrieval fails."""
         # Create a simple fallback complaint
-        from types import SimpleNamespace
-    
         fallback = SimpleNamespace()
         fallback.id = 1
         fallback.text = "Customer reported issues with financial services."
@@ -277,6 +633,8 @@ ANALYSIS AND ANSWER:
 
 # Test the system
 if __name__ == "__main__":
+    print(" RAG Pipeline for CrediTrust Complaint Analysis")
+    print("="*60)
     print("\n STARTING RAG PIPELINE DEMONSTRATION")
     print("="*60)
     
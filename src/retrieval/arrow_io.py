@@ -0,0 +1,78 @@
+"""Column-wise helpers for reading the complaint embeddings parquet."""
+
+from typing import Any, Dict, List
+import logging
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+logger = logging.getLogger(__name__)
+
+# Metadata keys stored with every chunk, with the default used when missing.
+METADATA_FIELDS: Dict[str, Any] = {
+    'product_category': '',
+    'product': '',
+    'issue': '',
+    'sub_issue': '',
+    'company': '',
+    'state': '',
+    'complaint_id': '',
+    'chunk_index': 0,
+    'total_chunks': 1,
+}
+
+def _combine(column) -> pa.Array:
+    if isinstance(column, pa.ChunkedArray):
+        return column.combine_chunks()
+    return column
+
+def embedding_matrix(column) -> np.ndarray:
+    """Convert a list<float> Arrow column into an (n, dim) float32 matrix.
+
+    The values buffer is read in one go instead of calling ``.tolist()``
+    on every row.
+    """
+    array = _combine(column)
+    n = len(array)
+    if n == 0:
+        return np.empty((0, 0), dtype=np.float32)
+
+    lengths = pc.list_value_length(array)
+    min_max = pc.min_max(lengths)
+    dim = min_max['min'].as_py()
+    if dim != min_max['max'].as_py():
+        raise ValueError("Embeddings must all have the same dimension")
+
+    values = array.flatten().to_numpy(zero_copy_only=False)
+    return values.reshape(n, dim).astype(np.float32, copy=False)
+
+def metadata_columns(column) -> Dict[str, List[Any]]:
+    """Extract every known metadata field as a Python list, nulls defaulted."""
+    array = _combine(column)
+
+    if not pa.types.is_struct(array.type):
+        # Fall back for stores that serialised metadata as maps or objects
+        rows = [dict(row or {}) for row in array.to_pylist()]
+        return {
+            key: [default if row.get(key) is None else row[key] for row in rows]
+            for key, default in METADATA_FIELDS.items()
+        }
+
+    children = dict(zip((f.name for f in array.type), array.flatten()))
+    columns = {}
+    for key, default in METADATA_FIELDS.items():
+        child = children.get(key)
+        if child is None:
+            columns[key] = [default] * len(array)
+            continue
+        if isinstance(default, str) and not pa.types.is_string(child.type):
+            child = pc.cast(child, pa.string())
+        columns[key] = pc.fill_null(child, default).to_pylist()
+    return columns
+
+def metadata_records(column) -> List[Dict[str, Any]]:
+    """Build the per-chunk metadata dicts that the vector stores expect."""
+    columns = metadata_columns(column)
+    keys = list(columns)
+    return [dict(zip(keys, values)) for values in zip(*columns.values())]
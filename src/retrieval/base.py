@@ -0,0 +1,81 @@
+"""Retrieval backend interface shared by all vector stores."""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+import logging
+
+import numpy as np
+
+from src.retrieval.filters import Filters
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class SearchHit:
+    """One scored chunk returned by a retrieval backend."""
+    id: str
+    document: str
+    metadata: Dict[str, Any]
+    similarity: float
+
+class RetrievalBackend:
+    """Base class for pluggable vector search backends.
+
+    Backends receive query embeddings that are already computed by
+    ``RAGSystem`` and return one ranked list of hits per query row.
+    """
+
+    name = "base"
+
+    def count(self) -> int:
+        """Number of chunks available for search."""
+        raise NotImplementedError
+
+    def search(self, query_embeddings: np.ndarray, k: int,
+               filters: Optional[Filters] = None) -> List[List[SearchHit]]:
+        """Return the top ``k`` hits for every row of ``query_embeddings``.
+
+        ``filters`` are normalised metadata filters (see
+        ``src.retrieval.filters.normalize_filters``); only matching chunks
+        are scored.
+        """
+        raise NotImplementedError
+
+    def get(self, ids: List[str]) -> List[SearchHit]:
+        """Fetch chunks by id in the given order, skipping unknown ids.
+
+        Used to materialise hits found by the lexical index; ``similarity``
+        is left at 0.0 for the caller to fill in.
+        """
+        raise NotImplementedError
+
+    def index_version(self) -> str:
+        """Fingerprint that changes whenever the underlying index is rebuilt."""
+        raise NotImplementedError
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """Return a C-contiguous float32 copy of ``matrix`` with unit-length rows."""
+    matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the ``k`` highest scores per row, best first.
+
+    Uses ``argpartition`` so only the selected candidates are sorted.
+    """
+    scores = np.atleast_2d(scores)
+    n = scores.shape[1]
+    k = min(k, n)
+    if k <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.int64)
+    if k < n:
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.tile(np.arange(n), (scores.shape[0], 1))
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-candidate_scores, axis=1, kind="stable")
+    return np.take_along_axis(candidates, order, axis=1)
@@ -0,0 +1,166 @@
+"""Micro-batching of concurrent vector searches."""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+import logging
+
+from src.metrics import Histogram, timed_stage
+from src.middleware.timeout import TimeoutError, remaining_time
+from src.retrieval.base import RetrievalBackend, SearchHit
+from src.retrieval.filters import Filters
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+@dataclass
+class _Request:
+    question: str
+    k: int
+    filters: Optional[Filters]
+    deadline: Optional[float]
+    enqueued_at: float = field(default_factory=time.monotonic)
+    future: Future = field(default_factory=Future)
+
+class MicroBatcher:
+    """Coalesces concurrent single-question searches into batched calls.
+
+    Callers block in ``search`` while a dispatcher thread collects requests
+    for up to ``window_ms`` after the first one arrives (or until
+    ``max_batch_size`` are waiting). The batch is embedded in one encoder
+    call and each group of requests sharing the same filters is searched
+    as one query matrix, with the deepest ``k`` in the group; every caller
+    then gets its own hits back.
+
+    Queue wait (ms) and batch size are recorded as histograms, see
+    ``stats()``, so the window can be tuned against real traffic.
+    """
+
+    def __init__(self, encoder, backend: RetrievalBackend,
+                 window_ms: float = 5.0, max_batch_size: int = 32):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.encoder = encoder
+        self.backend = backend
+        self.window = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.queue_wait_ms = Histogram()
+        self.batch_size = Histogram(BATCH_SIZE_BUCKETS)
+        self.expired = 0
+        self._queue: "queue.Queue[Optional[_Request]]" = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def search(self, question: str, k: int, filters: Optional[Filters] = None) -> List[SearchHit]:
+        """Vector hits for one question, searched together with concurrent callers."""
+        if self._closed:
+            raise RuntimeError("MicroBatcher is closed")
+        remaining = remaining_time()
+        deadline = time.monotonic() + remaining if remaining is not None else None
+        request = _Request(question, k, filters, deadline)
+        self._queue.put(request)
+
+        try:
+            return request.future.result(timeout=remaining)
+        except FutureTimeoutError:
+            request.future.cancel()
+            raise TimeoutError("Complaint retrieval timed out") from None
+
+    def close(self) -> None:
+        """Stop the dispatcher once queued requests are served."""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._thread.join()
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue-wait and batch-size distributions for tuning the window."""
+        return {
+            "window_ms": self.window * 1000,
+            "max_batch_size": self.max_batch_size,
+            "queue_wait_ms": self.queue_wait_ms.snapshot(),
+            "batch_size": self.batch_size.snapshot(),
+            "expired": self.expired
+        }
+
+    def _collect(self, first: _Request) -> List[_Request]:
+        batch = [first]
+        flush_at = time.monotonic() + self.window
+        while len(batch) < self.max_batch_size:
+            wait = flush_at - time.monotonic()
+            if wait <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=wait)
+            except queue.Empty:
+                break
+            if request is None:
+                # close() was called: serve what we have, then stop
+                self._queue.put(None)
+                break
+            batch.append(request)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = self._collect(first)
+            try:
+                self._dispatch(batch)
+            except Exception as e:  # never let the dispatcher thread die
+                logger.exception(f"Micro-batch failed: {e}")
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+
+    def _dispatch(self, batch: List[_Request]) -> None:
+        now = time.monotonic()
+        live = []
+        for request in batch:
+            self.queue_wait_ms.observe((now - request.enqueued_at) * 1000)
+            # Skip callers that already gave up or whose deadline passed
+            if not request.future.set_running_or_notify_cancel():
+                continue
+            if request.deadline is not None and request.deadline <= now:
+                self.expired += 1
+                request.future.set_exception(TimeoutError("Complaint retrieval timed out"))
+                continue
+            live.append(request)
+        if not live:
+            return
+        self.batch_size.observe(len(live))
+
+        questions = list(dict.fromkeys(r.question for r in live))
+        try:
+            with timed_stage("embed"):
+                embeddings = self.encoder.encode(questions)
+        except Exception as e:
+            for request in live:
+                request.future.set_exception(e)
+            return
+        row_of = {question: row for row, question in enumerate(questions)}
+
+        groups: Dict[Optional[Filters], List[_Request]] = {}
+        for request in live:
+            groups.setdefault(request.filters, []).append(request)
+
+        for filters, requests in groups.items():
+            try:
+                rows = [row_of[r.question] for r in requests]
+                with timed_stage("search"):
+                    hit_lists = self.backend.search(
+                        embeddings[rows], max(r.k for r in requests), filters=filters
+                    )
+            except Exception as e:
+                for request in requests:
+                    request.future.set_exception(e)
+                continue
+            for request, hits in zip(requests, hit_lists):
+                request.future.set_result(hits[:request.k])
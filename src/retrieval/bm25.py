@@ -0,0 +1,202 @@
+"""Compact BM25 lexical index over complaint documents."""
+
+import os
+import re
+from array import array
+from collections import Counter
+from typing import Iterable, List, Optional, Tuple
+import logging
+
+import numpy as np
+
+from src.retrieval.base import top_k_indices
+from src.retrieval.filters import FILTER_INDEX_FILE, Filters, InvertedIndex
+from src.retrieval.index_version import file_fingerprint
+
+logger = logging.getLogger(__name__)
+
+BM25_INDEX_FILE = "bm25_index.npz"
+
+MAX_TOKEN_LENGTH = 32
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be been but by for from had has have i in is it its me my "
+    "of on or our so that the their them they this to was we were what when which "
+    "who will with you your xx xxxx".split()
+)
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase alphanumeric tokens without stopwords or overlong tokens."""
+    return [
+        token for token in _TOKEN_RE.findall(text.lower())
+        if token not in _STOPWORDS and len(token) <= MAX_TOKEN_LENGTH
+    ]
+
+class BM25Index:
+    """Okapi BM25 with postings stored as flat integer arrays.
+
+    ``terms`` is a sorted array looked up with ``searchsorted`` (no Python
+    dict to rebuild at load time); ``offsets`` slices ``doc_ids``/``tfs``
+    per term, CSR style. Row ``i`` is parquet row ``i`` and ``ids[i]`` is
+    its chunk id.
+    """
+
+    def __init__(self, terms: np.ndarray, offsets: np.ndarray, doc_ids: np.ndarray,
+                 tfs: np.ndarray, doc_lengths: np.ndarray, ids: np.ndarray,
+                 k1: float = 1.5, b: float = 0.75):
+        self.terms = terms
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.tfs = tfs
+        self.doc_lengths = doc_lengths
+        self.ids = ids
+        self.k1 = k1
+        self.b = b
+        self.num_docs = len(doc_lengths)
+        avg_length = float(doc_lengths.mean()) if self.num_docs else 1.0
+        # Per-document BM25 length normalisation, precomputed once
+        self._length_norm = (k1 * (1 - b + b * doc_lengths / max(avg_length, 1e-9))).astype(np.float32)
+
+    @classmethod
+    def build(cls, rows: Iterable[Tuple[str, str]]) -> "BM25Index":
+        """Build from ``(id, document)`` pairs in row order."""
+        vocabulary = {}
+        term_ids = array('i')
+        doc_ids = array('i')
+        tfs = array('i')
+        doc_lengths = array('i')
+        ids = []
+
+        for row, (doc_id, document) in enumerate(rows):
+            tokens = tokenize(document or "")
+            ids.append(doc_id)
+            doc_lengths.append(len(tokens))
+            for token, count in Counter(tokens).items():
+                term_ids.append(vocabulary.setdefault(token, len(vocabulary)))
+                doc_ids.append(row)
+                tfs.append(count)
+
+        term_ids = np.frombuffer(term_ids, dtype=np.int32)
+        terms = np.array(list(vocabulary), dtype=str)
+
+        # Renumber terms alphabetically, then group postings by term
+        order = np.argsort(terms, kind="stable")
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        term_ids = rank[term_ids]
+        grouping = np.argsort(term_ids, kind="stable")
+
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_ids, minlength=len(terms)), out=offsets[1:])
+
+        return cls(
+            terms=terms[order],
+            offsets=offsets,
+            doc_ids=np.frombuffer(doc_ids, dtype=np.int32)[grouping],
+            tfs=np.minimum(np.frombuffer(tfs, dtype=np.int32)[grouping], 65535).astype(np.uint16),
+            doc_lengths=np.frombuffer(doc_lengths, dtype=np.int32).copy(),
+            ids=np.array(ids, dtype=str)
+        )
+
+    def _postings(self, token: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        position = int(np.searchsorted(self.terms, token))
+        if position >= len(self.terms) or self.terms[position] != token:
+            return None
+        start, end = self.offsets[position], self.offsets[position + 1]
+        return self.doc_ids[start:end], self.tfs[start:end]
+
+    def search(self, query: str, k: int,
+               allowed_rows: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """Top ``k`` ``(row, score)`` pairs, optionally restricted to ``allowed_rows``.
+
+        Scores are summed over the union of the query terms' postings, so
+        the work scales with the matching rows, not the corpus.
+        """
+        touched = []
+        contributions = []
+        for token in set(tokenize(query)):
+            postings = self._postings(token)
+            if postings is None:
+                continue
+            docs, tfs = postings
+            df = len(docs)
+            idf = np.log(1 + (self.num_docs - df + 0.5) / (df + 0.5))
+            tf = tfs.astype(np.float32)
+            touched.append(docs)
+            contributions.append(idf * tf * (self.k1 + 1) / (tf + self._length_norm[docs]))
+
+        if not touched:
+            return []
+        candidates, slots = np.unique(np.concatenate(touched), return_inverse=True)
+        scores = np.bincount(slots, weights=np.concatenate(contributions), minlength=len(candidates))
+        if allowed_rows is not None:
+            keep = np.isin(candidates, allowed_rows, assume_unique=True)
+            candidates, scores = candidates[keep], scores[keep]
+            if len(candidates) == 0:
+                return []
+
+        top = top_k_indices(scores, k)[0]
+        return [(int(candidates[i]), float(scores[i])) for i in top]
+
+    def save(self, path: str, source_fingerprint: str = "") -> None:
+        np.savez(
+            path,
+            terms=self.terms, offsets=self.offsets, doc_ids=self.doc_ids, tfs=self.tfs,
+            doc_lengths=self.doc_lengths, ids=self.ids,
+            source_fingerprint=np.array(source_fingerprint)
+        )
+
+    @classmethod
+    def load(cls, path: str) -> Tuple["BM25Index", str]:
+        """Load a saved index and the fingerprint of the parquet it came from."""
+        with np.load(path, allow_pickle=False) as data:
+            index = cls(
+                terms=data["terms"], offsets=data["offsets"], doc_ids=data["doc_ids"],
+                tfs=data["tfs"], doc_lengths=data["doc_lengths"], ids=data["ids"]
+            )
+            return index, str(data["source_fingerprint"])
+
+class LexicalSearcher:
+    """BM25 search plus metadata filtering over the same parquet rows."""
+
+    def __init__(self, bm25: BM25Index, filter_index: Optional[InvertedIndex] = None):
+        self.bm25 = bm25
+        self.filter_index = filter_index
+
+    @classmethod
+    def from_store(cls, store_path: str, source_path: Optional[str] = None) -> Optional["LexicalSearcher"]:
+        """Load the indexes ``build_vectorstore`` wrote, or None if absent.
+
+        Both indexes map parquet rows to chunk ids. If ``source_path``
+        exists and either index was built from a different version of it,
+        None is returned rather than serving stale rows.
+        """
+        bm25_path = os.path.join(store_path, BM25_INDEX_FILE)
+        if not os.path.exists(bm25_path):
+            return None
+
+        current = file_fingerprint(source_path) if source_path and os.path.exists(source_path) else None
+        bm25, fingerprint = BM25Index.load(bm25_path)
+        if current is not None and fingerprint != current:
+            logger.warning(f"BM25 index {bm25_path} is stale, rebuild it with build_vectorstore")
+            return None
+
+        filter_index = None
+        filter_path = os.path.join(store_path, FILTER_INDEX_FILE)
+        if os.path.exists(filter_path):
+            filter_index, fingerprint = InvertedIndex.load(filter_path)
+            if current is not None and fingerprint != current:
+                logger.warning(f"Filter index {filter_path} is stale, rebuild it with build_vectorstore")
+                return None
+        logger.info(f"Loaded BM25 index with {len(bm25.terms)} terms over {bm25.num_docs} chunks")
+        return cls(bm25, filter_index)
+
+    def search(self, query: str, k: int, filters: Optional[Filters] = None) -> List[Tuple[str, float]]:
+        """Top ``k`` ``(chunk id, bm25 score)`` pairs."""
+        allowed_rows = None
+        if filters:
+            if self.filter_index is None:
+                raise ValueError("Lexical search with filters needs filter_index.npz")
+            allowed_rows = self.filter_index.resolve(filters)
+        return [(str(self.bm25.ids[row]), score)
+                for row, score in self.bm25.search(query, k, allowed_rows)]
@@ -0,0 +1,72 @@
+"""ChromaDB retrieval backend (persistent HNSW collection)."""
+
+import os
+from typing import List, Optional
+import logging
+
+import numpy as np
+
+from src.retrieval.base import RetrievalBackend, SearchHit
+from src.retrieval.filters import Filters, to_chroma_where
+from src.retrieval.index_version import file_fingerprint, read_index_version
+
+logger = logging.getLogger(__name__)
+
+class ChromaBackend(RetrievalBackend):
+    """Search a persisted Chroma collection with precomputed query embeddings."""
+
+    name = "chroma"
+
+    def __init__(self, path: str = "vectorstore_final/", collection_name: str = "complaints_final"):
+        import chromadb
+        from chromadb.config import Settings
+
+        self.path = path
+        self.client = chromadb.PersistentClient(
+            path=path,
+            settings=Settings()
+        )
+        self.collection = self.client.get_collection(collection_name)
+
+    def count(self) -> int:
+        return self.collection.count()
+
+    def index_version(self) -> str:
+        version = read_index_version(self.path)
+        if version is None:
+            # Stores built before versioning: fall back to the SQLite file
+            version = file_fingerprint(os.path.join(self.path, "chroma.sqlite3"))
+        return version
+
+    def search(self, query_embeddings: np.ndarray, k: int,
+               filters: Optional[Filters] = None) -> List[List[SearchHit]]:
+        # Chroma applies the where clause before the vector search
+        results = self.collection.query(
+            query_embeddings=np.atleast_2d(query_embeddings).tolist(),
+            n_results=k,
+            where=to_chroma_where(filters),
+            include=["documents", "metadatas", "distances"]
+        )
+
+        batches = []
+        for q in range(len(results['ids'])):
+            hits = []
+            for i, doc_id in enumerate(results['ids'][q]):
+                hits.append(SearchHit(
+                    id=doc_id,
+                    document=results['documents'][q][i],
+                    metadata=results['metadatas'][q][i] or {},
+                    similarity=1 - results['distances'][q][i]
+                ))
+            batches.append(hits)
+        return batches
+
+    def get(self, ids: List[str]) -> List[SearchHit]:
+        if not ids:
+            return []
+        results = self.collection.get(ids=list(ids), include=["documents", "metadatas"])
+        found = {
+            doc_id: SearchHit(id=doc_id, document=document, metadata=metadata or {}, similarity=0.0)
+            for doc_id, document, metadata in zip(results['ids'], results['documents'], results['metadatas'])
+        }
+        return [found[doc_id] for doc_id in ids if doc_id in found]
@@ -0,0 +1,75 @@
+"""Query encoder used to embed questions before vector search."""
+
+import threading
+from typing import List, Optional
+import logging
+
+import numpy as np
+
+from src.cache import LRUCache
+from src.config import ModelConfig
+
+logger = logging.getLogger(__name__)
+
+class QueryEncoder:
+    """Sentence-transformer wrapper that loads the model on first use."""
+
+    def __init__(self, model_name: str = ModelConfig.model_name, batch_size: int = 64):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _get_model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from sentence_transformers import SentenceTransformer
+                    logger.info(f"Loading embedding model {self.model_name}")
+                    self._model = SentenceTransformer(self.model_name)
+        return self._model
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Embed ``texts`` in one batched forward pass, L2-normalised."""
+        embeddings = self._get_model().encode(
+            list(texts),
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
+        return np.asarray(embeddings, dtype=np.float32)
+
+class CachedEncoder:
+    """Encoder wrapper that serves repeated questions from an LRU cache.
+    
+    Entries are keyed by ``(model_name, text)`` so switching models never
+    returns stale vectors. Only cache misses reach the wrapped encoder, and
+    they are embedded together in a single call.
+    """
+
+    def __init__(self, encoder, cache: LRUCache):
+        self.encoder = encoder
+        self.cache = cache
+        self.model_name = getattr(encoder, "model_name", type(encoder).__name__)
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        texts = list(texts)
+        vectors: List[Optional[np.ndarray]] = [
+            self.cache.get((self.model_name, text)) for text in texts
+        ]
+
+        missing = list(dict.fromkeys(t for t, v in zip(texts, vectors) if v is None))
+        if missing:
+            encoded = np.asarray(self.encoder.encode(missing), dtype=np.float32)
+            fresh = {}
+            for text, vector in zip(missing, encoded):
+                vector = vector.copy()
+                vector.setflags(write=False)
+                self.cache.set((self.model_name, text), vector)
+                fresh[text] = vector
+            vectors = [fresh[t] if v is None else v for t, v in zip(texts, vectors)]
+
+        if not vectors:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.stack(vectors)
@@ -0,0 +1,50 @@
+"""Select the retrieval backend named in ``RetrievalConfig``."""
+
+from typing import Callable, Dict
+import logging
+
+from src.config import RetrievalConfig
+from src.retrieval.base import RetrievalBackend
+
+logger = logging.getLogger(__name__)
+
+def _chroma(config: RetrievalConfig) -> RetrievalBackend:
+    from src.retrieval.chroma_backend import ChromaBackend
+    return ChromaBackend(config.vector_store_path, config.collection_name)
+
+def _numpy(config: RetrievalConfig) -> RetrievalBackend:
+    if config.quantization:
+        from src.retrieval.quantized import QuantizedNumpyBackend
+        return QuantizedNumpyBackend.from_store(
+            config.embeddings_path, config.vector_store_path, config.quantization,
+            rescore_factor=config.rescore_factor
+        )
+    from src.retrieval.numpy_backend import NumpyBackend
+    return NumpyBackend.from_parquet(config.embeddings_path, index_dir=config.vector_store_path)
+
+def _ivf(config: RetrievalConfig) -> RetrievalBackend:
+    from src.retrieval.ivf_backend import IVFBackend
+    return IVFBackend.from_store(config.embeddings_path, config.vector_store_path, nprobe=config.nprobe)
+
+def _sharded(config: RetrievalConfig) -> RetrievalBackend:
+    from src.retrieval.sharded_backend import ShardedBackend
+    return ShardedBackend.from_store(config)
+
+BACKENDS: Dict[str, Callable[[RetrievalConfig], RetrievalBackend]] = {
+    "chroma": _chroma,
+    "numpy": _numpy,
+    "ivf": _ivf,
+    "sharded": _sharded,
+}
+
+def create_backend(config: RetrievalConfig) -> RetrievalBackend:
+    """Instantiate the backend selected by ``config.backend``."""
+    try:
+        factory = BACKENDS[config.backend]
+    except KeyError:
+        raise ValueError(
+            f"Unknown retrieval backend '{config.backend}'. "
+            f"Choose one of: {', '.join(sorted(BACKENDS))}"
+        )
+    logger.info(f"Using '{config.backend}' retrieval backend")
+    return factory(config)
@@ -0,0 +1,154 @@
+"""Metadata filters and the inverted index used to resolve them."""
+
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+import pyarrow as pa
+
+logger = logging.getLogger(__name__)
+
+FILTERABLE_FIELDS = ('product', 'product_category', 'company', 'state', 'issue')
+
+FILTER_INDEX_FILE = "filter_index.npz"
+
+# Normalised filters: sorted ((field, (value, ...)), ...), hashable for cache keys
+Filters = Tuple[Tuple[str, Tuple[str, ...]], ...]
+
+def normalize_filters(filters: Optional[Dict[str, Any]]) -> Optional[Filters]:
+    """Validate ``{field: value}`` / ``{field: [values]}`` filters.
+
+    A scalar means equality and a list, tuple or set means IN. Returns
+    None when there is nothing to filter on.
+    """
+    if not filters:
+        return None
+
+    normalized = []
+    for field, value in filters.items():
+        if field not in FILTERABLE_FIELDS:
+            raise ValueError(
+                f"Cannot filter on '{field}'. Filterable fields: {', '.join(FILTERABLE_FIELDS)}"
+            )
+        values = value if isinstance(value, (list, tuple, set, frozenset)) else [value]
+        values = tuple(sorted({str(v) for v in values}))
+        if not values:
+            raise ValueError(f"Filter on '{field}' needs at least one value")
+        normalized.append((field, values))
+    return tuple(sorted(normalized))
+
+def to_chroma_where(filters: Optional[Filters]) -> Optional[Dict[str, Any]]:
+    """Translate normalised filters into a Chroma ``where`` clause."""
+    if not filters:
+        return None
+    clauses = [
+        {field: values[0]} if len(values) == 1 else {field: {"$in": list(values)}}
+        for field, values in filters
+    ]
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+class InvertedIndex:
+    """Maps each metadata value to the row ids that carry it.
+
+    Postings are stored CSR-style per field: ``values`` (sorted distinct
+    values), ``offsets`` and ``rows`` (row ids grouped by value), so even
+    high-cardinality fields like ``company`` stay compact. Filters are
+    resolved by OR-ing postings into a row bitmap per field and AND-ing
+    the bitmaps across fields.
+    """
+
+    def __init__(self, num_rows: int, postings: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]]):
+        self.num_rows = num_rows
+        self.postings = postings
+        self._lookup = {
+            field: {value: i for i, value in enumerate(values.tolist())}
+            for field, (values, _, _) in postings.items()
+        }
+
+    @classmethod
+    def from_arrow(cls, metadata_column) -> "InvertedIndex":
+        """Build the index from the ``metadata`` struct column of the parquet."""
+        import pyarrow.compute as pc  # build-time only; slow to import
+
+        array = metadata_column.combine_chunks() if isinstance(metadata_column, pa.ChunkedArray) else metadata_column
+        num_rows = len(array)
+        children = {}
+        if pa.types.is_struct(array.type):
+            children = dict(zip((f.name for f in array.type), array.flatten()))
+
+        postings = {}
+        for field in FILTERABLE_FIELDS:
+            child = children.get(field)
+            if child is None:
+                child = pa.nulls(num_rows, pa.string())
+            child = pc.fill_null(pc.cast(child, pa.string()), "")
+            postings[field] = cls._field_postings(child)
+        return cls(num_rows, postings)
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, List[Any]]) -> "InvertedIndex":
+        """Build the index from per-field Python lists (see ``metadata_columns``)."""
+        num_rows = len(next(iter(columns.values()))) if columns else 0
+        postings = {}
+        for field in FILTERABLE_FIELDS:
+            values = columns.get(field) or [""] * num_rows
+            postings[field] = cls._field_postings(pa.array([str(v) for v in values], type=pa.string()))
+        return cls(num_rows, postings)
+
+    @staticmethod
+    def _field_postings(column: pa.Array) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        import pyarrow.compute as pc
+
+        encoded = pc.dictionary_encode(column)
+        dictionary = encoded.dictionary.to_numpy(zero_copy_only=False).astype(str)
+        codes = encoded.indices.to_numpy(zero_copy_only=False)
+
+        # Renumber codes so values are sorted, then group row ids by code
+        order = np.argsort(dictionary, kind="stable")
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        codes = rank[codes]
+
+        rows = np.argsort(codes, kind="stable").astype(np.int32)
+        offsets = np.zeros(len(dictionary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(codes, minlength=len(dictionary)), out=offsets[1:])
+        return dictionary[order], offsets, rows
+
+    def rows_for(self, field: str, value: str) -> np.ndarray:
+        """Sorted row ids whose ``field`` equals ``value``."""
+        position = self._lookup.get(field, {}).get(value)
+        if position is None:
+            return np.empty(0, dtype=np.int32)
+        _, offsets, rows = self.postings[field]
+        return rows[offsets[position]:offsets[position + 1]]
+
+    def resolve(self, filters: Optional[Filters]) -> Optional[np.ndarray]:
+        """Sorted row ids matching every filter, or None for no filtering."""
+        if not filters:
+            return None
+
+        mask = None
+        for field, values in filters:
+            field_mask = np.zeros(self.num_rows, dtype=bool)
+            for value in values:
+                field_mask[self.rows_for(field, value)] = True
+            mask = field_mask if mask is None else mask & field_mask
+        return np.flatnonzero(mask)
+
+    def save(self, path: str, source_fingerprint: str = "") -> None:
+        arrays = {"num_rows": np.array(self.num_rows), "source_fingerprint": np.array(source_fingerprint)}
+        for field, (values, offsets, rows) in self.postings.items():
+            arrays[f"{field}__values"] = values
+            arrays[f"{field}__offsets"] = offsets
+            arrays[f"{field}__rows"] = rows
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> Tuple["InvertedIndex", str]:
+        """Load a saved index and the fingerprint of the parquet it came from."""
+        with np.load(path, allow_pickle=False) as data:
+            postings = {
+                field: (data[f"{field}__values"], data[f"{field}__offsets"], data[f"{field}__rows"])
+                for field in FILTERABLE_FIELDS
+            }
+            return cls(int(data["num_rows"]), postings), str(data["source_fingerprint"])
@@ -0,0 +1,39 @@
+"""Rank fusion for hybrid lexical + vector retrieval."""
+
+from typing import Dict, List, Sequence, Tuple
+import logging
+
+from src.retrieval.base import SearchHit
+
+logger = logging.getLogger(__name__)
+
+RETRIEVAL_MODES = ("vector", "hybrid", "lexical")
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int,
+                           rrf_k: int = 60) -> List[Tuple[str, float]]:
+    """Merge ranked id lists with reciprocal rank fusion.
+
+    Each id scores ``sum(1 / (rrf_k + rank))`` over the lists it appears
+    in (rank starting at 1). Ties keep first-seen order.
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, 1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (rrf_k + rank)
+    fused = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    return fused[:k]
+
+def fuse_hits(hit_lists: Sequence[Sequence[SearchHit]], k: int,
+              rrf_k: int = 60) -> List[SearchHit]:
+    """RRF-merge several hit lists into one ranked list of ``k`` hits.
+
+    When a chunk appears in more than one list, the hit from the earliest
+    list is kept, so passing the vector hits first preserves their cosine
+    similarity.
+    """
+    by_id: Dict[str, SearchHit] = {}
+    for hits in hit_lists:
+        for hit in hits:
+            by_id.setdefault(hit.id, hit)
+    fused = reciprocal_rank_fusion([[hit.id for hit in hits] for hits in hit_lists], k, rrf_k)
+    return [by_id[doc_id] for doc_id, _ in fused]
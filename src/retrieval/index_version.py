@@ -0,0 +1,46 @@
+"""Index version fingerprints used to invalidate cached answers."""
+
+import json
+import os
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+VERSION_FILE = "index_version.json"
+
+def write_index_version(store_path: str, **info: Any) -> str:
+    """Stamp ``store_path`` with a fresh version id and return it.
+
+    Called by ``build_vectorstore`` every time it writes the collection.
+    """
+    version = uuid.uuid4().hex
+    payload = {"version": version, "created_at": datetime.now().isoformat(), **info}
+
+    path = Path(store_path) / VERSION_FILE
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(payload, indent=2))
+    os.replace(tmp_path, path)
+
+    logger.info(f"Wrote index version {version} to {path}")
+    return version
+
+def read_index_version(store_path: str) -> Optional[str]:
+    """Return the version stamped by the last build, if any."""
+    path = Path(store_path) / VERSION_FILE
+    try:
+        return json.loads(path.read_text()).get("version")
+    except (OSError, ValueError):
+        return None
+
+def file_fingerprint(path: str) -> str:
+    """Cheap fingerprint of a file from its size and modification time."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return "missing"
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
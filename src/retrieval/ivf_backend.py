@@ -0,0 +1,338 @@
+"""Inverted-file (IVF) approximate search in pure NumPy.
+
+Usage (recall/latency sweep over ``nprobe`` for a built index):
+    python -m src.retrieval.ivf_backend --source data/complaint_embeddings.parquet \
+        --store-path vectorstore_final/ --nprobe 1 2 4 8 16 32
+"""
+
+import argparse
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import logging
+
+import numpy as np
+import pyarrow.parquet as pq
+
+from src.retrieval.arrow_io import embedding_matrix, metadata_records
+from src.retrieval.base import SearchHit, normalize_rows, top_k_indices
+from src.retrieval.filters import FILTER_INDEX_FILE, Filters, InvertedIndex
+from src.retrieval.index_version import file_fingerprint
+from src.retrieval.numpy_backend import NumpyBackend, load_filter_index
+
+logger = logging.getLogger(__name__)
+
+IVF_INDEX_FILE = "ivf_index.npz"
+IVF_VECTORS_FILE = "ivf_vectors.npy"
+
+def default_nlist(num_rows: int) -> int:
+    """Rule-of-thumb list count: about 4 * sqrt(rows)."""
+    return max(1, int(4 * np.sqrt(num_rows)))
+
+def assign_clusters(vectors: np.ndarray, centroids: np.ndarray, block_rows: int = 65536) -> np.ndarray:
+    """Nearest centroid (by inner product) of every row, in row blocks."""
+    assignments = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), block_rows):
+        block = np.asarray(vectors[start:start + block_rows], dtype=np.float32)
+        assignments[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return assignments
+
+def spherical_kmeans(sample: np.ndarray, n_clusters: int, iterations: int = 20,
+                     seed: int = 0) -> np.ndarray:
+    """Unit-length k-means centroids for L2-normalised ``sample`` rows."""
+    rng = np.random.default_rng(seed)
+    n_clusters = min(n_clusters, len(sample))
+    centroids = sample[rng.choice(len(sample), n_clusters, replace=False)].copy()
+
+    for _ in range(iterations):
+        assignments = assign_clusters(sample, centroids)
+        order = np.argsort(assignments, kind="stable")
+        counts = np.bincount(assignments, minlength=n_clusters)
+        filled = np.flatnonzero(counts)
+
+        sums = np.zeros_like(centroids)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[filled]
+        sums[filled] = np.add.reduceat(sample[order], starts, axis=0)
+
+        # Reseed empty clusters from random sample rows
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            sums[empty] = sample[rng.choice(len(sample), len(empty), replace=False)]
+        centroids = normalize_rows(sums)
+    return centroids
+
+class IVFIndex:
+    """Coarse centroids plus posting lists stored contiguously.
+
+    ``vectors`` holds every embedding reordered by list, so list ``c`` is
+    the slice ``vectors[offsets[c]:offsets[c + 1]]`` and ``rows`` maps each
+    of those positions back to its parquet row.
+    """
+
+    def __init__(self, centroids: np.ndarray, offsets: np.ndarray,
+                 rows: np.ndarray, vectors: np.ndarray):
+        self.centroids = centroids
+        self.offsets = offsets
+        self.rows = rows
+        self.vectors = vectors
+
+    @property
+    def nlist(self) -> int:
+        return len(self.centroids)
+
+    @classmethod
+    def build(cls, embeddings: np.ndarray, nlist: int, sample_size: int = 100_000,
+              iterations: int = 20, seed: int = 0) -> "IVFIndex":
+        """Build in memory from an ``(n, dim)`` matrix."""
+        embeddings = normalize_rows(embeddings)
+        rng = np.random.default_rng(seed)
+        sample = embeddings[np.sort(rng.choice(len(embeddings), min(sample_size, len(embeddings)), replace=False))]
+        centroids = spherical_kmeans(sample, nlist, iterations, seed)
+        offsets, rows = cls._group(assign_clusters(embeddings, centroids), len(centroids))
+        return cls(centroids, offsets, rows, embeddings[rows])
+
+    @staticmethod
+    def _group(assignments: np.ndarray, nlist: int) -> Tuple[np.ndarray, np.ndarray]:
+        rows = np.argsort(assignments, kind="stable").astype(np.int32)
+        offsets = np.zeros(nlist + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignments, minlength=nlist), out=offsets[1:])
+        return offsets, rows
+
+    def search(self, queries: np.ndarray, k: int, nprobe: int,
+               allowed: Optional[np.ndarray] = None) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Top ``k`` ``(rows, scores)`` per query, scanning ``nprobe`` lists.
+
+        ``allowed`` is an optional boolean mask over parquet rows. If the
+        allowed rows are no more than ``nprobe`` lists hold on average,
+        they are searched exactly. Otherwise the probe is widened past
+        ``nprobe`` until the probed lists hold ``k`` allowed rows.
+        """
+        nprobe = min(max(nprobe, 1), self.nlist)
+        centroid_scores = queries @ self.centroids.T
+        if allowed is None:
+            probes = top_k_indices(centroid_scores, nprobe)
+        else:
+            listed = allowed[self.rows]  # the mask in list order
+            total = int(np.count_nonzero(listed))
+            if total <= nprobe * len(self.rows) / self.nlist:
+                return self._search_positions(queries, k, np.flatnonzero(listed))
+            cumulative = np.concatenate([[0], np.cumsum(listed)])
+            per_list = cumulative[self.offsets[1:]] - cumulative[self.offsets[:-1]]
+            probes = [self._widen(scores, per_list, nprobe, min(k, total)) for scores in centroid_scores]
+
+        results = []
+        for query, lists in zip(queries, probes):
+            spans = [(self.offsets[c], self.offsets[c + 1]) for c in lists]
+            # Each list is a contiguous slice, so it is scored without a gather
+            scores = np.concatenate([self.vectors[start:end] @ query for start, end in spans])
+            positions = np.concatenate([np.arange(start, end) for start, end in spans])
+            rows = self.rows[positions]
+            if allowed is not None:
+                keep = allowed[rows]
+                rows, scores = rows[keep], scores[keep]
+            top = top_k_indices(scores, k)[0]
+            results.append((rows[top], scores[top]))
+        return results
+
+    @staticmethod
+    def _widen(centroid_scores: np.ndarray, per_list: np.ndarray, nprobe: int, target: int) -> np.ndarray:
+        """The closest lists, at least ``nprobe`` and enough to hold ``target`` allowed rows."""
+        ranked = np.argsort(-centroid_scores, kind="stable")
+        needed = int(np.searchsorted(np.cumsum(per_list[ranked]), target)) + 1
+        return ranked[:max(nprobe, needed)]
+
+    def _search_positions(self, queries: np.ndarray, k: int,
+                          positions: np.ndarray) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Exact search over the vectors at ``positions``."""
+        if len(positions) == 0:
+            empty = (np.empty(0, dtype=self.rows.dtype), np.empty(0, dtype=np.float32))
+            return [empty for _ in range(len(queries))]
+        scores = queries @ np.asarray(self.vectors[positions]).T
+        rows = self.rows[positions]
+        return [(rows[top], query_scores[top])
+                for query_scores, top in zip(scores, top_k_indices(scores, k))]
+
+    def save(self, store_path: str, source_fingerprint: str = "") -> None:
+        np.save(os.path.join(store_path, IVF_VECTORS_FILE), self.vectors)
+        np.savez(os.path.join(store_path, IVF_INDEX_FILE), centroids=self.centroids,
+                 offsets=self.offsets, rows=self.rows, source_fingerprint=np.array(source_fingerprint))
+
+    @classmethod
+    def load(cls, store_path: str, mmap: bool = False) -> Tuple["IVFIndex", str]:
+        """Load an index and the fingerprint of the parquet it was built from."""
+        with np.load(os.path.join(store_path, IVF_INDEX_FILE), allow_pickle=False) as data:
+            centroids, offsets, rows = data["centroids"], data["offsets"], data["rows"]
+            fingerprint = str(data["source_fingerprint"])
+        vectors = np.load(os.path.join(store_path, IVF_VECTORS_FILE), mmap_mode='r' if mmap else None)
+        return cls(centroids, offsets, rows, vectors), fingerprint
+
+def build_ivf_index(source: str, store_path: str, nlist: Optional[int] = None,
+                    sample_size: int = 100_000, iterations: int = 20,
+                    batch_size: int = 10_000, seed: int = 0) -> Optional[IVFIndex]:
+    """Train and write an IVF index for ``source`` without loading it whole.
+
+    Three streaming passes over the embedding column: collect the k-means
+    sample, assign every row to a list, then write each vector into its
+    list position of a memory-mapped ``.npy``.
+    """
+    parquet = pq.ParquetFile(source)
+    num_rows = parquet.metadata.num_rows
+    if num_rows == 0:
+        return None
+    nlist = nlist or default_nlist(num_rows)
+
+    def batches():
+        for batch in parquet.iter_batches(batch_size=batch_size, columns=['embedding']):
+            yield normalize_rows(embedding_matrix(batch.column(0)))
+
+    rng = np.random.default_rng(seed)
+    sample_rows = np.sort(rng.choice(num_rows, min(sample_size, num_rows), replace=False))
+    sample, row = [], 0
+    for matrix in batches():
+        wanted = sample_rows[(sample_rows >= row) & (sample_rows < row + len(matrix))]
+        sample.append(matrix[wanted - row])
+        row += len(matrix)
+    centroids = spherical_kmeans(np.vstack(sample), nlist, iterations, seed)
+
+    assignments, row = np.empty(num_rows, dtype=np.int32), 0
+    for matrix in batches():
+        assignments[row:row + len(matrix)] = assign_clusters(matrix, centroids)
+        row += len(matrix)
+    offsets, rows = IVFIndex._group(assignments, len(centroids))
+
+    position_of_row = np.empty(num_rows, dtype=np.int64)
+    position_of_row[rows] = np.arange(num_rows)
+    vectors = np.lib.format.open_memmap(
+        os.path.join(store_path, IVF_VECTORS_FILE), mode='w+',
+        dtype=np.float32, shape=(num_rows, centroids.shape[1])
+    )
+    row = 0
+    for matrix in batches():
+        vectors[position_of_row[row:row + len(matrix)]] = matrix
+        row += len(matrix)
+    vectors.flush()
+    del vectors
+
+    index = IVFIndex(centroids, offsets, rows, np.load(os.path.join(store_path, IVF_VECTORS_FILE), mmap_mode='r'))
+    np.savez(os.path.join(store_path, IVF_INDEX_FILE), centroids=centroids, offsets=offsets,
+             rows=rows, source_fingerprint=np.array(file_fingerprint(source)))
+    return index
+
+class IVFBackend(NumpyBackend):
+    """Approximate search that scans only the ``nprobe`` closest lists.
+
+    Ids, documents and metadata come from the parquet like the exact
+    backend; embeddings come from the persisted IVF index, so nothing is
+    retrained at startup, and the list-ordered vectors are memory-mapped.
+    Metadata filters become a row mask applied while the probed lists are
+    scored.
+    """
+
+    name = "ivf"
+
+    def __init__(self, ids: List[str], documents: List[str], metadatas: List[Dict[str, Any]],
+                 index: IVFIndex, nprobe: int = 8, filter_index: Optional[InvertedIndex] = None):
+        super().__init__(ids, documents, metadatas, None, filter_index=filter_index)
+        if len(index.rows) != len(ids):
+            raise ValueError("IVF index does not cover every row of the parquet")
+        self.index = index
+        self.nprobe = nprobe
+
+    @classmethod
+    def from_store(cls, path: str, store_path: str, nprobe: int = 8) -> "IVFBackend":
+        """Load the index ``build_vectorstore --ivf`` wrote for ``path``."""
+        start = time.perf_counter()
+        if not os.path.exists(os.path.join(store_path, IVF_INDEX_FILE)):
+            raise ValueError(f"No IVF index in {store_path}; run build_vectorstore --ivf")
+        index, fingerprint = IVFIndex.load(store_path, mmap=True)
+        if fingerprint != file_fingerprint(path):
+            raise ValueError(f"IVF index in {store_path} is stale for {path}; run build_vectorstore --ivf")
+
+        table = pq.read_table(path, columns=['id', 'document', 'metadata'])
+        filter_index = load_filter_index(os.path.join(store_path, FILTER_INDEX_FILE), path)
+        if filter_index is None:
+            filter_index = InvertedIndex.from_arrow(table.column('metadata'))
+
+        backend = cls(
+            ids=[str(doc_id) for doc_id in table.column('id').to_pylist()],
+            documents=[str(doc) for doc in table.column('document').to_pylist()],
+            metadatas=metadata_records(table.column('metadata')),
+            index=index, nprobe=nprobe, filter_index=filter_index
+        )
+        backend.source_path = path
+        logger.info(f"Loaded IVF index ({index.nlist} lists, nprobe={nprobe}) over "
+                    f"{backend.count()} chunks in {time.perf_counter() - start:.2f}s")
+        return backend
+
+    def search(self, query_embeddings: np.ndarray, k: int,
+               filters: Optional[Filters] = None,
+               nprobe: Optional[int] = None) -> List[List[SearchHit]]:
+        queries = normalize_rows(query_embeddings)
+        rows = self.filter_index.resolve(filters)
+        allowed = None
+        if rows is not None:
+            if len(rows) == 0:
+                return [[] for _ in range(len(queries))]
+            allowed = np.zeros(self.count(), dtype=bool)
+            allowed[rows] = True
+
+        return [
+            [self._hit(int(row), float(score)) for row, score in zip(hit_rows, scores)]
+            for hit_rows, scores in self.index.search(queries, k, nprobe or self.nprobe, allowed)
+        ]
+
+def nprobe_sweep(index: IVFIndex, queries: np.ndarray, k: int = 10,
+                 nprobes: Sequence[int] = (1, 2, 4, 8, 16, 32)) -> List[Dict[str, float]]:
+    """Recall@k against exact search and per-query latency for each nprobe."""
+    from src.retrieval.quantized import exact_top_k
+
+    queries = normalize_rows(queries)
+    # Ground truth over the list-ordered vectors, mapped back to parquet rows
+    exact = index.rows[exact_top_k(index.vectors, queries, k)]
+
+    results = []
+    for nprobe in nprobes:
+        latencies = []
+        overlap = 0
+        for q, query in enumerate(queries):
+            start = time.perf_counter()
+            rows, _ = index.search(query[None, :], k, nprobe)[0]
+            latencies.append((time.perf_counter() - start) * 1000)
+            overlap += len(set(exact[q].tolist()) & set(rows.tolist()))
+        results.append({
+            "nprobe": nprobe,
+            "recall": overlap / exact.size if exact.size else 1.0,
+            "p50_ms": float(np.percentile(latencies, 50)),
+            "p99_ms": float(np.percentile(latencies, 99))
+        })
+    return results
+
+def print_sweep(results: List[Dict[str, float]], k: int) -> None:
+    print(f" {'nprobe':>6}  {'recall@' + str(k):>9}  {'p50 ms':>8}  {'p99 ms':>8}")
+    for row in results:
+        print(f" {row['nprobe']:>6}  {row['recall']:>9.3f}  {row['p50_ms']:>8.2f}  {row['p99_ms']:>8.2f}")
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from src.retrieval.quantized import sample_queries
+
+    parser = argparse.ArgumentParser(description="Recall/latency sweep over IVF nprobe")
+    parser.add_argument("--source", default="data/complaint_embeddings.parquet", help="Embeddings parquet file")
+    parser.add_argument("--store-path", default="vectorstore_final/", help="Directory holding the IVF index")
+    parser.add_argument("--k", type=int, default=10, help="Results per query")
+    parser.add_argument("--queries", type=int, default=200, help="Sampled queries")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    index, fingerprint = IVFIndex.load(args.store_path, mmap=True)
+    if fingerprint != file_fingerprint(args.source):
+        print(f" Warning: IVF index in {args.store_path} is stale for {args.source}")
+    results = nprobe_sweep(index, sample_queries(index.vectors, args.queries), args.k, args.nprobe)
+    print_sweep(results, args.k)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"nlist": index.nlist, "k": args.k, "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
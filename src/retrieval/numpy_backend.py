@@ -0,0 +1,157 @@
+"""In-process exact-search backend over the embeddings parquet."""
+
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+import pyarrow.parquet as pq
+
+from src.retrieval.arrow_io import embedding_matrix, metadata_records
+from src.retrieval.base import RetrievalBackend, SearchHit, normalize_rows, top_k_indices
+from src.retrieval.filters import FILTER_INDEX_FILE, FILTERABLE_FIELDS, Filters, InvertedIndex
+from src.retrieval.index_version import file_fingerprint
+
+logger = logging.getLogger(__name__)
+
+class NumpyBackend(RetrievalBackend):
+    """Exact cosine search with a single matrix product per query batch.
+
+    All embeddings live in one contiguous, L2-normalised float32 matrix,
+    so scoring is ``embeddings @ query`` followed by ``argpartition``.
+    Recall is exact and there is no SQLite/HNSW state to open.
+
+    Metadata filters are resolved through an ``InvertedIndex`` to the
+    matching row ids first, so only those rows are scored.
+    """
+
+    name = "numpy"
+    query_block_size = 256
+
+    def __init__(self, ids: List[str], documents: List[str],
+                 metadatas: List[Dict[str, Any]], embeddings: np.ndarray,
+                 filter_index: Optional[InvertedIndex] = None):
+        if not (len(ids) == len(documents) == len(metadatas)):
+            raise ValueError("ids, documents and metadatas must have equal length")
+        if embeddings is not None and len(embeddings) != len(ids):
+            raise ValueError("embeddings must have one row per id")
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        # Subclasses with their own storage layout pass embeddings=None
+        self.embeddings = normalize_rows(embeddings) if embeddings is not None else None
+        self.source_path: Optional[str] = None
+        self._filter_index = filter_index
+        self._row_by_id: Optional[Dict[str, int]] = None
+
+    @classmethod
+    def from_parquet(cls, path: str = "data/complaint_embeddings.parquet",
+                     index_dir: Optional[str] = None) -> "NumpyBackend":
+        """Load ``id``/``document``/``embedding``/``metadata`` columns from parquet.
+
+        If ``index_dir`` holds a filter index built by ``build_vectorstore``
+        for this exact file it is reused, otherwise one is built in memory.
+        """
+        start = time.perf_counter()
+        table = pq.read_table(path, columns=['id', 'document', 'embedding', 'metadata'])
+
+        filter_index = None
+        if index_dir:
+            filter_index = load_filter_index(os.path.join(index_dir, FILTER_INDEX_FILE), path)
+        if filter_index is None:
+            filter_index = InvertedIndex.from_arrow(table.column('metadata'))
+
+        backend = cls(
+            ids=[str(doc_id) for doc_id in table.column('id').to_pylist()],
+            documents=[str(doc) for doc in table.column('document').to_pylist()],
+            metadatas=metadata_records(table.column('metadata')),
+            embeddings=embedding_matrix(table.column('embedding')),
+            filter_index=filter_index
+        )
+        backend.source_path = path
+        logger.info(f"Loaded {backend.count()} chunks from {path} "
+                    f"in {time.perf_counter() - start:.2f}s")
+        return backend
+
+    def count(self) -> int:
+        return len(self.ids)
+
+    def index_version(self) -> str:
+        if self.source_path is None:
+            return f"memory-{id(self):x}"
+        return file_fingerprint(self.source_path)
+
+    @property
+    def filter_index(self) -> InvertedIndex:
+        if self._filter_index is None:
+            self._filter_index = InvertedIndex.from_columns({
+                field: [meta.get(field, '') for meta in self.metadatas]
+                for field in FILTERABLE_FIELDS
+            })
+        return self._filter_index
+
+    def search(self, query_embeddings: np.ndarray, k: int,
+               filters: Optional[Filters] = None) -> List[List[SearchHit]]:
+        queries = normalize_rows(query_embeddings)
+
+        # Pre-filter: score only the rows that match every filter
+        rows = self.filter_index.resolve(filters)
+        if rows is not None and len(rows) == 0:
+            return [[] for _ in range(len(queries))]
+        matrix = self._scoring_matrix(rows)
+
+        results = []
+        # Score in blocks so a large batch never materialises a full
+        # (queries x corpus) matrix at once.
+        for start in range(0, len(queries), self.query_block_size):
+            block = queries[start:start + self.query_block_size]
+            positions, scores = self._search_block(block, matrix, rows, k)
+            results.extend(
+                [self._hit(int(row), float(score)) for row, score in zip(positions[q], scores[q])]
+                for q in range(len(block))
+            )
+        return results
+
+    def _scoring_matrix(self, rows: Optional[np.ndarray]) -> np.ndarray:
+        """The matrix scored for a search: all rows, or the filtered subset."""
+        return self.embeddings if rows is None else self.embeddings[rows]
+
+    def _search_block(self, block: np.ndarray, matrix: np.ndarray,
+                      rows: Optional[np.ndarray], k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Top ``k`` row ids and their scores for each query in ``block``.
+
+        ``matrix`` is ``_scoring_matrix(rows)``; its positions map back to
+        row ids through ``rows`` when a filter is applied.
+        """
+        scores = block @ matrix.T
+        top = top_k_indices(scores, k)
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        return (top if rows is None else rows[top]), top_scores
+
+    def get(self, ids: List[str]) -> List[SearchHit]:
+        if self._row_by_id is None:
+            self._row_by_id = {doc_id: row for row, doc_id in enumerate(self.ids)}
+        return [self._hit(self._row_by_id[doc_id], 0.0) for doc_id in ids if doc_id in self._row_by_id]
+
+    def _hit(self, row: int, similarity: float) -> SearchHit:
+        return SearchHit(
+            id=self.ids[row],
+            document=self.documents[row],
+            metadata=self.metadatas[row],
+            similarity=similarity
+        )
+
+def load_filter_index(index_path: str, source_path: str) -> Optional[InvertedIndex]:
+    """Load a persisted filter index if it was built from ``source_path``."""
+    if not os.path.exists(index_path):
+        return None
+    try:
+        index, fingerprint = InvertedIndex.load(index_path)
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"Ignoring unreadable filter index {index_path}: {e}")
+        return None
+    if fingerprint != file_fingerprint(source_path):
+        logger.info(f"Filter index {index_path} is stale, rebuilding in memory")
+        return None
+    return index
@@ -0,0 +1,157 @@
+"""Complaint-level collapsing and neighbour-chunk expansion of search hits."""
+
+import os
+from typing import Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+import pyarrow as pa
+
+from src.retrieval.base import RetrievalBackend, SearchHit
+from src.retrieval.index_version import file_fingerprint
+
+logger = logging.getLogger(__name__)
+
+CHUNK_POSITIONS_FILE = "chunk_positions.npz"
+
+def complaint_key(hit: SearchHit) -> str:
+    """Complaint a hit belongs to; chunks without one stand alone."""
+    complaint_id = hit.metadata.get('complaint_id')
+    return str(complaint_id) if complaint_id not in (None, '') else f"chunk:{hit.id}"
+
+def collapse_by_complaint(hits: List[SearchHit], k: int) -> List[SearchHit]:
+    """Keep the best-scoring chunk of each complaint, up to ``k`` hits.
+
+    ``hits`` must be ranked best first, as every backend returns them.
+    """
+    seen = set()
+    collapsed = []
+    for hit in hits:
+        key = complaint_key(hit)
+        if key in seen:
+            continue
+        seen.add(key)
+        collapsed.append(hit)
+        if len(collapsed) == k:
+            break
+    return collapsed
+
+class ChunkPositions:
+    """Positional index from ``(complaint_id, chunk_index)`` to chunk id.
+
+    Rows are sorted by complaint id then chunk index, so the chunks of one
+    complaint are a contiguous slice found with ``searchsorted``.
+    """
+
+    def __init__(self, complaint_ids: np.ndarray, chunk_indexes: np.ndarray, ids: np.ndarray):
+        self.complaint_ids = complaint_ids
+        self.chunk_indexes = chunk_indexes
+        self.ids = ids
+
+    @classmethod
+    def from_arrays(cls, ids, complaint_ids, chunk_indexes) -> "ChunkPositions":
+        complaint_ids = np.asarray(complaint_ids).astype(str)
+        chunk_indexes = np.asarray(chunk_indexes, dtype=np.int32)
+        order = np.lexsort((chunk_indexes, complaint_ids))
+        return cls(complaint_ids[order], chunk_indexes[order], np.asarray(ids).astype(str)[order])
+
+    @classmethod
+    def from_arrow(cls, id_column, metadata_column) -> "ChunkPositions":
+        """Build from the ``id`` and ``metadata`` columns of the parquet."""
+        import pyarrow.compute as pc  # build-time only; slow to import
+
+        if isinstance(id_column, pa.ChunkedArray):
+            id_column = id_column.combine_chunks()
+        metadata = metadata_column.combine_chunks() if isinstance(metadata_column, pa.ChunkedArray) else metadata_column
+        children = {}
+        if pa.types.is_struct(metadata.type):
+            children = dict(zip((f.name for f in metadata.type), metadata.flatten()))
+
+        complaint_ids = children.get('complaint_id', pa.nulls(len(metadata), pa.string()))
+        complaint_ids = pc.fill_null(pc.cast(complaint_ids, pa.string()), '')
+        chunk_indexes = children.get('chunk_index', pa.nulls(len(metadata), pa.int32()))
+        chunk_indexes = pc.fill_null(pc.cast(chunk_indexes, pa.int32()), 0)
+        return cls.from_arrays(
+            pc.cast(id_column, pa.string()).to_numpy(zero_copy_only=False),
+            complaint_ids.to_numpy(zero_copy_only=False),
+            chunk_indexes.to_numpy(zero_copy_only=False)
+        )
+
+    def chunk_ids(self, complaint_id: str, first: int, last: int) -> List[Tuple[int, str]]:
+        """``(chunk_index, id)`` for chunks ``first..last`` of one complaint."""
+        start = np.searchsorted(self.complaint_ids, complaint_id, side='left')
+        end = np.searchsorted(self.complaint_ids, complaint_id, side='right')
+        indexes = self.chunk_indexes[start:end]
+        lo = start + np.searchsorted(indexes, first, side='left')
+        hi = start + np.searchsorted(indexes, last, side='right')
+        return [(int(self.chunk_indexes[i]), str(self.ids[i])) for i in range(lo, hi)]
+
+    def save(self, path: str, source_fingerprint: str = "") -> None:
+        np.savez(path, complaint_ids=self.complaint_ids, chunk_indexes=self.chunk_indexes,
+                 ids=self.ids, source_fingerprint=np.array(source_fingerprint))
+
+    @classmethod
+    def load(cls, path: str) -> Tuple["ChunkPositions", str]:
+        """Load saved positions and the fingerprint of the parquet they came from."""
+        with np.load(path, allow_pickle=False) as data:
+            positions = cls(data["complaint_ids"], data["chunk_indexes"], data["ids"])
+            return positions, str(data["source_fingerprint"])
+
+    @classmethod
+    def from_store(cls, store_path: str, source_path: Optional[str] = None) -> Optional["ChunkPositions"]:
+        """Load the positions ``build_vectorstore`` wrote, or None if absent.
+
+        If ``source_path`` exists and the positions were built from a
+        different version of it, None is returned so that stale chunk ids
+        are never stitched into answers.
+        """
+        path = os.path.join(store_path, CHUNK_POSITIONS_FILE)
+        if not os.path.exists(path):
+            return None
+        positions, fingerprint = cls.load(path)
+        if source_path and os.path.exists(source_path) and fingerprint != file_fingerprint(source_path):
+            logger.warning(f"Chunk positions {path} are stale, neighbour expansion is off until "
+                           f"build_vectorstore is rerun")
+            return None
+        return positions
+
+def expand_neighbors(hits: List[SearchHit], positions: ChunkPositions,
+                     backend: RetrievalBackend, window: int = 1) -> List[SearchHit]:
+    """Stitch chunks ``chunk_index ± window`` of each hit's complaint into its text.
+
+    Neighbour ids come from the positional index and are fetched with a
+    single ``backend.get`` call, so no extra similarity queries are run.
+    The hit keeps its own id, metadata and similarity.
+    """
+    if window <= 0 or not hits:
+        return hits
+
+    spans: List[List[Tuple[int, str]]] = []
+    wanted = []
+    for hit in hits:
+        complaint_id = hit.metadata.get('complaint_id')
+        if complaint_id in (None, ''):
+            spans.append([])
+            continue
+        chunk_index = int(hit.metadata.get('chunk_index', 0))
+        span = positions.chunk_ids(str(complaint_id), chunk_index - window, chunk_index + window)
+        spans.append(span)
+        wanted.extend(doc_id for _, doc_id in span if doc_id != hit.id)
+
+    documents: Dict[str, str] = {
+        neighbor.id: neighbor.document for neighbor in backend.get(list(dict.fromkeys(wanted)))
+    }
+
+    expanded = []
+    for hit, span in zip(hits, spans):
+        if not any(doc_id == hit.id for _, doc_id in span):
+            # Positional index predates this chunk; leave the hit as is
+            expanded.append(hit)
+            continue
+        parts = [hit.document if doc_id == hit.id else documents.get(doc_id) for _, doc_id in span]
+        parts = [part for part in parts if part]
+        if len(parts) > 1:
+            hit = SearchHit(id=hit.id, document=" ".join(parts), metadata=hit.metadata,
+                            similarity=hit.similarity)
+        expanded.append(hit)
+    return expanded
@@ -0,0 +1,240 @@
+"""Scalar-quantized (int8 / float16) embedding layouts with float32 rescoring."""
+
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+import pyarrow.parquet as pq
+
+from src.retrieval.arrow_io import embedding_matrix, metadata_records
+from src.retrieval.base import normalize_rows, top_k_indices
+from src.retrieval.filters import FILTER_INDEX_FILE, InvertedIndex
+from src.retrieval.index_version import file_fingerprint
+from src.retrieval.numpy_backend import NumpyBackend, load_filter_index
+
+logger = logging.getLogger(__name__)
+
+QUANTIZATIONS = ('int8', 'float16')
+
+FLOAT32_FILE = "embeddings_f32.npy"
+QUANT_PARAMS_FILE = "embeddings_quant.npz"
+CODES_FILES = {'int8': "embeddings_int8.npy", 'float16': "embeddings_f16.npy"}
+
+def quantize_int8(matrix: np.ndarray, offset: np.ndarray, scale: np.ndarray) -> np.ndarray:
+    """Map each dimension's ``[offset, offset + 255 * scale]`` range onto int8."""
+    codes = np.rint((matrix - offset) / scale)
+    np.clip(codes, 0, 255, out=codes)
+    return (codes - 128).astype(np.int8)
+
+def dequantize_int8(codes: np.ndarray, offset: np.ndarray, scale: np.ndarray) -> np.ndarray:
+    return (codes.astype(np.float32) + 128) * scale + offset
+
+def _int8_params(mins: np.ndarray, maxs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    scale = ((maxs - mins) / 255).astype(np.float32)
+    scale[scale == 0] = 1.0
+    return mins.astype(np.float32), scale
+
+def write_quantized_layout(source: str, store_path: str, kind: str,
+                           batch_size: int = 10000) -> Optional[Dict[str, Any]]:
+    """Write the float32 and quantized embedding matrices for ``source``.
+
+    Both are ``.npy`` files with rows in parquet order. The float32 file is
+    written first while per-dimension min/max are collected, then encoded
+    block by block, so the full matrix never has to fit in memory.
+    Returns the saved parameters, or None for an empty source.
+    """
+    if kind not in QUANTIZATIONS:
+        raise ValueError(f"Unknown quantization '{kind}'. Choose one of: {', '.join(QUANTIZATIONS)}")
+
+    parquet = pq.ParquetFile(source)
+    num_rows = parquet.metadata.num_rows
+    if num_rows == 0:
+        return None
+
+    full = None
+    mins = maxs = None
+    row = 0
+    for batch in parquet.iter_batches(batch_size=batch_size, columns=['embedding']):
+        matrix = normalize_rows(embedding_matrix(batch.column(0)))
+        if full is None:
+            full = np.lib.format.open_memmap(
+                os.path.join(store_path, FLOAT32_FILE), mode='w+',
+                dtype=np.float32, shape=(num_rows, matrix.shape[1])
+            )
+            mins, maxs = matrix.min(axis=0), matrix.max(axis=0)
+        else:
+            np.minimum(mins, matrix.min(axis=0), out=mins)
+            np.maximum(maxs, matrix.max(axis=0), out=maxs)
+        full[row:row + len(matrix)] = matrix
+        row += len(matrix)
+    full.flush()
+
+    offset, scale = _int8_params(mins, maxs)
+    codes = np.lib.format.open_memmap(
+        os.path.join(store_path, CODES_FILES[kind]), mode='w+',
+        dtype=np.int8 if kind == 'int8' else np.float16, shape=full.shape
+    )
+    for start in range(0, num_rows, batch_size):
+        block = full[start:start + batch_size]
+        codes[start:start + batch_size] = (
+            quantize_int8(block, offset, scale) if kind == 'int8' else block.astype(np.float16)
+        )
+    codes.flush()
+    del codes, full
+
+    params = {
+        "kind": kind,
+        "offset": offset,
+        "scale": scale,
+        "source_fingerprint": file_fingerprint(source)
+    }
+    np.savez(os.path.join(store_path, QUANT_PARAMS_FILE),
+             **{key: np.array(value) if isinstance(value, str) else value for key, value in params.items()})
+    return params
+
+class QuantizedNumpyBackend(NumpyBackend):
+    """NumPy search over an int8 or float16 matrix with exact rescoring.
+
+    The first pass scores every (filtered) row against the compact matrix
+    held in memory. The best ``k * rescore_factor`` candidates per query
+    are then rescored with the float32 matrix, which is memory-mapped so
+    only the candidate rows are read from disk.
+
+    int8 codes use a per-dimension offset and scale, so for a query ``q``:
+    ``q . x ~= (q * scale) . (code + 128) + q . offset``.
+    """
+
+    name = "numpy"
+    score_block_rows = 32768
+
+    def __init__(self, ids: List[str], documents: List[str], metadatas: List[Dict[str, Any]],
+                 codes: np.ndarray, full: np.ndarray, kind: str,
+                 offset: Optional[np.ndarray] = None, scale: Optional[np.ndarray] = None,
+                 rescore_factor: int = 4, filter_index: Optional[InvertedIndex] = None):
+        super().__init__(ids, documents, metadatas, None, filter_index=filter_index)
+        if not (len(codes) == len(full) == len(ids)):
+            raise ValueError("Quantized and float32 matrices must have one row per id")
+        if kind not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization '{kind}'")
+        self.codes = codes
+        self.full = full
+        self.kind = kind
+        self.offset = offset
+        self.scale = scale
+        self.rescore_factor = max(rescore_factor, 1)
+
+    @classmethod
+    def from_store(cls, path: str, store_path: str, kind: str,
+                   rescore_factor: int = 4) -> "QuantizedNumpyBackend":
+        """Load the layout ``build_vectorstore --quantize`` wrote for ``path``."""
+        start = time.perf_counter()
+        params_path = os.path.join(store_path, QUANT_PARAMS_FILE)
+        if not os.path.exists(params_path):
+            raise ValueError(f"No quantized embeddings in {store_path}; "
+                             f"run build_vectorstore --quantize {kind}")
+        with np.load(params_path, allow_pickle=False) as params:
+            stored_kind = str(params["kind"])
+            offset, scale = params["offset"], params["scale"]
+            fingerprint = str(params["source_fingerprint"])
+        if stored_kind != kind:
+            raise ValueError(f"{store_path} holds {stored_kind} embeddings, not {kind}")
+        if fingerprint != file_fingerprint(path):
+            raise ValueError(f"Quantized embeddings in {store_path} are stale for {path}; "
+                             f"run build_vectorstore --quantize {kind}")
+
+        codes = np.load(os.path.join(store_path, CODES_FILES[kind]))
+        full = np.load(os.path.join(store_path, FLOAT32_FILE), mmap_mode='r')
+
+        # Only the text and metadata columns: embeddings come from the layout
+        table = pq.read_table(path, columns=['id', 'document', 'metadata'])
+        filter_index = load_filter_index(os.path.join(store_path, FILTER_INDEX_FILE), path)
+        if filter_index is None:
+            filter_index = InvertedIndex.from_arrow(table.column('metadata'))
+
+        backend = cls(
+            ids=[str(doc_id) for doc_id in table.column('id').to_pylist()],
+            documents=[str(doc) for doc in table.column('document').to_pylist()],
+            metadatas=metadata_records(table.column('metadata')),
+            codes=codes, full=full, kind=kind, offset=offset, scale=scale,
+            rescore_factor=rescore_factor, filter_index=filter_index
+        )
+        backend.source_path = path
+        logger.info(f"Loaded {backend.count()} {kind} chunks ({codes.nbytes / 2**20:.0f} MiB) "
+                    f"from {store_path} in {time.perf_counter() - start:.2f}s")
+        return backend
+
+    def _scoring_matrix(self, rows: Optional[np.ndarray]) -> np.ndarray:
+        return self.codes if rows is None else self.codes[rows]
+
+    def _coarse_scores(self, block: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+        """Approximate scores of every query in ``block`` against ``matrix``."""
+        if self.kind == 'int8':
+            weights = (block * self.scale).T
+            bias = (128 * weights.sum(axis=0) + block @ self.offset)[:, None]
+        else:
+            weights, bias = block.T, 0.0
+
+        scores = np.empty((len(block), len(matrix)), dtype=np.float32)
+        # Upcast in row chunks so at most score_block_rows float32 rows exist at once
+        for start in range(0, len(matrix), self.score_block_rows):
+            chunk = matrix[start:start + self.score_block_rows].astype(np.float32)
+            scores[:, start:start + len(chunk)] = (chunk @ weights).T + bias
+        return scores
+
+    def _search_block(self, block: np.ndarray, matrix: np.ndarray,
+                      rows: Optional[np.ndarray], k: int) -> Tuple[np.ndarray, np.ndarray]:
+        depth = min(k * self.rescore_factor, len(matrix))
+        candidates = top_k_indices(self._coarse_scores(block, matrix), depth)
+        if rows is not None:
+            candidates = rows[candidates]
+
+        # Exact float32 rescoring: each candidate row is read once, in
+        # file order, from the memory map
+        unique_rows, inverse = np.unique(candidates, return_inverse=True)
+        vectors = np.asarray(self.full[unique_rows], dtype=np.float32)[inverse.reshape(candidates.shape)]
+        exact = np.einsum('qcd,qd->qc', vectors, block)
+        top = top_k_indices(exact, k)
+        return np.take_along_axis(candidates, top, axis=1), np.take_along_axis(exact, top, axis=1)
+
+def exact_top_k(full: np.ndarray, queries: np.ndarray, k: int,
+                block_rows: int = 65536) -> np.ndarray:
+    """Exact float32 top ``k`` row ids, scanning ``full`` in row blocks."""
+    best_rows = np.empty((len(queries), 0), dtype=np.int64)
+    best_scores = np.empty((len(queries), 0), dtype=np.float32)
+    for start in range(0, len(full), block_rows):
+        scores = queries @ np.asarray(full[start:start + block_rows], dtype=np.float32).T
+        top = top_k_indices(scores, k)
+        best_rows = np.hstack([best_rows, top + start])
+        best_scores = np.hstack([best_scores, np.take_along_axis(scores, top, axis=1)])
+        keep = top_k_indices(best_scores, k)
+        best_rows = np.take_along_axis(best_rows, keep, axis=1)
+        best_scores = np.take_along_axis(best_scores, keep, axis=1)
+    return best_rows
+
+def recall_report(backend: QuantizedNumpyBackend, queries: np.ndarray,
+                  ks: Tuple[int, ...] = (1, 5, 10)) -> Dict[int, float]:
+    """Recall@k of ``backend`` against exact float32 search, for each k."""
+    queries = normalize_rows(queries)
+    exact = exact_top_k(backend.full, queries, max(ks))
+    found = backend.search(queries, max(ks))
+    row_by_id = {doc_id: row for row, doc_id in enumerate(backend.ids)}
+
+    report = {}
+    for k in ks:
+        overlap = sum(
+            len(set(exact[q, :k].tolist()) & {row_by_id[hit.id] for hit in found[q][:k]})
+            for q in range(len(queries))
+        )
+        report[k] = overlap / (len(queries) * min(k, exact.shape[1])) if exact.size else 1.0
+    return report
+
+def sample_queries(full: np.ndarray, sample: int = 200, noise: float = 0.3,
+                   seed: int = 0) -> np.ndarray:
+    """Stored embeddings plus Gaussian noise of norm ~``noise``, standing in for questions."""
+    rng = np.random.default_rng(seed)
+    rows = np.sort(rng.choice(len(full), size=min(sample, len(full)), replace=False))
+    queries = np.asarray(full[rows], dtype=np.float32)
+    scale = noise / np.sqrt(queries.shape[1])
+    return queries + rng.normal(scale=scale, size=queries.shape).astype(np.float32)
@@ -0,0 +1,161 @@
+"""Product-category shards with centroid routing and scatter-gather search."""
+
+import hashlib
+import heapq
+import json
+import os
+import re
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from typing import Any, Dict, List, Optional, Sequence
+import logging
+
+import numpy as np
+
+from src.config import RetrievalConfig
+from src.retrieval.base import RetrievalBackend, SearchHit, normalize_rows, top_k_indices
+from src.retrieval.filters import Filters
+
+logger = logging.getLogger(__name__)
+
+SHARDS_DIR = "shards"
+SHARD_MANIFEST_FILE = "shards.json"
+SHARD_CENTROIDS_FILE = "shard_centroids.npy"
+SHARD_SOURCE_FILE = "embeddings.parquet"
+
+def shard_name(category: Optional[str]) -> str:
+    """Directory-safe shard name for a ``product_category`` value.
+
+    The slug alone can collide ("Credit card" and "Credit-card", or any
+    two non-ASCII names), so a short hash of the raw value keeps every
+    category in its own shard.
+    """
+    category = category or ''
+    slug = re.sub(r'[^a-z0-9]+', '_', category.lower()).strip('_') or "uncategorized"
+    digest = hashlib.blake2b(category.encode("utf-8"), digest_size=4).hexdigest()
+    return f"{slug}_{digest}"
+
+def write_shard_manifest(shards_dir: str, shards: Sequence[Dict[str, Any]],
+                         centroids: np.ndarray, **info: Any) -> str:
+    """Record the shards and their centroids; returns the new shard-set version."""
+    version = uuid.uuid4().hex
+    np.save(os.path.join(shards_dir, SHARD_CENTROIDS_FILE), centroids.astype(np.float32))
+    manifest = {"version": version, "shards": list(shards), **info}
+    tmp_path = os.path.join(shards_dir, SHARD_MANIFEST_FILE + ".tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(shards_dir, SHARD_MANIFEST_FILE))
+    return version
+
+def read_shard_manifest(shards_dir: str) -> Optional[Dict[str, Any]]:
+    path = os.path.join(shards_dir, SHARD_MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+class ShardedBackend(RetrievalBackend):
+    """Routes each query to the closest shards and merges their top-k.
+
+    Every shard is an ordinary ``RetrievalBackend`` over one
+    ``product_category``, so a shard can equally be a client for a store
+    served by another process or host. Queries go to the
+    ``fanout`` shards whose centroid is most similar (all shards when
+    ``fanout`` is 0); a ``product_category`` filter routes exactly to the
+    matching shards instead. Shards are searched in parallel and their
+    hits merged by similarity.
+    """
+
+    name = "sharded"
+
+    def __init__(self, shards: Dict[str, RetrievalBackend], categories: Dict[str, str],
+                 centroids: np.ndarray, fanout: int = 2, version: str = ""):
+        if len(shards) != len(centroids):
+            raise ValueError("Need exactly one centroid per shard")
+        self.shards = shards
+        self.names = list(shards)
+        self.categories = categories
+        self.centroids = normalize_rows(centroids)
+        self.fanout = fanout
+        self.version = version
+        self._pool = ThreadPoolExecutor(max_workers=max(len(shards), 1), thread_name_prefix="shard")
+
+    @classmethod
+    def from_store(cls, config: RetrievalConfig) -> "ShardedBackend":
+        """Open every shard listed in ``<vector_store_path>/shards/shards.json``."""
+        from src.retrieval.factory import create_backend
+
+        if config.shard_backend == cls.name:
+            raise ValueError("SHARD_BACKEND must name a non-sharded backend")
+        shards_dir = os.path.join(config.vector_store_path, SHARDS_DIR)
+        manifest = read_shard_manifest(shards_dir)
+        if manifest is None:
+            raise ValueError(f"No shards in {shards_dir}; run build_vectorstore --shard-by-category")
+
+        def open_shard(entry: Dict[str, Any]) -> RetrievalBackend:
+            shard_dir = os.path.join(shards_dir, entry["name"])
+            return create_backend(replace(
+                config, backend=config.shard_backend, vector_store_path=shard_dir,
+                embeddings_path=os.path.join(shard_dir, SHARD_SOURCE_FILE)
+            ))
+
+        entries = manifest["shards"]
+        # Shards load independently, so open them concurrently
+        with ThreadPoolExecutor(max_workers=max(len(entries), 1)) as pool:
+            backends = list(pool.map(open_shard, entries))
+
+        return cls(
+            shards={entry["name"]: backend for entry, backend in zip(entries, backends)},
+            categories={entry["name"]: entry["category"] for entry in entries},
+            centroids=np.load(os.path.join(shards_dir, SHARD_CENTROIDS_FILE)),
+            fanout=config.shard_fanout,
+            version=manifest["version"]
+        )
+
+    def count(self) -> int:
+        return sum(shard.count() for shard in self.shards.values())
+
+    def index_version(self) -> str:
+        return self.version
+
+    def route(self, queries: np.ndarray, filters: Optional[Filters] = None) -> List[List[int]]:
+        """Shard positions each query is sent to."""
+        for field, values in filters or ():
+            if field == 'product_category':
+                wanted = [i for i, name in enumerate(self.names) if self.categories[name] in values]
+                return [wanted for _ in range(len(queries))]
+
+        if self.fanout <= 0 or self.fanout >= len(self.names):
+            return [list(range(len(self.names))) for _ in range(len(queries))]
+        return top_k_indices(queries @ self.centroids.T, self.fanout).tolist()
+
+    def search(self, query_embeddings: np.ndarray, k: int,
+               filters: Optional[Filters] = None) -> List[List[SearchHit]]:
+        queries = normalize_rows(query_embeddings)
+        routes = self.route(queries, filters)
+
+        # Scatter: one call per shard with every query routed to it
+        per_shard: Dict[int, List[int]] = {}
+        for q, shard_positions in enumerate(routes):
+            for position in shard_positions:
+                per_shard.setdefault(position, []).append(q)
+        futures = {
+            position: self._pool.submit(self.shards[self.names[position]].search,
+                                        queries[query_rows], k, filters)
+            for position, query_rows in per_shard.items()
+        }
+
+        # Gather: merge each query's hits from all of its shards
+        candidates: List[List[SearchHit]] = [[] for _ in range(len(queries))]
+        for position, future in futures.items():
+            for q, hits in zip(per_shard[position], future.result()):
+                candidates[q].extend(hits)
+        return [heapq.nlargest(k, hits, key=lambda hit: hit.similarity) for hits in candidates]
+
+    def get(self, ids: List[str]) -> List[SearchHit]:
+        found = {}
+        for shard in self.shards.values():
+            for hit in shard.get(ids):
+                found[hit.id] = hit
+        return [found[doc_id] for doc_id in ids if doc_id in found]
@@ -1,43 +1,272 @@
 """Session management for chat history."""
 
+import os
+import sqlite3
+import threading
 import uuid
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 import logging
 
+from src.config import SessionConfig
+
 logger = logging.getLogger(__name__)
 
 class Session:
-    """Chat session with history."""
+    """Chat session with history.
+    
+    Only the last ``max_history`` exchanges are kept. ``on_message`` is
+    called with each new exchange, which is how persistent stores save it.
+    """
     
-    def __init__(self, session_id: Optional[str] = None, ttl_hours: int = 24):
+    def __init__(self, session_id: Optional[str] = None, ttl_hours: float = 24,
+                 max_history: int = 50,
+                 on_message: Optional[Callable[["Session", Dict[str, str]], None]] = None):
         self.session_id = session_id or str(uuid.uuid4())
         self.created_at = datetime.now()
         self.expires_at = self.created_at + timedelta(hours=ttl_hours)
+        self.max_history = max_history
         self.history: List[Dict[str, str]] = []
+        self.on_message = on_message
     
     def add_message(self, question: str, answer: str) -> None:
-        self.history.append({
+        message = {
             "question": question,
             "answer": answer,
             "timestamp": datetime.now().isoformat()
-        })
+        }
+        self.history.append(message)
+        if len(self.history) > self.max_history:
+            del self.history[:-self.max_history]
+        if self.on_message is not None:
+            self.on_message(self, message)
     
     def is_expired(self) -> bool:
         return datetime.now() > self.expires_at
 
 class SessionManager:
-    """Manages multiple chat sessions."""
+    """Manages multiple chat sessions.
     
-    def __init__(self):
-        self.sessions: Dict[str, Session] = {}
+    Holds at most ``max_sessions`` sessions and evicts the least recently
+    used one when a new session would exceed the cap. Expired sessions
+    are dropped on access and by ``sweep()``, which ``start()`` runs every
+    ``sweep_interval`` seconds on a background thread.
+    """
+    
+    def __init__(self, max_sessions: int = 10_000, ttl_hours: float = 24,
+                 max_history: int = 50, sweep_interval: float = 300.0):
+        if max_sessions < 1 or max_history < 1:
+            raise ValueError("max_sessions and max_history must be positive")
+        self.max_sessions = max_sessions
+        self.ttl_hours = ttl_hours
+        self.max_history = max_history
+        self.sweep_interval = sweep_interval
+        self.sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self.evicted = 0
+        self.expired = 0
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
     
     def get_or_create_session(self, session_id: Optional[str] = None) -> Session:
-        if session_id and session_id in self.sessions:
-            session = self.sessions[session_id]
-            if not session.is_expired():
-                return session
-        
-        session = Session(session_id)
+        with self._lock:
+            if session_id:
+                session = self.sessions.get(session_id)
+                if session is None:
+                    session = self._load(session_id)
+                if session is not None:
+                    if not session.is_expired():
+                        self._remember(session)
+                        return session
+                    self._discard(session_id)
+                    self.expired += 1
+            
+            session = self._new_session(session_id)
+            self._remember(session)
+            return session
+    
+    def _new_session(self, session_id: Optional[str]) -> Session:
+        return Session(session_id, ttl_hours=self.ttl_hours, max_history=self.max_history)
+    
+    def _remember(self, session: Session) -> None:
+        """Mark ``session`` most recently used and enforce the cap."""
         self.sessions[session.session_id] = session
-        return session
\ No newline at end of file
+        self.sessions.move_to_end(session.session_id)
+        while len(self.sessions) > self.max_sessions:
+            self.sessions.popitem(last=False)
+            self.evicted += 1
+    
+    def _load(self, session_id: str) -> Optional[Session]:
+        """Hook for persistent stores: fetch a session not held in memory."""
+        return None
+    
+    def _discard(self, session_id: str) -> None:
+        self.sessions.pop(session_id, None)
+    
+    def sweep(self) -> int:
+        """Remove expired sessions; returns how many were removed."""
+        with self._lock:
+            expired = [sid for sid, session in self.sessions.items() if session.is_expired()]
+            for session_id in expired:
+                self._discard(session_id)
+            self.expired += len(expired)
+        if expired:
+            logger.info(f"Swept {len(expired)} expired sessions")
+        return len(expired)
+    
+    def start(self) -> "SessionManager":
+        """Sweep expired sessions every ``sweep_interval`` seconds."""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="session-sweeper", daemon=True)
+            self._thread.start()
+        return self
+    
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+    
+    def _run(self) -> None:
+        while not self._stop.wait(self.sweep_interval):
+            try:
+                self.sweep()
+            except Exception as e:  # keep sweeping after unexpected errors
+                logger.exception(f"Session sweep failed: {e}")
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "sessions": len(self.sessions),
+                "max_sessions": self.max_sessions,
+                "evicted": self.evicted,
+                "expired": self.expired
+            }
+
+class SQLiteSessionManager(SessionManager):
+    """Session manager persisted to a local SQLite file.
+    
+    Sessions and their last ``max_history`` exchanges survive restarts.
+    Only ``max_sessions`` recently used sessions stay in memory; the rest
+    are loaded back from disk when their id returns. Sweeping deletes
+    expired sessions from disk as well.
+    """
+    
+    def __init__(self, path: str, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "session_id TEXT PRIMARY KEY, created_at TEXT NOT NULL, expires_at TEXT NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS session_messages ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT NOT NULL, "
+            "question TEXT NOT NULL, answer TEXT NOT NULL, timestamp TEXT NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS session_messages_session ON session_messages (session_id, id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS sessions_expires ON sessions (expires_at)")
+    
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+    
+    def _new_session(self, session_id: Optional[str]) -> Session:
+        session = super()._new_session(session_id)
+        session.on_message = self._save_message
+        self._connection().execute(
+            "INSERT OR REPLACE INTO sessions (session_id, created_at, expires_at) VALUES (?, ?, ?)",
+            (session.session_id, session.created_at.isoformat(), session.expires_at.isoformat())
+        )
+        return session
+    
+    def _load(self, session_id: str) -> Optional[Session]:
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT created_at, expires_at FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        
+        session = Session(session_id, ttl_hours=self.ttl_hours, max_history=self.max_history)
+        session.created_at = datetime.fromisoformat(row[0])
+        session.expires_at = datetime.fromisoformat(row[1])
+        messages = conn.execute(
+            "SELECT question, answer, timestamp FROM session_messages WHERE session_id = ? "
+            "ORDER BY id DESC LIMIT ?", (session_id, self.max_history)
+        ).fetchall()
+        session.history = [
+            {"question": q, "answer": a, "timestamp": ts} for q, a, ts in reversed(messages)
+        ]
+        session.on_message = self._save_message
+        return session
+    
+    def _save_message(self, session: Session, message: Dict[str, str]) -> None:
+        conn = self._connection()
+        conn.execute("BEGIN")
+        try:
+            conn.execute(
+                "INSERT INTO session_messages (session_id, question, answer, timestamp) VALUES (?, ?, ?, ?)",
+                (session.session_id, message["question"], message["answer"], message["timestamp"])
+            )
+            # Keep only the newest max_history exchanges on disk too
+            conn.execute(
+                "DELETE FROM session_messages WHERE session_id = ? AND id NOT IN ("
+                "SELECT id FROM session_messages WHERE session_id = ? ORDER BY id DESC LIMIT ?)",
+                (session.session_id, session.session_id, self.max_history)
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+    
+    def _discard(self, session_id: str) -> None:
+        super()._discard(session_id)
+        conn = self._connection()
+        conn.execute("DELETE FROM session_messages WHERE session_id = ?", (session_id,))
+        conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+    
+    def sweep(self) -> int:
+        removed = super().sweep()
+        # Sessions that were evicted from memory expire on disk only
+        now = datetime.now().isoformat()
+        conn = self._connection()
+        conn.execute("BEGIN")
+        try:
+            conn.execute(
+                "DELETE FROM session_messages WHERE session_id IN ("
+                "SELECT session_id FROM sessions WHERE expires_at < ?)", (now,)
+            )
+            removed += conn.execute("DELETE FROM sessions WHERE expires_at < ?", (now,)).rowcount
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return removed
+    
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats["stored_sessions"] = self._connection().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        return stats
+
+def create_session_manager(config: Optional[SessionConfig] = None) -> SessionManager:
+    """Build the session store selected by ``SessionConfig.backend``."""
+    config = config or SessionConfig.from_env()
+    options = dict(max_sessions=config.max_sessions, ttl_hours=config.ttl_hours,
+                   max_history=config.max_history, sweep_interval=config.sweep_interval)
+    if config.backend == "memory":
+        return SessionManager(**options)
+    if config.backend == "sqlite":
+        return SQLiteSessionManager(config.sqlite_path, **options)
+    raise ValueError(f"Unknown session backend '{config.backend}'. Choose one of: memory, sqlite")
@@ -0,0 +1,121 @@
+"""Background start-up of the RAG system and a start-up time benchmark.
+
+Nothing heavy is imported here at module level: ``src.rag_pipeline`` (and
+through it numpy, pyarrow and the retrieval backends) is imported by the
+warm-up thread, so a server can bind its port first and report readiness
+once the index is open and the embedding model is loaded.
+"""
+
+import argparse
+import importlib
+import json
+import sys
+import threading
+import time
+from contextlib import redirect_stdout
+from typing import Any, Callable, Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Startup:
+    """Builds and warms the RAG system on a background thread.
+
+    ``factory`` returns the system to serve and defaults to ``RAGSystem()``.
+    Stages run in order: ``import``, ``index_open`` and ``warm_up`` (timed
+    as ``model_load`` and ``first_search``), all in seconds. ``ready`` is set only after
+    all of them succeed; a failure is kept in ``error``.
+    """
+
+    def __init__(self, factory: Optional[Callable[[], Any]] = None):
+        self.factory = factory
+        self.system = None
+        self.stage = "pending"
+        self.error: Optional[str] = None
+        self.timings: Dict[str, float] = {}
+        self.ready = threading.Event()
+        self._finished = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> "Startup":
+        """Start warming up; calling it again is a no-op."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="warm-up", daemon=True)
+                self._thread.start()
+        return self
+
+    def wait(self, timeout: Optional[float] = None) -> Any:
+        """Block until warm-up ends; returns the system, or None on timeout or failure."""
+        self._finished.wait(timeout)
+        return self.system if self.ready.is_set() else None
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready.is_set(),
+            "stage": self.stage,
+            "error": self.error,
+            "timings": {name: round(seconds, 3) for name, seconds in self.timings.items()}
+        }
+
+    def _timed(self, stage: str, func: Callable[[], Any]) -> Any:
+        self.stage = stage
+        start = time.perf_counter()
+        result = func()
+        self.timings[stage] = time.perf_counter() - start
+        return result
+
+    def _run(self) -> None:
+        try:
+            rag_pipeline = self._timed("import", lambda: importlib.import_module("src.rag_pipeline"))
+            factory = self.factory or rag_pipeline.RAGSystem
+            system = self._timed("index_open", factory)
+            self.stage = "warm_up"
+            for stage, seconds in system.warm_up().items():
+                self.timings[stage] = seconds
+            self.system = system
+            self.stage = "ready"
+            self.ready.set()
+            logger.info(f"RAG system ready: {self.status()['timings']}")
+        except Exception as e:
+            self.error = f"{self.stage} failed: {e}"
+            self.stage = "failed"
+            logger.exception(f"Start-up failed during {self.error}")
+        finally:
+            self._finished.set()
+
+def benchmark() -> Dict[str, Any]:
+    """Time a cold start in this process.
+
+    Run it in a fresh interpreter (``python -m src.startup``); if the RAG
+    modules were already imported the ``import`` figure is meaningless.
+    """
+    startup = Startup()
+    startup.start().wait()
+    status = startup.status()
+    status["total"] = round(sum(startup.timings.values()), 3)
+    return status
+
+def main():
+    parser = argparse.ArgumentParser(description="Break down RAG system start-up time")
+    parser.add_argument("--json", action="store_true", help="Print the timings as JSON")
+    args = parser.parse_args()
+
+    if args.json:
+        # Keep stdout clean for the JSON; RAGSystem prints progress
+        with redirect_stdout(sys.stderr):
+            result = benchmark()
+        print(json.dumps(result, indent=2))
+        return
+
+    result = benchmark()
+    print(f" {'stage':<14}  {'seconds':>8}")
+    for stage, seconds in result["timings"].items():
+        print(f" {stage:<14}  {seconds:>8.3f}")
+    print(f" {'total':<14}  {result['total']:>8.3f}")
+    if result["error"]:
+        print(f" Start-up did not finish: {result['error']}")
+
+if __name__ == "__main__":
+    main()
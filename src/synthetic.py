@@ -0,0 +1,277 @@
+"""Synthetic complaint corpus and a deterministic stand-in embedder.
+
+Used by the benchmark and load-test tools so they run offline, without
+the real data or the sentence-transformer model.
+
+``SyntheticEncoder`` embeds text as the normalised sum of fixed random
+vectors, one per word (derived from a hash of the word and the seed).
+Texts that share words get similar vectors, so retrieval over the
+synthetic corpus behaves like real semantic search: a question about
+"late fees" on a credit card finds credit card complaints about fees.
+
+Because the sum is linear, ``write_corpus`` embeds each template
+sentence once and builds document vectors from sentence vectors, which
+writes a 1M-row corpus in well under a minute.
+
+Usage:
+    python -m src.synthetic --rows 100000 --output data/synthetic_100k.parquet
+"""
+
+import argparse
+import hashlib
+import re
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+import logging
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIM = 384  # same as all-MiniLM-L6-v2
+SENTENCES_PER_CHUNK = (2, 3)  # topic sentences, filler sentences
+
+# product_category -> (products, issues, topic phrases)
+CATEGORIES = {
+    "Credit card": (
+        ["Credit card", "Store credit card", "General-purpose credit card"],
+        ["Problem with a purchase shown on your statement", "Fees or interest",
+         "Getting a credit card", "Closing your account"],
+        ["unauthorized charges appeared on my credit card", "the card was used for fraud",
+         "a late fee was charged although I paid on time", "the interest rate went up without notice",
+         "my credit limit was lowered", "the dispute of a card charge was denied",
+         "the card was closed without warning", "reward points disappeared from the card"]
+    ),
+    "Personal loan": (
+        ["Personal line of credit", "Installment loan", "Payday loan"],
+        ["Struggling to pay your loan", "Charged fees or interest you didn't expect",
+         "Problem with the payoff process"],
+        ["the loan payment was applied late", "the lender added fees to the loan balance",
+         "I could not get a payoff amount for the loan", "the loan servicer kept calling me",
+         "the interest on the loan was higher than agreed", "my loan application was denied"]
+    ),
+    "Buy Now, Pay Later": (
+        ["Buy now pay later plan", "Installment payment plan"],
+        ["Problem with a purchase or transfer", "Incorrect information on your report"],
+        ["the pay later plan charged me twice", "an installment was taken after I cancelled the order",
+         "the refund was never applied to the installment plan", "the plan reported a missed payment",
+         "autopay pulled the installment early"]
+    ),
+    "Savings account": (
+        ["Savings account", "Checking account", "Certificate of deposit"],
+        ["Managing an account", "Closing an account", "Problem caused by your funds being low"],
+        ["the bank charged an account maintenance fee", "overdraft fees were charged on my account",
+         "the bank froze my savings account", "a deposit never showed up in my account",
+         "the account was closed and the funds held", "interest was not paid on the savings balance"]
+    ),
+    "Money transfer": (
+        ["Domestic money transfer", "International money transfer", "Mobile wallet"],
+        ["Money was not available when promised", "Fraud or scam", "Other transaction problem"],
+        ["the money transfer was delayed for weeks", "the transfer was sent to the wrong recipient",
+         "a scammer received my transfer and the bank refused to help",
+         "the wire transfer fee was not disclosed", "the transfer was cancelled but not refunded"]
+    ),
+}
+
+COMPANIES = ["Capital One", "JPMorgan Chase", "Citibank", "Bank of America", "Wells Fargo",
+             "Synchrony Financial", "Discover", "American Express", "PayPal", "Affirm",
+             "Klarna", "Western Union"]
+STATES = ["CA", "TX", "FL", "NY", "PA", "IL", "OH", "GA", "NC", "MI"]
+
+FILLERS = [
+    "I contacted customer service several times", "nobody gave me a clear answer",
+    "I was transferred between departments for hours", "they promised to call back but never did",
+    "I sent all the documents they asked for", "this has affected my credit score",
+    "I have been a customer for many years", "the representative was rude",
+    "I filed a complaint with the company first", "the problem started last month",
+    "I am asking for a full refund", "they keep sending automated letters",
+    "the online portal shows a different amount", "I want this resolved as soon as possible",
+    "the branch manager could not help", "I was told to wait another thirty days",
+]
+
+QUESTION_TEMPLATES = [
+    "Why are customers unhappy with {product}?",
+    "What problems do people report when {phrase}?",
+    "Which companies have complaints where {phrase}?",
+    "Summarize complaints about {issue}",
+    "{phrase}",
+]
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+class SyntheticEncoder:
+    """Deterministic bag-of-words embedder with the ``QueryEncoder`` interface."""
+
+    def __init__(self, dim: int = DEFAULT_DIM, seed: int = 0):
+        self.dim = dim
+        self.seed = seed
+        self.model_name = f"synthetic-{dim}-{seed}"
+        self._vectors: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def _word_vector(self, word: str) -> np.ndarray:
+        vector = self._vectors.get(word)
+        if vector is None:
+            digest = int.from_bytes(hashlib.blake2b(word.encode(), digest_size=8).digest(), "little")
+            vector = np.random.default_rng([self.seed, digest]).standard_normal(self.dim).astype(np.float32)
+            with self._lock:
+                self._vectors[word] = vector
+        return vector
+
+    def embed_sum(self, text: str) -> np.ndarray:
+        """Unnormalised sum of the word vectors of ``text``."""
+        words = _WORD.findall(text.lower())
+        if not words:
+            return np.zeros(self.dim, dtype=np.float32)
+        return np.sum([self._word_vector(w) for w in words], axis=0, dtype=np.float32)
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Embed ``texts``, L2-normalised, like ``QueryEncoder.encode``."""
+        vectors = np.stack([self.embed_sum(t) for t in texts]) if texts else np.empty((0, self.dim), np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+def _sentences() -> List[str]:
+    # Every topic phrase (per category, then the shared fillers); chunk
+    # documents are sentences from this list, so their vectors are sums
+    # of the per-sentence vectors
+    sentences = []
+    for _, _, phrases in CATEGORIES.values():
+        sentences.extend(phrases)
+    sentences.extend(FILLERS)
+    return sentences
+
+def _metadata_array(categories: np.ndarray, rng: np.random.Generator,
+                    complaint_ids: np.ndarray, chunk_index: np.ndarray,
+                    total_chunks: np.ndarray) -> pa.StructArray:
+    names = list(CATEGORIES)
+    n = len(categories)
+    product = np.empty(n, dtype=object)
+    issue = np.empty(n, dtype=object)
+    for c, (products, issues, _) in enumerate(CATEGORIES.values()):
+        rows = np.flatnonzero(categories == c)
+        product[rows] = np.asarray(products, dtype=object)[rng.integers(len(products), size=len(rows))]
+        issue[rows] = np.asarray(issues, dtype=object)[rng.integers(len(issues), size=len(rows))]
+
+    return pa.StructArray.from_arrays(
+        [
+            pa.array(np.asarray(names, dtype=object)[categories], pa.string()),
+            pa.array(product, pa.string()),
+            pa.array(issue, pa.string()),
+            pa.array([""] * n, pa.string()),
+            pa.array(np.asarray(COMPANIES, dtype=object)[rng.integers(len(COMPANIES), size=n)], pa.string()),
+            pa.array(np.asarray(STATES, dtype=object)[rng.integers(len(STATES), size=n)], pa.string()),
+            pa.array(complaint_ids.astype(str), pa.string()),
+            pa.array(chunk_index, pa.int64()),
+            pa.array(total_chunks, pa.int64()),
+        ],
+        names=["product_category", "product", "issue", "sub_issue", "company", "state",
+               "complaint_id", "chunk_index", "total_chunks"]
+    )
+
+def _complaint_layout(rows: int, rng: np.random.Generator):
+    """Split ``rows`` chunks into complaints of 1-3 chunks each."""
+    sizes = rng.integers(1, 4, size=rows)
+    ends = np.cumsum(sizes)
+    sizes = sizes[:np.searchsorted(ends, rows) + 1]
+    sizes[-1] -= sizes.sum() - rows
+    complaint_of_chunk = np.repeat(np.arange(len(sizes)), sizes)
+    starts = np.repeat(np.cumsum(sizes) - sizes, sizes)
+    return complaint_of_chunk, np.arange(rows) - starts, np.repeat(sizes, sizes)
+
+def iter_corpus_batches(rows: int, dim: int = DEFAULT_DIM, seed: int = 0,
+                        batch_size: int = 10_000) -> Iterator[pa.RecordBatch]:
+    """Yield the synthetic corpus as Arrow batches in the embeddings schema."""
+    if rows < 1:
+        raise ValueError("rows must be positive")
+    rng = np.random.default_rng(seed)
+    encoder = SyntheticEncoder(dim, seed)
+    sentences = _sentences()
+    sentence_vectors = np.stack([encoder.embed_sum(s) for s in sentences])
+    sentence_array = np.asarray(sentences, dtype=object)
+
+    # Topic sentences of category c occupy offsets[c]:offsets[c + 1]
+    counts = [len(phrases) for _, _, phrases in CATEGORIES.values()]
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    filler_start = offsets[-1]
+
+    complaint_of_chunk, chunk_index, total_chunks = _complaint_layout(rows, rng)
+    # Every chunk of a complaint shares its category
+    complaint_category = rng.integers(len(CATEGORIES), size=complaint_of_chunk[-1] + 1)
+
+    topics, fillers = SENTENCES_PER_CHUNK
+    for start in range(0, rows, batch_size):
+        end = min(start + batch_size, rows)
+        n = end - start
+        categories = complaint_category[complaint_of_chunk[start:end]]
+
+        topic = offsets[categories][:, None] + (
+            rng.random((n, topics)) * np.asarray(counts)[categories][:, None]).astype(np.int64)
+        filler = filler_start + rng.integers(len(FILLERS), size=(n, fillers))
+        picks = np.concatenate([topic, filler], axis=1)
+
+        vectors = sentence_vectors[picks].sum(axis=1)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        documents = [". ".join(row) + "." for row in sentence_array[picks]]
+
+        complaint_ids = 100_000 + complaint_of_chunk[start:end]
+        yield pa.RecordBatch.from_arrays(
+            [
+                pa.array([f"{c}_{i}" for c, i in zip(complaint_ids, chunk_index[start:end])], pa.string()),
+                pa.array(documents, pa.string()),
+                pa.ListArray.from_arrays(
+                    pa.array(np.arange(0, (n + 1) * dim, dim, dtype=np.int32)),
+                    pa.array(vectors.astype(np.float32).ravel())
+                ),
+                _metadata_array(categories, rng, complaint_ids, chunk_index[start:end],
+                                total_chunks[start:end]),
+            ],
+            names=["id", "document", "embedding", "metadata"]
+        )
+
+def write_corpus(path: str, rows: int, dim: int = DEFAULT_DIM, seed: int = 0,
+                 row_group_size: int = 10_000) -> str:
+    """Write a ``complaint_embeddings.parquet``-shaped file with ``rows`` chunks."""
+    start = time.perf_counter()
+    writer: Optional[pq.ParquetWriter] = None
+    try:
+        for batch in iter_corpus_batches(rows, dim, seed, row_group_size):
+            if writer is None:
+                writer = pq.ParquetWriter(path, batch.schema)
+            writer.write_batch(batch)
+    finally:
+        if writer is not None:
+            writer.close()
+    logger.info(f"Wrote {rows:,} synthetic chunks to {path} in {time.perf_counter() - start:.1f}s")
+    return path
+
+def sample_questions(n: int, seed: int = 0) -> List[str]:
+    """``n`` questions phrased like real users', spread over the categories."""
+    rng = np.random.default_rng(seed + 1)
+    categories = list(CATEGORIES.values())
+    questions = []
+    for _ in range(n):
+        products, issues, phrases = categories[rng.integers(len(categories))]
+        template = QUESTION_TEMPLATES[rng.integers(len(QUESTION_TEMPLATES))]
+        questions.append(template.format(
+            product=products[rng.integers(len(products))].lower(),
+            issue=issues[rng.integers(len(issues))].lower(),
+            phrase=phrases[rng.integers(len(phrases))]
+        ))
+    return questions
+
+def main(argv: Optional[List[str]] = None) -> None:
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Write a synthetic complaint embeddings parquet")
+    parser.add_argument("--rows", type=int, default=10_000, help="Chunks to generate")
+    parser.add_argument("--dim", type=int, default=DEFAULT_DIM, help="Embedding dimension")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--output", default="data/synthetic_embeddings.parquet", help="Parquet file to write")
+    args = parser.parse_args(argv)
+    write_corpus(args.output, args.rows, args.dim, args.seed)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""Per-request traces with timed spans, and sampled profiling.
+
+``start_trace`` opens a trace for one request; ``span`` records a timed,
+nested section of it. The active trace lives in a context variable, so
+it follows the request into ``@timeout`` workers, ``run_in_context``
+executors and the hybrid BM25 thread, which all copy the caller's
+context. Outside a trace ``span`` costs one context-variable lookup.
+
+Profiling is switched on with ``PROFILE_MODE`` (``cprofile`` or
+``tracemalloc``). A ``PROFILE_SAMPLE_RATE`` share of traces is always
+written out; with ``PROFILE_SLOW_MS`` set, every trace is profiled and
+kept only if it ran at least that long. Output goes to ``PROFILE_DIR``.
+"""
+
+import contextvars
+import cProfile
+import json
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+import logging
+
+from src.config import TracingConfig
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ("off", "cprofile", "tracemalloc")
+
+@dataclass
+class Span:
+    span_id: int
+    name: str
+    parent_id: Optional[int]
+    start_ms: float  # offset from the start of the trace
+    duration_ms: float = 0.0
+    thread: str = ""
+
+@dataclass
+class Trace:
+    name: str
+    trace_id: str = field(default_factory=lambda: uuid.uuid4().hex[:16])
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    spans: List[Span] = field(default_factory=list)
+    duration_ms: float = 0.0
+    profile_mode: str = "off"
+    started: float = field(default_factory=time.perf_counter)
+    _profiles: List[cProfile.Profile] = field(default_factory=list, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def _open(self, name: str, parent_id: Optional[int]) -> Span:
+        with self._lock:
+            span = Span(len(self.spans) + 1, name, parent_id,
+                        (time.perf_counter() - self.started) * 1000,
+                        thread=threading.current_thread().name)
+            self.spans.append(span)
+        return span
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "spans": [
+                {"id": s.span_id, "name": s.name, "parent": s.parent_id,
+                 "start_ms": round(s.start_ms, 3), "duration_ms": round(s.duration_ms, 3),
+                 "thread": s.thread}
+                for s in self.spans
+            ]
+        }
+
+    def summary(self) -> str:
+        """One line: total, then each span's duration in start order."""
+        depth: Dict[Optional[int], int] = {None: 0}
+        parts = []
+        for s in self.spans:
+            depth[s.span_id] = depth.get(s.parent_id, 0) + 1
+            parts.append(f"{'>' * (depth[s.span_id] - 1)}{s.name}={s.duration_ms:.1f}ms")
+        return f"{self.name} {self.duration_ms:.1f}ms [{self.trace_id}] " + " ".join(parts)
+
+_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("trace", default=None)
+_span_id: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar("trace_span", default=None)
+_thread_state = threading.local()
+
+_config: Optional[TracingConfig] = None
+_tracemalloc_lock = threading.Lock()
+
+def get_config() -> TracingConfig:
+    global _config
+    if _config is None:
+        _config = TracingConfig.from_env()
+        if _config.profile_mode not in PROFILE_MODES:
+            logger.warning(f"Unknown PROFILE_MODE '{_config.profile_mode}', profiling disabled")
+            _config.profile_mode = "off"
+    return _config
+
+def configure(config: Optional[TracingConfig]) -> None:
+    """Replace the tracing settings (None re-reads the environment)."""
+    global _config
+    _config = config
+
+def current_trace() -> Optional[Trace]:
+    return _trace.get()
+
+def _should_profile(config: TracingConfig) -> bool:
+    if config.profile_mode == "off":
+        return False
+    return config.profile_slow_ms > 0 or random.random() < config.profile_sample_rate
+
+@contextmanager
+def start_trace(name: str, **attributes: Any) -> Iterator[Trace]:
+    """Trace the ``with`` block as one request; nested calls join it.
+
+    Don't ``yield`` from a generator inside the block: the trace is bound
+    to the current context until the block exits.
+    """
+    if _trace.get() is not None:
+        with span(name):
+            yield _trace.get()
+        return
+
+    config = get_config()
+    trace = Trace(name, attributes=dict(attributes))
+    if _should_profile(config):
+        trace.profile_mode = config.profile_mode
+    started_tracemalloc = trace.profile_mode == "tracemalloc" and _start_tracemalloc()
+
+    trace_token = _trace.set(trace)
+    span_token = _span_id.set(None)
+    try:
+        with _thread_profile(trace):
+            yield trace
+    finally:
+        trace.duration_ms = (time.perf_counter() - trace.started) * 1000
+        _span_id.reset(span_token)
+        _trace.reset(trace_token)
+        snapshot = tracemalloc.take_snapshot() if started_tracemalloc else None
+        if started_tracemalloc:
+            tracemalloc.stop()
+            _tracemalloc_lock.release()
+        _finish(trace, config, snapshot)
+
+@contextmanager
+def span(name: str) -> Iterator[Optional[Span]]:
+    """Record the ``with`` block (or decorated sync function) as a span."""
+    trace = _trace.get()
+    if trace is None:
+        yield None
+        return
+
+    current = trace._open(name, _span_id.get())
+    token = _span_id.set(current.span_id)
+    start = time.perf_counter()
+    try:
+        with _thread_profile(trace):
+            yield current
+    finally:
+        current.duration_ms = (time.perf_counter() - start) * 1000
+        _span_id.reset(token)
+
+@contextmanager
+def _thread_profile(trace: Trace):
+    """cProfile only sees the thread it runs on, so profile each thread the trace enters."""
+    # One profiler per thread: skip threads already profiling this or
+    # another trace (an event loop interleaves requests) or run by a debugger
+    if (trace.profile_mode != "cprofile" or getattr(_thread_state, "profiling", False)
+            or sys.getprofile() is not None):
+        yield
+        return
+
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError:  # Python 3.12+: another profiling tool is active
+        yield
+        return
+    _thread_state.profiling = True
+    try:
+        yield
+    finally:
+        profile.disable()
+        _thread_state.profiling = False
+        with trace._lock:
+            trace._profiles.append(profile)
+
+def _start_tracemalloc() -> bool:
+    # tracemalloc is process-wide: capture one trace at a time
+    if tracemalloc.is_tracing() or not _tracemalloc_lock.acquire(blocking=False):
+        return False
+    tracemalloc.start(10)
+    return True
+
+def _finish(trace: Trace, config: TracingConfig, snapshot) -> None:
+    slow = config.trace_slow_ms > 0 and trace.duration_ms >= config.trace_slow_ms
+    if slow:
+        logger.warning(f"Slow request: {trace.summary()}")
+    else:
+        logger.debug(trace.summary())
+
+    if trace.profile_mode == "off":
+        return
+    keep = (config.profile_slow_ms <= 0
+            or trace.duration_ms >= config.profile_slow_ms
+            or random.random() < config.profile_sample_rate)
+    if keep:
+        try:
+            write_profile(trace, config.profile_dir, snapshot)
+        except Exception as e:
+            logger.error(f"Could not write profile for trace {trace.trace_id}: {e}")
+
+def write_profile(trace: Trace, directory: str, snapshot=None) -> List[str]:
+    """Write the trace's spans and profile data; returns the files written."""
+    os.makedirs(directory, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    prefix = os.path.join(directory, f"{stamp}_{trace.name}_{trace.trace_id}")
+    written = []
+
+    with open(prefix + ".trace.json", "w") as f:
+        json.dump(trace.to_dict(), f, indent=2, default=str)
+    written.append(prefix + ".trace.json")
+
+    if trace._profiles:
+        stats = pstats.Stats(trace._profiles[0])
+        for profile in trace._profiles[1:]:
+            stats.add(profile)
+        stats.dump_stats(prefix + ".prof")
+        written.append(prefix + ".prof")
+
+    if snapshot is not None:
+        snapshot.dump(prefix + ".tracemalloc")
+        with open(prefix + ".tracemalloc.txt", "w") as f:
+            for stat in snapshot.statistics("lineno")[:25]:
+                f.write(f"{stat}\n")
+        written.extend([prefix + ".tracemalloc", prefix + ".tracemalloc.txt"])
+
+    logger.info(f"Wrote profile for trace {trace.trace_id} ({trace.duration_ms:.0f}ms) to {prefix}.*")
+    return written
@@ -0,0 +1,72 @@
+"""Tests for micro-batching of concurrent vector searches."""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from src.metrics import Histogram
+from src.retrieval.batching import MicroBatcher
+from src.retrieval.filters import normalize_filters
+from src.retrieval.numpy_backend import NumpyBackend
+
+class RecordingEncoder:
+    """Deterministic encoder that records the size of every call."""
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def encode(self, texts):
+        with self.lock:
+            self.calls.append(len(texts))
+        return np.stack([self.vectors[int(t)] for t in texts])
+
+def _backend(embeddings):
+    n = len(embeddings)
+    return NumpyBackend([str(i) for i in range(n)], ["text"] * n,
+                        [{"state": ["CA", "NY"][i % 2]} for i in range(n)], embeddings)
+
+def test_concurrent_searches_share_one_batch():
+    embeddings = np.random.default_rng(0).standard_normal((50, 8)).astype(np.float32)
+    backend = _backend(embeddings)
+    encoder = RecordingEncoder(embeddings)
+    batcher = MicroBatcher(encoder, backend, window_ms=200, max_batch_size=8)
+    try:
+        with ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(lambda i: batcher.search(str(i), k=3), range(8)))
+    finally:
+        batcher.close()
+
+    assert encoder.calls == [8]
+    for i, hits in enumerate(results):
+        assert len(hits) == 3 and hits[0].id == str(i)
+    stats = batcher.stats()
+    assert stats["batch_size"]["count"] == 1 and stats["batch_size"]["max"] == 8
+    assert stats["queue_wait_ms"]["count"] == 8
+
+def test_mixed_k_and_filters_are_answered_per_caller():
+    embeddings = np.random.default_rng(1).standard_normal((50, 8)).astype(np.float32)
+    backend = _backend(embeddings)
+    batcher = MicroBatcher(RecordingEncoder(embeddings), backend, window_ms=100)
+    ca = normalize_filters({"state": "CA"})
+    try:
+        with ThreadPoolExecutor(2) as pool:
+            plain = pool.submit(batcher.search, "3", 2)
+            filtered = pool.submit(batcher.search, "4", 5, ca)
+            plain, filtered = plain.result(), filtered.result()
+    finally:
+        batcher.close()
+
+    assert [h.id for h in plain] == [h.id for h in backend.search(embeddings[3], 2)[0]]
+    assert len(filtered) == 5 and all(h.metadata["state"] == "CA" for h in filtered)
+
+def test_histogram_quantiles():
+    histogram = Histogram(buckets=(1, 10, 100))
+    for value in [0.5] * 50 + [5] * 45 + [50] * 5:
+        histogram.observe(value)
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 100
+    assert snapshot["p50"] <= 1 < snapshot["p95"] <= 10
+    assert snapshot["buckets"][10.0] == 95 and snapshot["buckets"][float("inf")] == 100
@@ -0,0 +1,71 @@
+"""Tests for the synthetic corpus and the offline benchmark."""
+
+import numpy as np
+import pyarrow.parquet as pq
+
+from src.benchmark import BenchmarkConfig, compare, latency_summary, run
+from src.retrieval.arrow_io import embedding_matrix, metadata_records
+from src.synthetic import CATEGORIES, SyntheticEncoder, sample_questions, write_corpus
+
+def test_corpus_matches_embeddings_schema(tmp_path):
+    path = write_corpus(str(tmp_path / "corpus.parquet"), rows=2_500, dim=16, row_group_size=1_000)
+    parquet = pq.ParquetFile(path)
+    assert parquet.num_row_groups == 3
+
+    table = parquet.read()
+    assert table.column_names == ["id", "document", "embedding", "metadata"]
+    embeddings = embedding_matrix(table.column("embedding"))
+    assert embeddings.shape == (2_500, 16)
+    assert np.allclose(np.linalg.norm(embeddings, axis=1), 1.0, atol=1e-5)
+
+    metadatas = metadata_records(table.column("metadata"))
+    assert {m["product_category"] for m in metadatas} == set(CATEGORIES)
+    for doc_id, meta in zip(table.column("id").to_pylist()[:50], metadatas):
+        assert doc_id == f"{meta['complaint_id']}_{meta['chunk_index']}"
+        assert 0 <= meta["chunk_index"] < meta["total_chunks"] <= 3
+
+def test_corpus_vectors_are_the_encoder_embeddings(tmp_path):
+    """Documents embed like queries, and the same seed gives the same file."""
+    first = pq.read_table(write_corpus(str(tmp_path / "a.parquet"), rows=200, dim=32, seed=7))
+    second = pq.read_table(write_corpus(str(tmp_path / "b.parquet"), rows=200, dim=32, seed=7))
+    assert first.equals(second)
+
+    encoder = SyntheticEncoder(dim=32, seed=7)
+    documents = first.column("document").to_pylist()[:20]
+    stored = embedding_matrix(first.column("embedding"))[:20]
+    assert np.allclose(encoder.encode(documents), stored, atol=1e-5)
+
+def test_questions_find_their_category():
+    encoder = SyntheticEncoder(dim=64)
+    phrases = [(category, phrases[0]) for category, (_, _, phrases) in CATEGORIES.items()]
+    topics = encoder.encode([p for _, p in phrases])
+    queries = encoder.encode([f"What problems do people report when {p}?" for _, p in phrases])
+    assert list(np.argmax(queries @ topics.T, axis=1)) == list(range(len(phrases)))
+    assert sample_questions(10) == sample_questions(10)
+
+def test_latency_summary_and_compare():
+    summary = latency_summary(list(range(1, 101)), wall_seconds=2.0)
+    assert summary["calls"] == 100
+    assert summary["p50_ms"] == 50.5
+    assert summary["qps"] == 50.0
+
+    def report(p50):
+        return {"results": [{"rows": 10, "ingest": {"rows_per_second": 100.0},
+                             "retrieve": {"k=5": {"p50_ms": p50, "p99_ms": 4.0, "qps": 10.0}},
+                             "answer": {"p50_ms": 1.0, "p99_ms": 2.0}}]}
+
+    lines = compare(report(2.0), report(1.0))
+    assert any("k=5" in line and "p50_ms" in line and "-50.0%" in line for line in lines)
+
+def test_run_offline_with_numpy_backend(tmp_path):
+    config = BenchmarkConfig(rows=[300], ks=[1, 5], queries=10, backend="numpy",
+                             dim=16, skip_ingest=True, work_dir=str(tmp_path))
+    report = run(config)
+
+    result = report["results"][0]
+    assert result["rows"] == 300
+    assert set(result["retrieve"]) == {"k=1", "k=5"}
+    assert result["retrieve"]["k=5"]["calls"] == 10
+    assert result["answer"]["p99_ms"] >= result["answer"]["p50_ms"] > 0
+    assert report["config"]["backend"] == "numpy"
+    assert not list(tmp_path.glob("store_*"))
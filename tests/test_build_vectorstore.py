@@ -0,0 +1,188 @@
+"""Tests for the streaming vector store ingest."""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src import build_vectorstore
+from src.build_vectorstore import (
+    ChromaWriter,
+    IngestCheckpoint,
+    IngestConfig,
+    RowGroupTracker,
+    ThroughputMeter,
+    _changed_embeddings,
+    _run_pipelined,
+    _with_group_sizes,
+    build_category_shards,
+    ingest,
+    ingest_incremental,
+    iter_row_groups,
+    prepare_batch,
+)
+from src.ingest_manifest import IngestManifest, content_hash
+from src.retrieval.sharded_backend import SHARDS_DIR, read_shard_manifest
+
+def _write_parquet(path, n=20, row_group_size=5):
+    embeddings = np.arange(n * 4, dtype=np.float32).reshape(n, 4)
+    table = pa.table({
+        "id": [f"doc{i}" for i in range(n)],
+        "document": [f"complaint {i}" for i in range(n)],
+        "embedding": pa.array([row.tolist() for row in embeddings], type=pa.list_(pa.float32())),
+        "metadata": pa.array([{"product": "Credit card", "chunk_index": i % 2} for i in range(n)])
+    })
+    pq.write_table(table, path, row_group_size=row_group_size)
+    return embeddings
+
+def test_prepare_batch_is_columnar(tmp_path):
+    """Batches convert to store-ready columns with defaults filled in."""
+    path = tmp_path / "emb.parquet"
+    embeddings = _write_parquet(path)
+
+    batch = next(pq.ParquetFile(path).iter_batches(batch_size=20))
+    chunk = prepare_batch(batch)
+
+    assert len(chunk) == 20
+    assert chunk.ids[3] == "doc3"
+    assert np.array_equal(chunk.embeddings, embeddings)
+    assert chunk.metadatas[1]["chunk_index"] == 1
+    assert chunk.metadatas[1]["company"] == ""
+    assert chunk.metadatas[1]["total_chunks"] == 1
+
+def test_iter_row_groups_resumes_from_offset(tmp_path):
+    path = tmp_path / "emb.parquet"
+    _write_parquet(path)
+
+    groups = [rg for rg, _ in iter_row_groups(pq.ParquetFile(path), start=2, batch_size=100)]
+    assert groups == [2, 3]
+
+def test_checkpoint_round_trip(tmp_path):
+    """Checkpoints resume for the same file and reset when it changes."""
+    source = tmp_path / "emb.parquet"
+    _write_parquet(source)
+    store = tmp_path / "store"
+
+    IngestCheckpoint(str(store), str(source)).save(next_row_group=3, rows_written=15)
+    assert IngestCheckpoint(str(store), str(source)).load() == (3, 15)
+
+    _write_parquet(source, n=25)
+    assert IngestCheckpoint(str(store), str(source)).load() == (0, 0)
+
+def test_tracker_advances_over_completed_prefix(tmp_path):
+    """Out-of-order batches only move the checkpoint past whole row groups."""
+    path = tmp_path / "emb.parquet"
+    _write_parquet(path, n=20, row_group_size=10)
+    items = list(_with_group_sizes(iter_row_groups(pq.ParquetFile(path), start=0, batch_size=4)))
+
+    # Row groups of 10 rows split into batches of 4, 4, 2
+    assert [(rg, size) for rg, _, size in items] == [(0, None), (0, None), (0, 3),
+                                                     (1, None), (1, None), (1, 3)]
+
+    tracker = RowGroupTracker(start=0)
+    assert not tracker.mark_done(1, None)
+    assert not tracker.mark_done(0, None)
+    assert not tracker.mark_done(1, 3)
+    assert not tracker.mark_done(0, None)
+    assert not tracker.mark_done(1, None)
+    assert tracker.mark_done(0, 3)
+    assert tracker.next_group == 2
+
+def test_manifest_detects_new_changed_and_removed_chunks(tmp_path):
+    """Only new or edited chunks are re-upserted; unseen ones become stale."""
+    first = IngestManifest(str(tmp_path))
+    hashes = [content_hash(f"text {i}", {"complaint_id": str(i)}) for i in range(3)]
+    assert first.changed_positions(["a", "b", "c"], hashes) == [0, 1, 2]
+    first.record([("a", "0", 0, hashes[0]), ("b", "1", 0, hashes[1]), ("c", "2", 0, hashes[2])])
+    first.close()
+
+    second = IngestManifest(str(tmp_path))
+    edited = content_hash("edited", {"complaint_id": "1"})
+    new = content_hash("text 3", {"complaint_id": "3"})
+    assert second.changed_positions(["a", "b", "d"], [hashes[0], edited, new]) == [1, 2]
+    second.record([("b", "1", 0, edited), ("d", "3", 0, new)])
+    assert second.stale_ids() == ["c"]
+    second.close()
+
+def test_changed_embeddings_reads_only_changed_rows(tmp_path):
+    path = tmp_path / "emb.parquet"
+    embeddings = _write_parquet(path, n=20, row_group_size=10)
+
+    rows = _changed_embeddings(pq.ParquetFile(path), row_group=1, changed=[1, 4, 5], batch_size=3)
+    assert np.array_equal(rows, embeddings[[11, 14, 15]])
+
+def test_incremental_after_full_ingest_only_touches_changes(tmp_path):
+    """A full build fills the manifest, so the next incremental run is a no-op."""
+    source = tmp_path / "emb.parquet"
+    _write_parquet(source)
+    config = IngestConfig(source=str(source), store_path=str(tmp_path / "store"),
+                          collection_name="test", read_batch_size=4)
+
+    assert ingest(config) == 20
+    stats = ingest_incremental(config)
+    assert stats["upserted"] == 0 and stats["unchanged"] == 20 and stats["deleted"] == 0
+
+def test_full_rebuild_drops_chunks_that_left_the_source(tmp_path):
+    source = tmp_path / "emb.parquet"
+    _write_parquet(source, n=20)
+    config = IngestConfig(source=str(source), store_path=str(tmp_path / "store"),
+                          collection_name="test")
+    ingest(config)
+
+    _write_parquet(source, n=12)
+    ingest(config)
+    writer = ChromaWriter(config.store_path, config.collection_name, config.write_batch_size)
+    assert writer.count() == 12
+    assert writer.collection.get(ids=["doc15"])["ids"] == []
+    assert ingest_incremental(config)["deleted"] == 0
+
+def test_pipeline_keeps_every_worker_busy(tmp_path, monkeypatch):
+    """More than queue_size batches can be in flight when workers > queue_size."""
+    source = tmp_path / "emb.parquet"
+    _write_parquet(source, n=40, row_group_size=2)
+    submitted = []
+    enough = threading.Event()
+
+    class CountingPool(ThreadPoolExecutor):
+        def submit(self, fn, *args):
+            submitted.append(1)
+            if len(submitted) >= 7:
+                enough.set()
+            return super().submit(fn, *args)
+
+    class BlockingWriter:
+        """Holds the first batch until seven are submitted or two seconds pass."""
+        busy = []
+
+        def write(self, chunk):
+            if not self.busy:
+                self.busy.append(enough.wait(timeout=2))
+
+    monkeypatch.setattr(build_vectorstore, "ProcessPoolExecutor", CountingPool)
+    batches = iter_row_groups(pq.ParquetFile(source), start=0, batch_size=2)
+    _run_pipelined(batches, BlockingWriter(), ThroughputMeter(40),
+                   IngestCheckpoint(str(tmp_path / "store"), str(source)), RowGroupTracker(0),
+                   workers=6, queue_size=2)
+    assert BlockingWriter.busy == [True]
+    assert len(submitted) == 20
+
+def test_category_shards_keep_colliding_slugs_apart(tmp_path):
+    """Categories that slug alike still get their own shard and manifest entry."""
+    source = tmp_path / "emb.parquet"
+    categories = ["Credit card", "Credit-card", "Credit card", "Mortgage"]
+    pq.write_table(pa.table({
+        "id": [f"doc{i}" for i in range(4)],
+        "document": [f"complaint {i}" for i in range(4)],
+        "embedding": pa.array([[1.0, float(i)] for i in range(4)], type=pa.list_(pa.float32())),
+        "metadata": pa.array([{"product_category": c, "complaint_id": str(i)} for i, c in enumerate(categories)])
+    }), source)
+    config = IngestConfig(source=str(source), store_path=str(tmp_path / "store"))
+
+    counts = build_category_shards(config)
+    manifest = read_shard_manifest(str(tmp_path / "store" / SHARDS_DIR))
+    assert sorted(counts.values()) == [1, 1, 2]
+    assert {entry["category"]: entry["count"] for entry in manifest["shards"]} == {
+        "Credit card": 2, "Credit-card": 1, "Mortgage": 1
+    }
@@ -0,0 +1,60 @@
+"""Tests for the LRU caches in front of the encoder and pipeline."""
+
+import time
+
+import numpy as np
+import pytest
+
+from src.cache import LRUCache
+from src.retrieval.encoder import CachedEncoder
+
+class CountingEncoder:
+    """Deterministic stand-in encoder that records how often it runs."""
+    model_name = "counting-encoder"
+
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts):
+        self.calls.append(list(texts))
+        return np.array([[len(t), 1.0] for t in texts], dtype=np.float32)
+
+def test_lru_eviction_order():
+    """Least recently used entry is evicted first."""
+    cache = LRUCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1      # "b" is now least recently used
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+def test_ttl_expiry():
+    """Entries older than the TTL are treated as misses."""
+    cache = LRUCache(max_size=10, ttl_seconds=0.05)
+    cache.set("q", "v")
+    assert cache.get("q") == "v"
+    time.sleep(0.1)
+    assert cache.get("q") is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+def test_invalid_size():
+    with pytest.raises(ValueError):
+        LRUCache(max_size=0)
+
+def test_cached_encoder_skips_model_on_repeat():
+    """Repeated questions are served from cache; only misses are encoded."""
+    inner = CountingEncoder()
+    encoder = CachedEncoder(inner, LRUCache(max_size=10))
+
+    first = encoder.encode(["credit card fee", "money transfer"])
+    second = encoder.encode(["money transfer", "credit card fee", "new question"])
+
+    assert inner.calls == [["credit card fee", "money transfer"], ["new question"]]
+    assert np.array_equal(first[0], second[1])
+    assert second.shape == (3, 2)
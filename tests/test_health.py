@@ -0,0 +1,49 @@
+"""Tests for the sampled, non-blocking health checker."""
+
+import time
+from types import SimpleNamespace
+
+from src.health import HealthChecker
+from src.metrics import LatencyWindow
+
+def _rag(latency):
+    return SimpleNamespace(backend=SimpleNamespace(count=lambda: 42), retrieval_latency=latency)
+
+def test_status_reads_snapshot_with_staleness():
+    latency = LatencyWindow()
+    checker = HealthChecker(_rag(latency), interval=60)
+    first = checker.get_status()
+    assert first["components"]["retrieval"]["status"] == "idle"
+    assert first["components"]["vector_store"]["document_count"] == 42
+
+    # Within the interval the snapshot is reused, not re-sampled
+    latency.observe(12.0)
+    start = time.perf_counter()
+    second = checker.get_status()
+    assert time.perf_counter() - start < 0.05
+    assert second["components"]["retrieval"]["status"] == "idle"
+    assert second["staleness_seconds"] >= 0 and second["stale"] is False
+
+    checker.sample()
+    assert checker.get_status()["components"]["retrieval"]["p50_ms"] == 12.0
+
+def test_errors_from_real_traffic_degrade_status():
+    latency = LatencyWindow()
+    for ok in [True, False, False]:
+        latency.observe(5.0, ok=ok)
+    checker = HealthChecker(_rag(latency), interval=0.01).start()
+    try:
+        time.sleep(0.05)
+        status = checker.get_status()
+    finally:
+        checker.stop()
+    assert status["status"] == "degraded"
+    assert status["components"]["retrieval"]["error_rate"] > 0.5
+
+def test_latency_window_drops_old_samples():
+    latency = LatencyWindow(window_seconds=0.05, max_samples=3)
+    for ms in (1, 2, 3, 4):
+        latency.observe(ms)
+    assert latency.snapshot()["count"] == 3 and latency.snapshot()["max_ms"] == 4
+    time.sleep(0.06)
+    assert latency.snapshot()["count"] == 0
@@ -0,0 +1,70 @@
+"""Tests for the BM25 index and hybrid rank fusion."""
+
+import numpy as np
+
+from src.retrieval.base import SearchHit
+from src.retrieval.bm25 import BM25_INDEX_FILE, BM25Index, LexicalSearcher, tokenize
+from src.retrieval.filters import FILTER_INDEX_FILE, InvertedIndex, normalize_filters
+from src.retrieval.hybrid import fuse_hits, reciprocal_rank_fusion
+from src.retrieval.index_version import file_fingerprint
+
+DOCUMENTS = [
+    ("c0", "Unauthorized charges on my credit card after fraud"),
+    ("c1", "Money transfer delayed for two weeks"),
+    ("c2", "Overdraft fee charged on checking account"),
+    ("c3", "Credit card fraud again, second unauthorized charge"),
+    ("c4", "Wire transfer never arrived"),
+]
+
+def test_tokenize_drops_stopwords_and_case():
+    assert tokenize("The Credit CARD was charged!") == ["credit", "card", "charged"]
+
+def test_bm25_ranks_matching_documents(tmp_path):
+    index = BM25Index.build(DOCUMENTS)
+    hits = index.search("credit card fraud", k=3)
+    assert {row for row, _ in hits[:2]} == {0, 3}
+    assert all(score > 0 for _, score in hits)
+    assert index.search("mortgage", k=3) == []
+
+    # Round-trip through the persisted npz
+    path = str(tmp_path / "bm25.npz")
+    index.save(path, "fp")
+    loaded, fingerprint = BM25Index.load(path)
+    assert fingerprint == "fp"
+    assert loaded.search("transfer", k=5) == index.search("transfer", k=5)
+    assert list(loaded.ids) == [doc_id for doc_id, _ in DOCUMENTS]
+
+def test_lexical_search_respects_filters():
+    products = ["Credit card", "Money transfer", "Checking", "Debit card", "Money transfer"]
+    searcher = LexicalSearcher(
+        BM25Index.build(DOCUMENTS),
+        InvertedIndex.from_columns({"product": products})
+    )
+    hits = searcher.search("card fraud transfer", k=5, filters=normalize_filters({"product": "Money transfer"}))
+    assert {doc_id for doc_id, _ in hits} == {"c1", "c4"}
+
+def test_lexical_searcher_refuses_stale_indexes(tmp_path):
+    """Indexes built from another version of the parquet are not served."""
+    source = tmp_path / "emb.parquet"
+    source.write_bytes(b"v1")
+    store = tmp_path / "store"
+    store.mkdir()
+    BM25Index.build(DOCUMENTS).save(str(store / BM25_INDEX_FILE), file_fingerprint(str(source)))
+    InvertedIndex.from_columns({"product": ["Credit card"] * 5}).save(
+        str(store / FILTER_INDEX_FILE), file_fingerprint(str(source)))
+
+    assert LexicalSearcher.from_store(str(store), str(source)) is not None
+    source.write_bytes(b"version 2")
+    assert LexicalSearcher.from_store(str(store), str(source)) is None
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "a", "d"]], k=3)
+    assert [doc_id for doc_id, _ in fused] == ["a", "c", "b"]
+
+def test_fuse_hits_keeps_first_list_similarity():
+    vector = [SearchHit("a", "x", {}, 0.8), SearchHit("b", "y", {}, 0.7)]
+    lexical = [SearchHit("b", "y", {}, 1.0), SearchHit("c", "z", {}, 0.5)]
+    fused = fuse_hits([vector, lexical], k=3)
+    assert [hit.id for hit in fused] == ["b", "a", "c"]
+    assert fused[0].similarity == 0.7
+    assert np.isclose(fused[2].similarity, 0.5)
@@ -0,0 +1,70 @@
+"""Tests for the NumPy IVF approximate index."""
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.retrieval.filters import normalize_filters
+from src.retrieval.ivf_backend import IVFBackend, IVFIndex, build_ivf_index, nprobe_sweep
+from src.retrieval.numpy_backend import NumpyBackend
+
+def _embeddings(n=400, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((8, dim))
+    return (centers[rng.integers(0, 8, n)] + 0.3 * rng.standard_normal((n, dim))).astype(np.float32)
+
+def test_full_probe_matches_exact_search(tmp_path):
+    embeddings = _embeddings()
+    index = IVFIndex.build(embeddings, nlist=10)
+    assert index.offsets[-1] == len(embeddings)
+    assert sorted(index.rows.tolist()) == list(range(len(embeddings)))
+
+    exact = NumpyBackend([str(i) for i in range(400)], [""] * 400, [{}] * 400, embeddings)
+    queries = exact.embeddings[:5]
+    rows, _ = index.search(queries, k=5, nprobe=10)[2]
+    assert [str(r) for r in rows] == [h.id for h in exact.search(queries, 5)[2]]
+
+    index.save(str(tmp_path), "fp")
+    loaded, fingerprint = IVFIndex.load(str(tmp_path))
+    assert fingerprint == "fp"
+    assert np.array_equal(loaded.search(queries, 5, 3)[0][0], index.search(queries, 5, 3)[0][0])
+
+    sweep = nprobe_sweep(index, queries, k=5, nprobes=(1, 10))
+    assert sweep[-1]["recall"] == 1.0
+    assert sweep[0]["recall"] <= sweep[-1]["recall"]
+
+def test_backend_from_streamed_build(tmp_path):
+    embeddings = _embeddings(seed=1)
+    source = str(tmp_path / "embeddings.parquet")
+    pq.write_table(pa.table({
+        "id": [f"doc{i}" for i in range(400)],
+        "document": ["text"] * 400,
+        "embedding": pa.array([row.tolist() for row in embeddings], type=pa.list_(pa.float32())),
+        "metadata": pa.array([{"state": ["CA", "NY"][i % 2]} for i in range(400)])
+    }), source, row_group_size=100)
+
+    build_ivf_index(source, str(tmp_path), nlist=6, batch_size=64)
+    backend = IVFBackend.from_store(source, str(tmp_path), nprobe=6)
+
+    hits = backend.search(embeddings[7], k=3)[0]
+    assert hits[0].id == "doc7"
+    hits = backend.search(embeddings[7], k=5, filters=normalize_filters({"state": "CA"}))[0]
+    assert len(hits) == 5 and all(h.metadata["state"] == "CA" for h in hits)
+
+def test_filtered_search_returns_k_allowed_hits():
+    """Selective filters fall back to exact search; others widen the probe."""
+    embeddings = _embeddings(seed=2)
+    index = IVFIndex.build(embeddings, nlist=10)
+    exact = NumpyBackend([str(i) for i in range(400)], [""] * 400, [{}] * 400, embeddings)
+    queries = exact.embeddings[:3]
+
+    few = np.zeros(400, dtype=bool)
+    few[[5, 50, 150, 300, 399]] = True
+    for rows, scores in index.search(queries, k=10, nprobe=1, allowed=few):
+        assert sorted(rows.tolist()) == [5, 50, 150, 300, 399]
+        assert list(scores) == sorted(scores, reverse=True)
+
+    half = np.arange(400) % 2 == 0
+    for q, (rows, _) in enumerate(index.search(queries, k=60, nprobe=1, allowed=half)):
+        assert len(rows) == 60 and all(half[rows])
+        assert rows[0] == q or not half[q]
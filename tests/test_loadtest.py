@@ -0,0 +1,88 @@
+"""Tests for the concurrent load-test harness."""
+
+import asyncio
+import random
+import uuid
+
+from src.loadtest import LoadConfig, LoadTest, QuestionMix, classify
+from src.middleware.rate_limiter import RateLimiter
+from src.session import SessionManager
+from src.utils.validation import validate_question
+
+def test_classify_app_replies():
+    assert classify(" Rate limit exceeded. Please wait a moment.") == "rate_limited"
+    assert classify("⚠️ Question cannot be empty") == "invalid"
+    assert classify("⏳ Still loading the complaint index, please try again in a moment.") == "not_ready"
+    assert classify("❌ An error occurred. Our team has been notified.") == "error"
+    assert classify("##  Analysis\nCustomers report late fees") == "ok"
+
+def test_question_mix_is_skewed_and_repeatable():
+    pool = [f"question {i}" for i in range(50)]
+
+    def draw(seed):
+        mix = QuestionMix(random.Random(seed), pool, unique_share=0.2, invalid_share=0.1)
+        return [mix.next() for _ in range(2_000)]
+
+    questions = draw(1)
+    assert questions == draw(1)
+    assert questions.count("question 0") > questions.count("question 49") * 5
+    invalid = sum(1 for q in questions if not q.strip() or q.startswith("<"))
+    assert 100 < invalid < 300
+    assert any(q.startswith("question") and " customers in " in q for q in questions)
+
+def _chat_app(max_requests):
+    """A respond() with the app's session ids, rate limiting, validation and sessions."""
+    limiter = RateLimiter(max_requests=max_requests, window_seconds=60)
+    sessions = SessionManager()
+    received = []
+
+    async def respond(message, history, session_id=None):
+        received.append(session_id)
+        session_id = session_id or uuid.uuid4().hex
+        if not limiter.is_allowed(session_id):
+            limited = " Rate limit exceeded. Please wait a moment."
+            yield history + [{"role": "assistant", "content": limited}], session_id
+            return
+        try:
+            message = validate_question(message)
+        except ValueError as e:
+            yield history + [{"role": "assistant", "content": f"⚠️ {e}"}], session_id
+            return
+        session = sessions.get_or_create_session(session_id)
+        history = history + [{"role": "user", "content": message}]
+        yield history + [{"role": "assistant", "content": "🤔 Thinking..."}], session_id
+        await asyncio.sleep(0.001)
+        session.add_message(message, "answer")
+        yield history + [{"role": "assistant", "content": "answer"}], session_id
+
+    return respond, {"rate_limiter": limiter.stats, "sessions": sessions.stats}, received
+
+def test_load_test_reports_outcomes_and_timeline():
+    respond, components, received = _chat_app(max_requests=5)
+    config = LoadConfig(sessions=4, duration=0.3, think_time=0.005, ramp_up=0.05,
+                        sample_interval=0.1, invalid_share=0.1)
+    report = asyncio.run(LoadTest(respond, config, components).run())
+
+    outcomes = report["outcomes"]
+    assert sum(outcomes.values()) == report["requests"] > 20
+    # 5 requests per session per minute get through, the rest are limited
+    assert outcomes["ok"] + outcomes["invalid"] == 20
+    assert outcomes["rate_limited"] == report["requests"] - 20
+    assert report["latency_ms"]["ok"]["calls"] == outcomes["ok"]
+    assert report["components"]["sessions"]["sessions"] == 4
+    # Users start without a session id, like a browser, and keep the issued one
+    assert received.count(None) == 4 and len(set(received)) == 5
+    assert report["components"]["rate_limiter"]["rejected"] == outcomes["rate_limited"]
+    assert len(report["timeline"]) >= 3
+    assert report["timeline"][-1]["completed"] == report["requests"]
+    assert report["timeline"][-1]["in_flight"] == 0
+
+def test_exceptions_count_as_errors():
+    async def respond(message, history, session_id=None):
+        raise RuntimeError("boom")
+        yield
+
+    config = LoadConfig(sessions=2, duration=0.05, think_time=0.01, ramp_up=0, sample_interval=0.05)
+    report = asyncio.run(LoadTest(respond, config).run())
+    assert report["outcomes"]["error"] == report["requests"] > 0
+    assert report["latency_ms"]["ok"] is None
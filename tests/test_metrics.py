@@ -0,0 +1,47 @@
+"""Tests for the metrics registry and Prometheus endpoint."""
+
+import urllib.request
+
+import pytest
+
+from src.metrics import MetricsRegistry, start_metrics_server, timed_request, timed_stage
+
+def test_prometheus_rendering():
+    registry = MetricsRegistry()
+    with timed_stage("embed", registry):
+        pass
+    registry.histogram("rag_stage_duration_seconds", labels={"stage": "embed"}).observe(0.003)
+    registry.counter("rag_fallbacks", "Degraded requests", {"kind": "lexical"}).inc()
+    registry.counter_func("rag_cache_hits", lambda: 7, labels={"cache": "answer"})
+    registry.gauge("rag_saturation", lambda: 0.25)
+    registry.gauge("broken", lambda: 1 / 0)
+
+    text = registry.render_prometheus()
+    assert '# TYPE rag_stage_duration_seconds histogram' in text
+    assert 'rag_stage_duration_seconds_bucket{stage="embed",le="0.005"} 2' in text
+    assert 'rag_stage_duration_seconds_bucket{stage="embed",le="+Inf"} 2' in text
+    assert 'rag_stage_duration_seconds_count{stage="embed"} 2' in text
+    assert '# TYPE rag_fallbacks_total counter' in text
+    assert 'rag_fallbacks_total{kind="lexical"} 1' in text
+    assert 'rag_cache_hits_total{cache="answer"} 7' in text
+    assert 'rag_saturation 0.25' in text
+    assert 'broken' not in text
+
+    with pytest.raises(ValueError):
+        registry.counter("rag_saturation")
+
+def test_timed_request_as_decorator_and_endpoint():
+    registry = MetricsRegistry()
+
+    @timed_request("answer", registry)
+    def answer():
+        return "ok"
+
+    assert answer() == "ok" and answer() == "ok"
+    server = start_metrics_server(0, host="127.0.0.1", registry=registry)
+    try:
+        port = server.server_address[1]
+        body = urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics").read().decode()
+    finally:
+        server.shutdown()
+    assert 'rag_request_duration_seconds_count{operation="answer"} 2' in body
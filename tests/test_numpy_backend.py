@@ -0,0 +1,80 @@
+"""Tests for the in-process NumPy exact-search backend."""
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from src.retrieval.base import top_k_indices
+from src.retrieval.filters import InvertedIndex, normalize_filters
+from src.retrieval.numpy_backend import NumpyBackend
+
+def _write_parquet(path, embeddings):
+    n = len(embeddings)
+    table = pa.table({
+        "id": [f"doc{i}" for i in range(n)],
+        "document": [f"complaint text {i}" for i in range(n)],
+        "embedding": pa.array([row.tolist() for row in embeddings], type=pa.list_(pa.float32())),
+        "metadata": pa.array([
+            {"product": "Credit card", "company": "Test Bank", "complaint_id": str(i), "chunk_index": 0}
+            for i in range(n)
+        ])
+    })
+    pq.write_table(table, path)
+
+def test_top_k_matches_full_sort():
+    """argpartition selection should agree with a full descending sort."""
+    scores = np.random.default_rng(0).standard_normal((3, 50))
+    expected = np.argsort(-scores, axis=1)[:, :5]
+    assert np.array_equal(top_k_indices(scores, 5), expected)
+
+def test_exact_search_from_parquet(tmp_path):
+    """Backend loaded from parquet returns the exact nearest neighbours."""
+    embeddings = np.random.default_rng(1).standard_normal((100, 8)).astype(np.float32)
+    path = tmp_path / "embeddings.parquet"
+    _write_parquet(path, embeddings)
+
+    backend = NumpyBackend.from_parquet(str(path))
+    assert backend.count() == 100
+    assert backend.embeddings.flags["C_CONTIGUOUS"]
+
+    hits = backend.search(embeddings[42], k=3)[0]
+    assert len(hits) == 3
+    assert hits[0].id == "doc42"
+    assert hits[0].similarity == pytest.approx(1.0, abs=1e-5)
+    assert hits[0].metadata["product"] == "Credit card"
+    assert hits[0].metadata["sub_issue"] == ""
+
+def test_k_larger_than_corpus():
+    """Asking for more results than stored chunks returns every chunk."""
+    backend = NumpyBackend(["a", "b"], ["x", "y"], [{}, {}], np.eye(2, dtype=np.float32))
+    hits = backend.search(np.array([1.0, 0.0]), k=10)[0]
+    assert [h.id for h in hits] == ["a", "b"]
+
+def test_filtered_search_scores_only_matching_rows(tmp_path):
+    """Equality and IN filters are resolved through the inverted index."""
+    embeddings = np.random.default_rng(2).standard_normal((40, 8)).astype(np.float32)
+    states = ["CA", "NY", "TX", "WA"]
+    metadatas = [{"state": states[i % 4], "product": "Credit card"} for i in range(40)]
+    backend = NumpyBackend([f"doc{i}" for i in range(40)], ["text"] * 40, metadatas, embeddings)
+
+    hits = backend.search(embeddings[5], k=3, filters=normalize_filters({"state": "NY"}))[0]
+    assert hits[0].id == "doc5"
+    assert all(h.metadata["state"] == "NY" for h in hits)
+
+    hits = backend.search(embeddings[0], k=40, filters=normalize_filters({"state": ["CA", "TX"]}))[0]
+    assert len(hits) == 20
+    assert {h.metadata["state"] for h in hits} == {"CA", "TX"}
+
+    assert backend.search(embeddings[0], k=3, filters=normalize_filters({"state": "ZZ"})) == [[]]
+
+    # Persisted index round-trips
+    path = str(tmp_path / "filters.npz")
+    backend.filter_index.save(path, "fp")
+    loaded, fingerprint = InvertedIndex.load(path)
+    assert fingerprint == "fp"
+    assert np.array_equal(loaded.rows_for("state", "WA"), np.arange(3, 40, 4))
+
+def test_invalid_filter_field():
+    with pytest.raises(ValueError):
+        normalize_filters({"narrative": "fraud"})
@@ -0,0 +1,55 @@
+"""Tests for complaint collapsing and neighbour-chunk expansion."""
+
+import numpy as np
+import pyarrow as pa
+
+from src.retrieval.base import SearchHit
+from src.retrieval.index_version import file_fingerprint
+from src.retrieval.numpy_backend import NumpyBackend
+from src.retrieval.positions import (
+    CHUNK_POSITIONS_FILE, ChunkPositions, collapse_by_complaint, expand_neighbors
+)
+
+def _hit(doc_id, complaint_id, chunk_index, similarity=0.5):
+    return SearchHit(doc_id, f"text {doc_id}", {"complaint_id": complaint_id, "chunk_index": chunk_index},
+                     similarity)
+
+def test_collapse_keeps_best_chunk_per_complaint():
+    hits = [_hit("a1", "A", 1, 0.9), _hit("a0", "A", 0, 0.8), _hit("b0", "B", 0, 0.7),
+            _hit("x", "", 0, 0.6), _hit("c0", "C", 0, 0.5)]
+    collapsed = collapse_by_complaint(hits, k=3)
+    assert [h.id for h in collapsed] == ["a1", "b0", "x"]
+
+def test_positional_lookup_and_expansion(tmp_path):
+    # Complaint A has chunks 0-3, B has one chunk; rows deliberately shuffled
+    ids = ["a2", "b0", "a0", "a3", "a1"]
+    metadatas = [{"complaint_id": cid, "chunk_index": idx}
+                 for cid, idx in [("A", 2), ("B", 0), ("A", 0), ("A", 3), ("A", 1)]]
+    backend = NumpyBackend(ids, [f"text {i}" for i in ids], metadatas,
+                           np.eye(5, dtype=np.float32))
+
+    positions = ChunkPositions.from_arrow(
+        pa.array(ids), pa.array(metadatas, type=pa.struct([("complaint_id", pa.string()), ("chunk_index", pa.int64())]))
+    )
+    assert positions.chunk_ids("A", 1, 3) == [(1, "a1"), (2, "a2"), (3, "a3")]
+    assert positions.chunk_ids("Z", 0, 5) == []
+
+    path = str(tmp_path / "positions.npz")
+    positions.save(path)
+    positions, _ = ChunkPositions.load(path)
+
+    expanded = expand_neighbors([_hit("a2", "A", 2, 0.9), _hit("b0", "B", 0)], positions, backend, window=1)
+    assert expanded[0].document == "text a1 text a2 text a3"
+    assert expanded[0].similarity == 0.9
+    assert expanded[1].document == "text b0"
+
+def test_from_store_refuses_stale_positions(tmp_path):
+    """Positions built from another version of the parquet are not served."""
+    source = tmp_path / "emb.parquet"
+    source.write_bytes(b"v1")
+    positions = ChunkPositions.from_arrays(["a0", "a1"], ["A", "A"], [0, 1])
+    positions.save(str(tmp_path / CHUNK_POSITIONS_FILE), file_fingerprint(str(source)))
+
+    assert ChunkPositions.from_store(str(tmp_path), str(source)) is not None
+    source.write_bytes(b"version 2")
+    assert ChunkPositions.from_store(str(tmp_path), str(source)) is None
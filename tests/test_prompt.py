@@ -1,5 +1,7 @@
 """Tests for prompt construction and answer formatting."""
 
+import asyncio
+
 import pytest
 
 def test_prompt_construction(rag_system, mock_complaint_data):
@@ -53,4 +55,113 @@ def test_response_consistency(rag_system):
     
     # Both should return something
     assert answer1 is not None
-    assert answer2 is not None
\ No newline at end of file
+    assert answer2 is not None
+
+def test_answer_cache_hit_reported(rag_system):
+    """Test that a repeated question is served from the answer cache."""
+    q = "credit card fraud"
+    
+    _, _, first = rag_system.answer_question(q, return_metadata=True)
+    _, _, second = rag_system.answer_question(q, return_metadata=True)
+    
+    assert second["cache_hit"] is True
+    assert second["index_version"] == first["index_version"]
+
+def test_async_answer_matches_sync(rag_system):
+    """Test that the async API returns the same answer as the sync one."""
+    q = "late fees on my credit card"
+    
+    answer, sources = rag_system.answer_question(q)
+    async_answer, async_sources = asyncio.run(rag_system.aanswer_question(q))
+    
+    assert async_answer == answer
+    assert len(async_sources) == len(sources)
+
+def test_packer_fills_budget_by_score_without_duplicates():
+    """Best complaints go first, duplicates are skipped, text ends at a sentence."""
+    from src.prompt import ContextPacker, estimate_tokens
+    
+    long_text = "I was charged a late fee twice on my card. Customer service refused a refund. " * 10
+    complaints = [
+        {"id": 1, "complaint_id": "c1", "text": "Low score complaint about a branch.", "product": "Checking",
+         "company": "Bank C", "similarity": 0.2, "issue": "Other"},
+        {"id": 2, "complaint_id": "c2", "text": long_text, "product": "Credit card", "company": "Bank A",
+         "similarity": 0.9, "issue": "Fees"},
+        {"id": 3, "complaint_id": "c3", "text": "Someone used my card for fraud.  The bank closed my account!",
+         "product": "Credit card", "company": "Bank B", "similarity": 0.8, "issue": "Fraud"},
+        {"id": 4, "complaint_id": "c4", "text": "someone used my card for fraud. The bank closed my account",
+         "product": "Credit card", "company": "Bank B", "similarity": 0.7, "issue": "Fraud"},
+        {"id": 5, "complaint_id": "c2", "text": "Another chunk of the late fee complaint.", "product": "Credit card",
+         "company": "Bank A", "similarity": 0.6, "issue": "Fees"},
+    ]
+    packer = ContextPacker(max_prompt_tokens=10_000, max_complaint_tokens=40, counter=estimate_tokens)
+    
+    packed = packer.pack(complaints, budget=10_000)
+    assert [c["id"] for c in packed.included] == [2, 3, 1]
+    assert packed.duplicates == 2 and packed.trimmed == 1
+    assert "refund. I was charged a late fee twice on my card.\n" in packed.text
+    assert estimate_tokens(packed.text) == packed.tokens
+    
+    prompt = packer.build_prompt("What are credit card issues?", complaints)
+    assert prompt.index("Complaint #2") < prompt.index("Complaint #3") < prompt.index("Complaint #1")
+    assert "USER QUESTION: What are credit card issues?" in prompt
+
+def test_packer_respects_prompt_budget():
+    from src.prompt import ContextPacker, count_tokens
+    
+    complaints = [
+        {"id": i, "text": "The transfer was delayed for weeks. Nobody answered my calls. " * 5,
+         "product": "Money transfer", "company": f"Bank {i}", "similarity": 1 - i / 100, "issue": "Delay"}
+        for i in range(50)
+    ]
+    for budget in (300, 600, 1200):
+        packer = ContextPacker(max_prompt_tokens=budget, max_complaint_tokens=60)
+        prompt = packer.build_prompt("Why are transfers delayed?", complaints)
+        assert count_tokens(prompt) <= budget
+        assert "Complaint #0" in prompt and "Complaint #49" not in prompt
+    
+    assert "No relevant complaints found" in ContextPacker().build_prompt("test question", [])
+
+def test_trim_to_budget_cuts_at_sentence_then_word():
+    from src.prompt import estimate_tokens, trim_to_budget
+    
+    text = "First sentence here. Second sentence is a bit longer than the first. Third."
+    assert trim_to_budget(text, 100, estimate_tokens) == (text, False)
+    assert trim_to_budget(text, 8, estimate_tokens) == ("First sentence here.", True)
+    body, cut = trim_to_budget("one two three four five six seven eight nine ten", 8, estimate_tokens)
+    assert (body, cut) == ("one two three four five...", True)
+    assert estimate_tokens(body) <= 8
+    assert trim_to_budget(text, 2, estimate_tokens) == ("", True)
+
+def test_packer_with_small_complaint_budget():
+    """A per-complaint budget below MIN_TEXT_TOKENS still packs every complaint."""
+    from src.prompt import ContextPacker, estimate_tokens
+    
+    complaints = [
+        {"id": i, "complaint_id": f"c{i}", "text": f"My card was declined at store {i}. I was never told why.",
+         "product": "Credit card", "company": f"Bank {i}", "similarity": 1 - i / 10, "issue": "Declined"}
+        for i in range(3)
+    ]
+    packer = ContextPacker(max_prompt_tokens=10_000, max_complaint_tokens=10, counter=estimate_tokens)
+    
+    packed = packer.pack(complaints, budget=10_000)
+    assert len(packed.included) == 3 and packed.dropped == 0
+    for i in range(3):
+        assert f"Text: My card was declined at store {i}.\n" in packed.text
+
+def test_packer_skips_long_complaint_for_short_one_that_fits():
+    """A lower-ranked complaint that fits whole is packed after a long one is left out."""
+    from src.prompt import ContextPacker, estimate_tokens
+    
+    long_complaint = {"id": 1, "complaint_id": "c1", "product": "Mortgage", "company": "Bank A",
+                      "similarity": 0.9, "issue": "Escrow",
+                      "text": "My escrow payment went up again without any explanation at all. " * 10}
+    short_complaint = {"id": 2, "complaint_id": "c2", "product": "Mortgage", "company": "Bank A",
+                       "similarity": 0.8, "issue": "Escrow", "text": "Escrow raised twice."}
+    packer = ContextPacker(max_prompt_tokens=10_000, counter=estimate_tokens)
+    budget = packer.pack([short_complaint], budget=10_000).tokens + 2
+    
+    packed = packer.pack([long_complaint, short_complaint], budget)
+    assert packed.included == [short_complaint]
+    assert packed.dropped == 1 and packed.trimmed == 0
+    assert "Text: Escrow raised twice.\n" in packed.text
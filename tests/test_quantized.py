@@ -0,0 +1,48 @@
+"""Tests for the int8 / float16 embedding layouts."""
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from src.retrieval.numpy_backend import NumpyBackend
+from src.retrieval.quantized import (
+    QuantizedNumpyBackend, _int8_params, dequantize_int8, quantize_int8,
+    recall_report, write_quantized_layout
+)
+
+def _write_parquet(path, embeddings):
+    n = len(embeddings)
+    pq.write_table(pa.table({
+        "id": [f"doc{i}" for i in range(n)],
+        "document": [f"complaint text {i}" for i in range(n)],
+        "embedding": pa.array([row.tolist() for row in embeddings], type=pa.list_(pa.float32())),
+        "metadata": pa.array([{"state": ["CA", "NY"][i % 2], "complaint_id": str(i)} for i in range(n)])
+    }), path, row_group_size=64)
+
+def test_int8_round_trip_error_is_bounded():
+    matrix = np.random.default_rng(0).uniform(-1, 1, (100, 16)).astype(np.float32)
+    offset, scale = _int8_params(matrix.min(axis=0), matrix.max(axis=0))
+    codes = quantize_int8(matrix, offset, scale)
+    assert codes.dtype == np.int8
+    assert np.abs(dequantize_int8(codes, offset, scale) - matrix).max() <= scale.max() / 2 + 1e-6
+
+@pytest.mark.parametrize("kind", ["int8", "float16"])
+def test_quantized_search_matches_exact(tmp_path, kind):
+    embeddings = np.random.default_rng(1).standard_normal((300, 32)).astype(np.float32)
+    source = str(tmp_path / "embeddings.parquet")
+    _write_parquet(source, embeddings)
+    write_quantized_layout(source, str(tmp_path), kind, batch_size=100)
+
+    backend = QuantizedNumpyBackend.from_store(source, str(tmp_path), kind)
+    exact = NumpyBackend.from_parquet(source)
+    queries = embeddings[:10]
+
+    hits = backend.search(queries, k=5)
+    expected = exact.search(queries, k=5)
+    assert [h.id for h in hits[3]] == [h.id for h in expected[3]]
+    assert hits[3][0].similarity == pytest.approx(1.0, abs=1e-5)
+    assert recall_report(backend, queries, ks=(1, 5))[1] == 1.0
+
+    with pytest.raises(ValueError):
+        QuantizedNumpyBackend.from_store(source, str(tmp_path), "int8" if kind == "float16" else "float16")
@@ -0,0 +1,52 @@
+"""Tests for the token-bucket rate limiters."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.config import RateLimitConfig
+from src.middleware.rate_limiter import RateLimiter, SQLiteRateLimiter, create_rate_limiter
+
+def test_bucket_limits_and_refills(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("src.middleware.rate_limiter.time.monotonic", lambda: clock[0])
+    limiter = RateLimiter(max_requests=3, window_seconds=30)
+
+    assert [limiter.is_allowed("a") for _ in range(4)] == [True, True, True, False]
+    assert limiter.is_allowed("b")
+
+    clock[0] += 10  # one token back (3 per 30 s)
+    assert limiter.is_allowed("a") and not limiter.is_allowed("a")
+
+def test_idle_clients_are_evicted_and_memory_capped(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr("src.middleware.rate_limiter.time.monotonic", lambda: clock[0])
+    limiter = RateLimiter(max_requests=5, window_seconds=60, max_clients=3)
+
+    for client in "abcd":
+        limiter.is_allowed(client)
+    assert limiter.stats()["clients"] == 3
+
+    clock[0] += 61
+    limiter.is_allowed("e")
+    assert limiter.stats()["clients"] == 1 and limiter.stats()["evicted"] == 4
+
+def test_concurrent_checks_never_overshoot():
+    limiter = RateLimiter(max_requests=50, window_seconds=3600)
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda _: limiter.is_allowed("shared"), range(400)))
+    assert sum(results) == 50
+
+def test_sqlite_limits_are_shared_between_instances(tmp_path):
+    path = str(tmp_path / "limits.sqlite3")
+    first = SQLiteRateLimiter(path, max_requests=4, window_seconds=3600)
+    second = SQLiteRateLimiter(path, max_requests=4, window_seconds=3600)
+
+    assert [first.is_allowed("a"), second.is_allowed("a"), first.is_allowed("a")] == [True] * 3
+    assert second.is_allowed("a") and not first.is_allowed("a")
+    assert second.stats()["clients"] == 1
+
+    limiter = create_rate_limiter(RateLimitConfig(backend="sqlite", sqlite_path=path))
+    assert isinstance(limiter, SQLiteRateLimiter)
+    with pytest.raises(ValueError):
+        create_rate_limiter(RateLimitConfig(backend="redis"))
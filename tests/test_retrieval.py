@@ -21,12 +21,22 @@ def test_semantic_search(rag_system):
             assert 'text' in result or 'document' in result
 
 def test_retrieval_with_filters(rag_system):
-    """Test retrieval (filtering not implemented yet - just verify works)."""
+    """Test that metadata filters restrict results to matching chunks."""
     query = "fee problems"
     results = rag_system.retrieve_complaints(query, k=5)
-    
-    # Just verify it runs without error
     assert isinstance(results, list)
+    
+    if results:
+        category = results[0].category
+        filtered = rag_system.retrieve_complaints(
+            query, k=5, filters={"product_category": category}
+        )
+        assert len(filtered) > 0
+        assert all(r.category == category for r in filtered)
+    
+    # Unknown fields are rejected
+    with pytest.raises(ValueError):
+        rag_system.retrieve_complaints(query, k=5, filters={"narrative": "x"})
 
 def test_empty_query_handling(rag_system):
     """Test how system handles empty queries."""
@@ -49,4 +59,18 @@ def test_k_value_bounds(rag_system):
     # Test various k values
     for k in [1, 3, 5, 10]:
         results = rag_system.retrieve_complaints(query, k=k)
-        assert len(results) <= k
\ No newline at end of file
+        assert len(results) <= k
+
+def test_batch_retrieval(rag_system):
+    """Test batched retrieval returns one list per question."""
+    questions = ["credit card late fee", "", "money transfer delay"]
+    results, errors = rag_system.retrieve_complaints_batch(questions, k=2)
+    
+    assert len(results) == len(questions)
+    
+    # Invalid questions are reported without failing the batch
+    assert 1 in errors
+    assert results[1] == []
+    for i in (0, 2):
+        assert i not in errors
+        assert len(results[i]) <= 2
@@ -0,0 +1,52 @@
+"""Tests for bounded, optionally persistent chat sessions."""
+
+from datetime import datetime, timedelta
+
+from src.session import SessionManager, SQLiteSessionManager
+
+def test_lru_cap_and_history_cap():
+    manager = SessionManager(max_sessions=2, max_history=3)
+    a = manager.get_or_create_session("a")
+    manager.get_or_create_session("b")
+    manager.get_or_create_session("a")  # a is now most recently used
+    manager.get_or_create_session("c")
+
+    assert list(manager.sessions) == ["a", "c"]
+    assert manager.stats()["evicted"] == 1
+
+    for i in range(5):
+        a.add_message(f"q{i}", f"a{i}")
+    assert [m["question"] for m in a.history] == ["q2", "q3", "q4"]
+
+def test_sweep_removes_expired_sessions():
+    manager = SessionManager()
+    stale = manager.get_or_create_session("old")
+    manager.get_or_create_session("new")
+    stale.expires_at = datetime.now() - timedelta(seconds=1)
+
+    assert manager.sweep() == 1
+    assert list(manager.sessions) == ["new"]
+    assert manager.get_or_create_session("old").history == []
+
+def test_sqlite_sessions_survive_restart(tmp_path):
+    path = str(tmp_path / "sessions.sqlite3")
+    manager = SQLiteSessionManager(path, max_sessions=1, max_history=2)
+    session = manager.get_or_create_session("s1")
+    for i in range(3):
+        session.add_message(f"q{i}", f"a{i}")
+    manager.get_or_create_session("s2")  # evicts s1 from memory only
+    assert list(manager.sessions) == ["s2"]
+
+    restarted = SQLiteSessionManager(path, max_sessions=1, max_history=2)
+    loaded = restarted.get_or_create_session("s1")
+    assert [m["question"] for m in loaded.history] == ["q1", "q2"]
+    loaded.add_message("q3", "a3")
+    assert restarted.stats()["stored_sessions"] == 2
+
+    restarted.sessions.clear()
+    restarted._connection().execute(
+        "UPDATE sessions SET expires_at = ? WHERE session_id = 's1'",
+        ((datetime.now() - timedelta(seconds=1)).isoformat(),)
+    )
+    assert restarted.sweep() == 1
+    assert restarted.get_or_create_session("s1").history == []
@@ -0,0 +1,51 @@
+"""Tests for product-category sharding and scatter-gather search."""
+
+import numpy as np
+
+from src.retrieval.filters import normalize_filters
+from src.retrieval.numpy_backend import NumpyBackend
+from src.retrieval.sharded_backend import ShardedBackend, shard_name
+
+def _shard(prefix, category, embeddings):
+    n = len(embeddings)
+    return NumpyBackend([f"{prefix}{i}" for i in range(n)], ["text"] * n,
+                        [{"product_category": category} for _ in range(n)], embeddings)
+
+def _sharded(fanout):
+    rng = np.random.default_rng(0)
+    cards = rng.standard_normal((20, 8)).astype(np.float32) + np.eye(8, dtype=np.float32)[0] * 4
+    loans = rng.standard_normal((20, 8)).astype(np.float32) + np.eye(8, dtype=np.float32)[1] * 4
+    backend = ShardedBackend(
+        shards={"credit_card": _shard("c", "Credit card", cards),
+                "personal_loan": _shard("l", "Personal loan", loans)},
+        categories={"credit_card": "Credit card", "personal_loan": "Personal loan"},
+        centroids=np.vstack([cards.mean(axis=0), loans.mean(axis=0)]),
+        fanout=fanout
+    )
+    return backend, cards, loans
+
+def test_shard_name_is_directory_safe_and_unique():
+    assert shard_name("Money transfer, virtual currency").startswith("money_transfer_virtual_currency_")
+    assert shard_name(None) == shard_name("")
+    assert shard_name("").startswith("uncategorized_")
+    assert shard_name("Credit card") == shard_name("Credit card")
+    assert shard_name("Credit card") != shard_name("Credit-card")
+    assert shard_name("Prêt") != shard_name("Crédit")
+
+def test_routing_follows_centroids_and_filters():
+    backend, cards, loans = _sharded(fanout=1)
+    assert backend.route(np.vstack([cards[0], loans[0]])) == [[0], [1]]
+    assert backend.route(cards[:1], normalize_filters({"product_category": "Personal loan"})) == [[1]]
+
+    hits = backend.search(np.vstack([cards[3], loans[4]]), k=3)
+    assert hits[0][0].id == "c3" and all(h.id.startswith("c") for h in hits[0])
+    assert hits[1][0].id == "l4"
+    assert backend.count() == 40
+
+def test_scatter_gather_merges_by_similarity():
+    backend, cards, _ = _sharded(fanout=0)
+    hits = backend.search(cards[5], k=40)[0]
+    assert len(hits) == 40
+    similarities = [h.similarity for h in hits]
+    assert similarities == sorted(similarities, reverse=True)
+    assert [h.id for h in backend.get(["l2", "c1", "missing"])] == ["l2", "c1"]
@@ -0,0 +1,44 @@
+"""Tests for background warm-up and readiness reporting."""
+
+import threading
+from types import SimpleNamespace
+
+from src.health import HealthChecker
+from src.startup import Startup
+
+class SlowSystem:
+    """Stands in for RAGSystem; warm-up blocks until released."""
+
+    def __init__(self, release):
+        self.release = release
+        self.backend = SimpleNamespace(count=lambda: 10)
+
+    def warm_up(self):
+        self.release.wait(5)
+        return {"model_load": 0.5, "first_search": 0.01}
+
+def test_readiness_flips_after_warm_up():
+    release = threading.Event()
+    startup = Startup(factory=lambda: SlowSystem(release))
+    health = HealthChecker(startup=startup)
+
+    assert health.readiness()["status"] == "not ready"
+    startup.start()
+    assert startup.wait(timeout=0.05) is None
+    assert health.get_status()["status"] == "starting"
+
+    release.set()
+    assert isinstance(startup.wait(timeout=5), SlowSystem)
+    assert health.readiness() == {"status": "ready"}
+    assert set(startup.status()["timings"]) == {"import", "index_open", "model_load", "first_search"}
+
+def test_failed_start_is_reported():
+    def broken():
+        raise FileNotFoundError("no vector store")
+
+    startup = Startup(factory=broken)
+    assert startup.start().wait(timeout=5) is None
+
+    readiness = HealthChecker(startup=startup).readiness()
+    assert readiness["status"] == "not ready"
+    assert readiness["stage"] == "failed" and "no vector store" in readiness["error"]
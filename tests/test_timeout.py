@@ -0,0 +1,136 @@
+"""Tests for the shared-pool timeout decorator."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.middleware import timeout as timeout_module
+from src.middleware.timeout import (
+    PoolSaturatedError,
+    TimeoutError,
+    TimeoutPool,
+    atimeout,
+    check_deadline,
+    remaining_time,
+    run_in_context,
+    timeout,
+)
+
+@pytest.fixture(autouse=True)
+def small_pool(monkeypatch):
+    """Give every test its own small pool."""
+    pool = TimeoutPool(max_workers=2, max_pending=1)
+    monkeypatch.setattr(timeout_module, "_pool", pool)
+    yield pool
+    pool.executor.shutdown(wait=False, cancel_futures=True)
+
+def test_returns_result_and_propagates_errors():
+    @timeout(seconds=1)
+    def ok():
+        return 42
+
+    @timeout(seconds=1)
+    def boom():
+        raise ValueError("bad")
+
+    assert ok() == 42
+    with pytest.raises(ValueError):
+        boom()
+
+def test_timeout_cancels_cooperatively(small_pool):
+    """A timed-out call stops at its next check_deadline()."""
+    stopped = threading.Event()
+
+    @timeout(seconds=0.1, error_message="too slow")
+    def slow():
+        try:
+            while True:
+                time.sleep(0.01)
+                check_deadline()
+        except TimeoutError:
+            stopped.set()
+            raise
+
+    with pytest.raises(TimeoutError, match="too slow"):
+        slow()
+
+    assert stopped.wait(1)
+    assert small_pool.stats()["timed_out"] == 1
+
+def test_nested_call_inherits_outer_deadline(small_pool):
+    """Inner calls run inline and never get more time than the outer call."""
+    seen = {}
+
+    @timeout(seconds=15)
+    def inner():
+        seen["remaining"] = remaining_time()
+        seen["thread"] = threading.current_thread().name
+
+    @timeout(seconds=0.5)
+    def outer():
+        seen["outer_thread"] = threading.current_thread().name
+        inner()
+
+    outer()
+    assert seen["remaining"] <= 0.5
+    assert seen["thread"] == seen["outer_thread"]
+    assert small_pool.stats()["submitted"] == 1
+
+def test_saturated_pool_rejects(small_pool):
+    release = threading.Event()
+
+    @timeout(seconds=5)
+    def blocked():
+        release.wait(5)
+
+    threads = [threading.Thread(target=blocked) for _ in range(3)]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+
+    try:
+        with pytest.raises(PoolSaturatedError):
+            blocked()
+        assert small_pool.stats()["rejected"] == 1
+    finally:
+        release.set()
+        for t in threads:
+            t.join()
+
+def test_async_timeout_cancels_worker_thread():
+    """atimeout propagates its deadline into executor threads."""
+    stopped = threading.Event()
+
+    def slow():
+        try:
+            while True:
+                time.sleep(0.01)
+                check_deadline()
+        except TimeoutError:
+            stopped.set()
+            raise
+
+    @atimeout(seconds=0.1, error_message="async too slow")
+    async def handler():
+        return await run_in_context(None, slow)
+
+    with pytest.raises(TimeoutError, match="async too slow"):
+        asyncio.run(handler())
+    assert stopped.wait(1)
+
+def test_async_nested_call_inherits_outer_deadline():
+    seen = []
+
+    @atimeout(seconds=60)
+    async def inner():
+        seen.append(remaining_time())
+        return await run_in_context(None, remaining_time)
+
+    @atimeout(seconds=1)
+    async def outer():
+        return await inner()
+
+    assert asyncio.run(outer()) <= 1
+    assert seen[0] <= 1
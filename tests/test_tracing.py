@@ -0,0 +1,90 @@
+"""Tests for request traces and sampled profiling."""
+
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src import tracing
+from src.config import TracingConfig
+from src.metrics import MetricsRegistry, timed_stage
+from src.middleware.timeout import run_in_context, timeout
+from src.tracing import current_trace, span, start_trace
+
+@pytest.fixture
+def configure_tracing():
+    yield lambda **kwargs: tracing.configure(TracingConfig(**kwargs))
+    tracing.configure(None)
+
+def test_spans_follow_the_request_into_workers(configure_tracing):
+    configure_tracing(trace_slow_ms=0)
+    registry = MetricsRegistry()
+    pool = ThreadPoolExecutor(1)
+
+    @timeout(5)
+    def retrieve():
+        with timed_stage("embed", registry):
+            pass
+        with span("search"):
+            pass
+
+    async def respond():
+        with start_trace("respond", session_id="s1") as trace:
+            with timed_stage("answer", registry):
+                await run_in_context(pool, retrieve)
+        return trace
+
+    trace = asyncio.run(respond())
+    pool.shutdown()
+    names = {s.name: s for s in trace.spans}
+    assert list(names) == ["answer", "embed", "search"]
+    assert names["answer"].parent_id is None
+    assert names["embed"].parent_id == names["search"].parent_id == names["answer"].span_id
+    assert trace.duration_ms >= names["answer"].duration_ms
+    assert trace.attributes == {"session_id": "s1"}
+    assert current_trace() is None
+
+def test_span_without_trace_is_a_no_op():
+    with span("search") as current:
+        assert current is None
+
+def test_nested_trace_becomes_a_span(configure_tracing):
+    configure_tracing(trace_slow_ms=0)
+    with start_trace("respond") as outer:
+        with start_trace("answer") as inner:
+            assert inner is outer
+    assert [s.name for s in outer.spans] == ["answer"]
+
+def test_sampled_cprofile_is_written(configure_tracing, tmp_path):
+    configure_tracing(profile_mode="cprofile", profile_sample_rate=1.0, profile_dir=str(tmp_path))
+    with start_trace("respond") as trace:
+        with span("generate"):
+            sum(range(1000))
+
+    files = sorted(os.listdir(tmp_path))
+    assert [f.split(".", 1)[1] for f in files] == ["prof", "trace.json"]
+    with open(tmp_path / files[1]) as f:
+        saved = json.load(f)
+    assert saved["trace_id"] == trace.trace_id
+    assert [s["name"] for s in saved["spans"]] == ["generate"]
+
+def test_profiles_kept_only_over_threshold(configure_tracing, tmp_path):
+    configure_tracing(profile_mode="tracemalloc", profile_slow_ms=60_000, profile_dir=str(tmp_path))
+    with start_trace("respond"):
+        pass
+    assert os.listdir(tmp_path) == []
+
+    configure_tracing(profile_mode="tracemalloc", profile_slow_ms=0.001, profile_dir=str(tmp_path))
+    with start_trace("respond"):
+        [bytes(100) for _ in range(100)]
+    assert {f.split(".", 1)[1] for f in os.listdir(tmp_path)} == {
+        "trace.json", "tracemalloc", "tracemalloc.txt"}
+
+def test_profiling_off_by_default(configure_tracing, tmp_path):
+    configure_tracing(profile_dir=str(tmp_path))
+    with start_trace("respond") as trace:
+        pass
+    assert trace.profile_mode == "off"
+    assert os.listdir(tmp_path) == []